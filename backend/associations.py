@@ -0,0 +1,239 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
+
+import dataset_store
+
+# Dataset-wide association matrices, computed once per dataset version in blocked, vectorized passes and kept
+# next to that version (like the query indexes), so MNAR checks and leakage checks are lookups:
+#   numeric.npy      Pearson correlation between every pair of numeric columns (pairwise-complete, like pandas)
+#   missing.npy      correlation of each column's missingness indicator with every numeric column
+#   categorical.npy  Cramér's V between every pair of low-cardinality categorical columns (missing is a level)
+#   meta.json        the column lists the matrices are indexed by, and each column's distinct count
+# Correlations are estimated on at most ASSOCIATION_MAX_ROWS rows spread evenly over the dataset; distinct
+# counts always cover every row.
+ASSOCIATION_MAX_ROWS = int(os.getenv("DATACRAFT_ASSOCIATION_MAX_ROWS", 100_000))
+BLOCK_COLUMNS = 128
+MAX_CATEGORY_LEVELS = 50
+ASSOCIATION_CACHE_SIZE = 4
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _is_numeric(arrow_type) -> bool:
+    return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_boolean(arrow_type)
+
+
+def _float_block(table: pa.Table, names: list) -> np.ndarray:
+    """Columns as one float64 matrix, NaN where a value is missing."""
+    block = np.empty((table.num_rows, len(names)), dtype=np.float64)
+    for i, name in enumerate(names):
+        block[:, i] = pc.cast(table.column(name), pa.float64()).to_numpy(zero_copy_only=False)
+    return block
+
+
+def _indicator_block(table: pa.Table, names: list) -> np.ndarray:
+    block = np.empty((table.num_rows, len(names)), dtype=np.float64)
+    for i, name in enumerate(names):
+        block[:, i] = pc.is_null(table.column(name), nan_is_null=True).to_numpy(zero_copy_only=False)
+    return block
+
+
+def _correlate(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation of every column of `x` with every column of `y`, each pair over the rows where both
+    are present (as `Series.corr` does). NaN when a pair has fewer than two rows or no variance.
+    """
+    valid_x, valid_y = ~np.isnan(x), ~np.isnan(y)
+    # Centring first keeps the sums of squares well conditioned; the pairwise terms below correct for it.
+    x = np.where(valid_x, x - np.where(valid_x, x, 0).sum(axis=0) / np.maximum(valid_x.sum(axis=0), 1), 0.0)
+    y = np.where(valid_y, y - np.where(valid_y, y, 0).sum(axis=0) / np.maximum(valid_y.sum(axis=0), 1), 0.0)
+    if valid_x.all() and valid_y.all():
+        n = np.full((x.shape[1], y.shape[1]), float(len(x)))
+        cov = x.T @ y
+        var_x = np.broadcast_to((x * x).sum(axis=0)[:, None], cov.shape)
+        var_y = np.broadcast_to((y * y).sum(axis=0)[None, :], cov.shape)
+    else:
+        valid_x, valid_y = valid_x.astype(np.float64), valid_y.astype(np.float64)
+        n = valid_x.T @ valid_y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sum_x, sum_y = x.T @ valid_y, valid_x.T @ y
+            cov = x.T @ y - sum_x * sum_y / n
+            var_x = (x * x).T @ valid_y - sum_x ** 2 / n
+            var_y = valid_x.T @ (y * y) - sum_y ** 2 / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = cov / np.sqrt(var_x * var_y)
+    scale_x = np.abs(x).max(axis=0, initial=0.0)[:, None]
+    scale_y = np.abs(y).max(axis=0, initial=0.0)[None, :]
+    degenerate = (n < 2) | (var_x <= n * (1e-12 * scale_x) ** 2) | (var_y <= n * (1e-12 * scale_y) ** 2)
+    r[degenerate] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def _blocked_correlation(load_x, x_count: int, load_y, y_count: int, symmetric: bool = False) -> np.ndarray:
+    """Correlation matrix assembled from BLOCK_COLUMNS-wide slices, so memory stays bounded on wide datasets."""
+    result = np.full((x_count, y_count), np.nan, dtype=np.float32)
+    for x_start in range(0, x_count, BLOCK_COLUMNS):
+        x_stop = min(x_start + BLOCK_COLUMNS, x_count)
+        x = load_x(x_start, x_stop)
+        for y_start in range(x_start if symmetric else 0, y_count, BLOCK_COLUMNS):
+            y_stop = min(y_start + BLOCK_COLUMNS, y_count)
+            y = x if symmetric and y_start == x_start else load_y(y_start, y_stop)
+            r = _correlate(x, y)
+            result[x_start:x_stop, y_start:y_stop] = r
+            if symmetric:
+                result[y_start:y_stop, x_start:x_stop] = r.T
+    return result
+
+
+def _cramers_v(table: pa.Table, names: list) -> np.ndarray:
+    """
+    Cramér's V between every pair of `names`, from one sparse level co-occurrence product per block of
+    columns: for a pair with contingency table C, chi2 / n = sum(C_ij^2 / (r_i c_j)) - 1.
+    """
+    rows = table.num_rows
+    codes, level_counts, owners = [], [], []
+    offset = 0
+    for column_index, name in enumerate(names):
+        encoded = table.column(name).combine_chunks().dictionary_encode()
+        levels = len(encoded.dictionary)
+        column_codes = encoded.indices.fill_null(levels).to_numpy(zero_copy_only=False).astype(np.int64)
+        counts = np.bincount(column_codes, minlength=levels + 1)
+        used = np.flatnonzero(counts)
+        remap = np.zeros(levels + 1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        codes.append(remap[column_codes] + offset)
+        level_counts.append(counts[used])
+        owners.append(np.full(len(used), column_index))
+        offset += len(used)
+    level_counts, owners = np.concatenate(level_counts), np.concatenate(owners)
+    levels_per_column = np.bincount(owners, minlength=len(names))
+
+    one_hot = sparse.csc_matrix(
+        (np.ones(rows * len(names)), (np.tile(np.arange(rows), len(names)), np.concatenate(codes))),
+        shape=(rows, offset),
+    )
+    one_hot = one_hot.multiply(1.0 / np.sqrt(level_counts)[None, :]).tocsc()
+    level_owner = sparse.csr_matrix((np.ones(offset), (np.arange(offset), owners)), shape=(offset, len(names)))
+
+    result = np.full((len(names), len(names)), np.nan, dtype=np.float32)
+    for start in range(0, len(names), BLOCK_COLUMNS):
+        stop = min(start + BLOCK_COLUMNS, len(names))
+        block_levels = np.flatnonzero((owners >= start) & (owners < stop))
+        # Entries C_ij / sqrt(r_i c_j), squared, then summed over each pair's levels
+        scaled = (one_hot[:, block_levels].T @ one_hot).power(2)
+        chi2_over_n = (level_owner[block_levels][:, start:stop].T @ scaled @ level_owner).toarray() - 1
+        dof = np.minimum(levels_per_column[start:stop, None], levels_per_column[None, :]) - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            v = np.sqrt(np.clip(chi2_over_n, 0, None) / dof)
+        v[dof < 1] = np.nan
+        result[start:stop] = np.clip(v, 0.0, 1.0)
+    return result
+
+
+def compute_associations(csv_path: str) -> dict:
+    """Builds every association matrix for the current version of a dataset."""
+    table = dataset_store.read_table(csv_path)
+    distinct_counts = {name: int(pc.count_distinct(table.column(name)).as_py()) for name in table.column_names}
+    null_counts = {name: table.column(name).null_count for name in table.column_names}
+
+    if table.num_rows > ASSOCIATION_MAX_ROWS:
+        positions = np.unique(np.linspace(0, table.num_rows - 1, num=ASSOCIATION_MAX_ROWS).astype(np.int64))
+        sample = table.take(positions)
+    else:
+        sample = table
+
+    numeric = [field.name for field in table.schema if _is_numeric(field.type)]
+    missing = [name for name in table.column_names if null_counts[name]]
+    categorical = [
+        field.name for field in table.schema
+        if not _is_numeric(field.type) and distinct_counts[field.name] + (null_counts[field.name] > 0) <= MAX_CATEGORY_LEVELS
+    ]
+
+    load_numeric = lambda start, stop: _float_block(sample, numeric[start:stop])
+    load_missing = lambda start, stop: _indicator_block(sample, missing[start:stop])
+    return {
+        "meta": {
+            "rows": table.num_rows, "sampled_rows": sample.num_rows, "numeric": numeric, "missing": missing,
+            "categorical": categorical, "distinct_counts": distinct_counts,
+        },
+        "numeric": _blocked_correlation(load_numeric, len(numeric), load_numeric, len(numeric), symmetric=True),
+        "missing": _blocked_correlation(load_missing, len(missing), load_numeric, len(numeric)),
+        "categorical": _cramers_v(sample, categorical) if categorical else np.empty((0, 0), dtype=np.float32),
+    }
+
+
+def _write_associations(path: str, associations: dict):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path)
+    for kind in ("numeric", "missing", "categorical"):
+        np.save(os.path.join(tmp_path, f"{kind}.npy"), associations[kind])
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(associations["meta"], f)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another worker published the same version first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load_associations(csv_path: str) -> dict:
+    """The association matrices of the current version, computed on first use."""
+    dataset_store.ensure_sidecar(csv_path)
+    key = dataset_store.cache_key("associations", csv_path)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    path = os.path.join(dataset_store.index_dir(csv_path), "associations")
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        _write_associations(path, compute_associations(csv_path))
+    with open(os.path.join(path, "meta.json")) as f:
+        associations = {"meta": json.load(f)}
+    for kind in ("numeric", "missing", "categorical"):
+        associations[kind] = np.load(os.path.join(path, f"{kind}.npy"), mmap_mode="r")
+
+    with _cache_lock:
+        _cache[key] = associations
+        while len(_cache) > ASSOCIATION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return associations
+
+
+def _row(associations: dict, kind: str, rows: str, columns: str, name: str) -> pd.Series:
+    meta = associations["meta"]
+    if name not in meta[rows]:
+        return pd.Series(dtype=np.float64)
+    values = np.asarray(associations[kind][meta[rows].index(name)], dtype=np.float64)
+    return pd.Series(values, index=meta[columns]).dropna()
+
+
+def numeric_correlations(csv_path: str, column: str) -> pd.Series:
+    """Correlation of a numeric column with every numeric column (itself included); empty if not numeric."""
+    return _row(load_associations(csv_path), "numeric", "numeric", "numeric", column)
+
+
+def missingness_correlations(csv_path: str, column: str) -> pd.Series:
+    """Correlation of the column's missingness indicator with every numeric column; empty if nothing is missing."""
+    return _row(load_associations(csv_path), "missing", "missing", "numeric", column)
+
+
+def categorical_associations(csv_path: str, column: str) -> pd.Series:
+    """Cramér's V of a low-cardinality categorical column with every other one (itself included)."""
+    return _row(load_associations(csv_path), "categorical", "categorical", "categorical", column)
+
+
+def distinct_counts(csv_path: str) -> dict:
+    """Distinct non-null values per column, over every row of the current version."""
+    return load_associations(csv_path)["meta"]["distinct_counts"]
@@ -0,0 +1,69 @@
+import gzip
+import hashlib
+import json
+import os
+
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+from redis import BlockingConnectionPool, Redis
+
+# One place that knows where Redis is. The API and the workers share these settings; every client draws from
+# a bounded pool, so a burst of requests waits for a free connection instead of opening one per call.
+load_dotenv()
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB_BROKER = int(os.getenv("REDIS_DB_BROKER", 0))
+REDIS_DB_CACHE = int(os.getenv("REDIS_DB_CACHE", 1))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = 10
+
+CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB_BROKER}"
+
+# Lifetime of cached profiles, column types and other per-version results
+CACHE_TTL_SECONDS = 86400
+
+# For worker tasks and code the API runs in threads
+redis_cache = Redis(connection_pool=BlockingConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB_CACHE, decode_responses=True,
+    max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT,
+))
+
+# For `async def` request handlers, so a cache lookup never blocks the event loop
+redis_async = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB_CACHE, decode_responses=True,
+    max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT,
+))
+
+# Pub/sub holds a connection for as long as an event stream is open, so subscribers get their own pool
+# instead of starving the request pool above
+redis_events = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB_CACHE, decode_responses=True)
+
+# Large payloads (statistics and diagnostics) are stored pre-serialized: a 40-character ETag followed by the
+# gzipped JSON. The API hands the gzip bytes to the client as-is (Content-Encoding: gzip) and answers
+# If-None-Match by reading only the ETag, so a cache hit never decodes or re-encodes the payload.
+# These bytes need clients that do not decode responses.
+ETAG_LENGTH = 40
+redis_payloads = Redis(connection_pool=BlockingConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB_CACHE,
+    max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT,
+))
+redis_payloads_async = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB_CACHE,
+    max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT,
+))
+
+
+def encode_payload(payload: dict, encoder=None) -> bytes:
+    body = gzip.compress(json.dumps(payload, cls=encoder).encode(), compresslevel=6, mtime=0)
+    return hashlib.sha1(body).hexdigest().encode() + body
+
+
+def split_payload(raw: bytes) -> tuple:
+    """(etag, gzipped JSON body) of a stored payload."""
+    return raw[:ETAG_LENGTH].decode(), raw[ETAG_LENGTH:]
+
+
+def decode_payload(raw: bytes):
+    if raw is None:
+        return None
+    return json.loads(gzip.decompress(split_payload(raw)[1]))
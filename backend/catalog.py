@@ -0,0 +1,165 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+
+import dataset_store
+
+# Persistent index of the datasets in `public/`, with the handful of summary fields the dashboard shows, so
+# listings never glob the directory or decode full statistics payloads. It is updated on upload, delete,
+# edits and profile completion, reconciled with the directory at API startup, and optionally kept in sync
+# with files dropped into `public/` by a watchdog observer (DATACRAFT_WATCH_PUBLIC=1).
+CATALOG_PATH = os.getenv("DATACRAFT_CATALOG_PATH", os.path.join(dataset_store.STORE_DIR, "catalog.db"))
+
+# Dashboard sort keys -> catalog columns
+SORT_COLUMNS = {
+    "name": "name",
+    "lastModified": "modified_at",
+    "size": "size_bytes",
+    "rows": "rows",
+    "columns": "columns",
+    "qualityScore": "quality_score",
+    "missing": "missing_pct",
+    "duplicates": "duplicates_pct",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    name TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    modified_at REAL NOT NULL,
+    profiled INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER,
+    columns INTEGER,
+    quality_score REAL,
+    missing_pct REAL,
+    duplicates_pct REAL,
+    summary TEXT
+);
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS datasets_by_{column} ON datasets (profiled, {column});\n"
+    for column in SORT_COLUMNS.values() if column != "name"
+)
+
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    """One connection per thread; WAL lets the API read while a worker writes."""
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        os.makedirs(os.path.dirname(os.path.abspath(CATALOG_PATH)), exist_ok=True)
+        connection = sqlite3.connect(CATALOG_PATH, timeout=5, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        _local.connection = connection
+    return connection
+
+
+def record_dataset(csv_path: str):
+    """Adds or refreshes a dataset's entry; its summary is dropped when the content version changed."""
+    if not os.path.exists(csv_path):
+        return remove_dataset(os.path.basename(csv_path))
+    _connection().execute(
+        """
+        INSERT INTO datasets (name, version, size_bytes, modified_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET
+            size_bytes = excluded.size_bytes,
+            modified_at = excluded.modified_at,
+            profiled = CASE WHEN datasets.version = excluded.version THEN datasets.profiled ELSE 0 END,
+            version = excluded.version
+        """,
+        (os.path.basename(csv_path), dataset_store.dataset_version(csv_path),
+         os.path.getsize(csv_path), dataset_store.last_modified(csv_path)),
+    )
+
+
+def record_profile(csv_path: str, statistics: dict):
+    """Stores the dashboard summary of a freshly profiled (or patched) dataset version."""
+    record_dataset(csv_path)
+    summary = {
+        "id": statistics["filename"], "filename": statistics["filename"], "size": statistics["size"],
+        "rows": statistics["rows"], "columns": statistics["columns"], "status": statistics["status"],
+        "qualityScore": statistics["qualityScore"], "missing": statistics["missing_pct"],
+        "duplicates": statistics["duplicates_pct"], "inconsistencies": 0,
+        "lastModified": statistics["lastModified"],
+    }
+    _connection().execute(
+        """
+        UPDATE datasets SET profiled = 1, rows = ?, columns = ?, quality_score = ?, missing_pct = ?,
+            duplicates_pct = ?, summary = ?
+        WHERE name = ? AND version = ?
+        """,
+        (summary["rows"], summary["columns"], summary["qualityScore"], summary["missing"], summary["duplicates"],
+         json.dumps(summary), os.path.basename(csv_path), dataset_store.dataset_version(csv_path)),
+    )
+
+
+def remove_dataset(name: str):
+    _connection().execute("DELETE FROM datasets WHERE name = ?", (name,))
+
+
+def dataset_names() -> list:
+    return [row["name"] for row in _connection().execute("SELECT name FROM datasets ORDER BY name")]
+
+
+def list_summaries(offset: int = 0, limit: int = 100, sort: str = "lastModified", descending: bool = True) -> tuple:
+    """One page of profiled dataset summaries in dashboard order: (summaries, total profiled datasets)."""
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by '{sort}'.")
+    direction = "DESC" if descending else "ASC"
+    connection = _connection()
+    rows = connection.execute(
+        f"SELECT summary FROM datasets WHERE profiled = 1 ORDER BY {SORT_COLUMNS[sort]} {direction}, name LIMIT ? OFFSET ?",
+        (limit, offset),
+    ).fetchall()
+    total = connection.execute("SELECT COUNT(*) FROM datasets WHERE profiled = 1").fetchone()[0]
+    return [json.loads(row["summary"]) for row in rows], total
+
+
+def unprofiled_names(limit: int = 100) -> list:
+    """Datasets whose current version has no summary yet."""
+    rows = _connection().execute("SELECT name FROM datasets WHERE profiled = 0 ORDER BY name LIMIT ?", (limit,))
+    return [row["name"] for row in rows]
+
+
+def sync_directory(public_dir: str):
+    """Reconciles the catalog with the CSVs actually in `public_dir` (files added or removed behind our back)."""
+    on_disk = {os.path.basename(path): path for path in glob.glob(os.path.join(public_dir, "*.csv"))}
+    for name in set(dataset_names()) - set(on_disk):
+        remove_dataset(name)
+    for path in on_disk.values():
+        record_dataset(path)
+
+
+def watch_directory(public_dir: str):
+    """
+    Keeps the catalog in sync with CSVs dropped into, changed in or removed from `public_dir`.
+    Returns the running observer, or None when the optional `watchdog` package is not installed.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        print("Info: watchdog is not installed; files dropped into public/ are picked up at the next restart.")
+        return None
+
+    class _CatalogHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            for path in (event.src_path, getattr(event, "dest_path", "")):
+                if path and path.endswith(".csv"):
+                    try:
+                        record_dataset(path)
+                    except (OSError, sqlite3.Error) as e:
+                        print(f"Warning: could not update the catalog for {path}: {e}")
+
+    observer = Observer()
+    observer.schedule(_CatalogHandler(), public_dir, recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
@@ -1,21 +1,36 @@
-from celery import Celery
+from celery import Celery, chord, current_task, states
+from celery.signals import task_postrun
 import pandas as pd
 import numpy as np
 import os
 import json
-from redis import Redis
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import pyarrow as pa
+import pyarrow.compute as pc
+from redis.exceptions import RedisError, WatchError
 from datetime import datetime, timezone
-from scipy import stats
-from statsmodels.tsa.stattools import acf
+from scipy import sparse, stats
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from ai_service import get_ai_interpretation, get_treatment_plan_hypotheses
-from data_type_detector import detect_data_type
+from data_type_detector import detect_data_types
+import dataset_store
+import catalog
+import associations
+import temporal
+import simulation_memo
+from cache import redis_cache, redis_payloads, encode_payload, decode_payload, CELERY_BROKER_URL, CACHE_TTL_SECONDS
+from profiling import profile_dataset, profile_dataset_streaming, update_profile
+from duplicates import duplicate_mask, DuplicateCounter
 
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
-from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder, FunctionTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.ensemble import (RandomForestClassifier, RandomForestRegressor,
+                              HistGradientBoostingClassifier, HistGradientBoostingRegressor)
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import roc_auc_score, mean_squared_error
 
@@ -42,189 +57,293 @@ class NumpyJSONEncoder(json.JSONEncoder):
         return super(NumpyJSONEncoder, self).default(obj)
 
 
-celery_app = Celery('tasks', broker='redis://localhost:6379/0', backend='redis://localhost:6379/0')
-redis_cache = Redis(host='localhost', port=6379, db=1, decode_responses=True)
+celery_app = Celery('tasks', broker=CELERY_BROKER_URL, backend=CELERY_BROKER_URL)
 
-@celery_app.task(time_limit=900) # 15 minute time limit for huge files
-def generate_comprehensive_stats(file_path: str):
-    # This function remains unchanged.
-    try:
-        file_name = os.path.basename(file_path)
-        cache_key = f"statistics:{file_name}"
-        
-        common_na_values = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
-                            '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'n/a',
-                            'nan', 'null', 'None']
-        
-        df = pd.read_csv(file_path, on_bad_lines='skip', na_values=common_na_values)
-
-        if df.empty:
-            redis_cache.delete(cache_key)
-            return
-
-        # --- Perform all calculations in one pass ---
-        rows, columns = df.shape
-        missing_cells = df.isnull().sum().sum()
-        total_cells = rows * columns if rows > 0 else 1
-        missing_pct = (missing_cells / total_cells) * 100
-        duplicate_rows = df.duplicated().sum()
-        duplicate_pct = (duplicate_rows / rows) * 100 if rows > 0 else 0
-        quality_score = max(0, 100 - missing_pct - duplicate_pct)
-        status = "RAW"
-        if quality_score > 90: status = "CLEANED"
-        elif quality_score > 60: status = "CLEANING"
-        
-        column_stats = []
-        numeric_column_count = 0
-        text_column_count = 0
-
-        for header in df.columns:
-            series = df[header]
-            clean_series = series.dropna()
-            null_count = int(series.isnull().sum())
-            data_type = detect_data_type(series)
-
-            if data_type in ['integer', 'float', 'identifier']:
-                numeric_column_count += 1
-            else:
-                text_column_count += 1
-            
-            stat = {
-                "column": header, "dataType": data_type, "nullCount": null_count,
-                "nullPercentage": (null_count / rows) * 100 if rows > 0 else 0,
-                "uniqueValues": series.nunique(), "totalValues": len(clean_series),
-                "mean": "N/A", "median": "N/A", "mode": "N/A"
-            }
-            if data_type in ['integer', 'float'] and not clean_series.empty:
-                stat["mean"] = round(clean_series.mean(), 2)
-                stat["median"] = round(clean_series.median(), 2)
-                modes = clean_series.mode()
-                if not modes.empty:
-                    stat["mode"] = ", ".join(modes.astype(str).tolist())
-            column_stats.append(stat)
-
-        comprehensive_result = {
-            "filename": file_name,
-            "lastModified": datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d'),
-            "size": f"{os.path.getsize(file_path) / (1024*1024):.1f}MB",
-            "rows": rows, "columns": columns, "totalCells": total_cells,
-            "status": status, "qualityScore": round(quality_score),
-            "missing_pct": round(missing_pct), "duplicates_pct": round(duplicate_pct),
-            "overallNullCount": int(missing_cells),
-            "columnStats": column_stats,
-            "numericColumnCount": numeric_column_count,
-            "textColumnCount": text_column_count
-        }
+# Job progress and results are pushed to clients through Redis pub/sub (see /api/events) instead of being polled.
+def job_channel(job_id: str) -> str:
+    return f"events:job:{job_id}"
 
-        redis_cache.set(cache_key, json.dumps(comprehensive_result, cls=NumpyJSONEncoder), ex=86400)
-        return comprehensive_result
-    except Exception as e:
-        print(f"CRITICAL ERROR in generate_comprehensive_stats for {file_path}: {e}")
-        raise e
+def dataset_channel(dataset_name: str) -> str:
+    return f"events:dataset:{dataset_name}"
 
-@celery_app.task(time_limit=1800)
-def generate_diagnostic_report(file_path: str):
+def publish_event(channel: str, event: dict):
     try:
-        file_name = os.path.basename(file_path)
-        cache_key = f"diagnostics:{file_name}"
-
-        df = pd.read_csv(
-            file_path,
-            on_bad_lines='skip',
-            na_values=['', 'NA', 'N/A', 'NULL', 'None', 'nan', 'NaN'],
-            encoding='utf-8',
-            low_memory=False
-        )
-
-        if df.empty:
-            redis_cache.delete(cache_key)
-            return {"status": "ERROR", "message": "Dataset is empty."}
+        redis_cache.publish(channel, json.dumps(event, cls=NumpyJSONEncoder))
+    except RedisError as e:
+        print(f"Warning: could not publish event on {channel}: {e}")
 
-        rows, columns = df.shape
-        duplicate_row_count = int(df.duplicated().sum())
-        dataset_summary = {
-            "row_count": rows,
-            "column_count": columns,
-            "duplicate_row_count": duplicate_row_count,
-        }
-
-        column_diagnostics = []
-        for header in df.columns:
-            series = df[header]
-
-            # Infer data type robustly (float, integer, or categorical)
-            if pd.api.types.is_numeric_dtype(series):
-                data_type = "float" if pd.api.types.is_float_dtype(series) else "integer"
-            else:
-                data_type = "categorical"
-
-            missing_count = int(series.isnull().sum())
-            missing_percentage = round(series.isnull().mean() * 100, 2)
-            constant_flag = bool(series.nunique(dropna=True) == 1)
-
-            col_diag = {
-                "column_name": header,
-                "data_type": data_type,
-                "missing_count": missing_count,
-                "missing_percentage": missing_percentage,
-                "constant_flag": constant_flag
-            }
-
-            # Numeric columns: only add allowed numeric metrics if at least 3 unique values
-            if data_type in ["integer", "float"]:
-                clean_series = series.dropna()
-                if clean_series.nunique() > 2:
-                    col_diag["skewness"] = round(float(clean_series.skew()), 2)
-                    col_diag["kurtosis"] = round(float(clean_series.kurtosis()), 2)
-
-            # Categorical columns: only add allowed categorical metrics if non-empty
-            if data_type == "categorical":
-                clean_series = series.dropna()
-                if len(clean_series) > 0:
-                    unique_count = int(clean_series.nunique())
-                    unique_ratio = round(unique_count / len(clean_series), 4) if len(clean_series) > 0 else 0
-                    col_diag["unique_count"] = unique_count
-                    col_diag["unique_ratio"] = unique_ratio
-
-            column_diagnostics.append(col_diag)
-
-        diagnostic_report = {
-            "filename": file_name,
-            "dataset_summary": dataset_summary,
-            "column_diagnostics": column_diagnostics,
-        }
+def report_progress(message: str, done: int = None, total: int = None, file_path: str = None, job_id: str = None):
+    """
+    Progress of the running task, for followers of its job and, given `file_path`, of that dataset.
+    Subtasks of a job pass the `job_id` their followers know.
+    """
+    event = {"type": "progress", "message": message, "done": done, "total": total}
+    job_id = job_id or (current_task.request.id if current_task else None)
+    if job_id:
+        publish_event(job_channel(job_id), event)
+    if file_path:
+        publish_event(dataset_channel(os.path.basename(file_path)), event)
+
+@task_postrun.connect
+def publish_job_finished(task_id=None, state=None, **kwargs):
+    # A task that replaced itself (self.replace) finishes later, under the same id, as its replacement
+    if state == states.IGNORED:
+        return
+    # Sent after the result backend has stored the result, so followers can read it straight away
+    publish_event(job_channel(task_id), {"type": "finished", "state": state})
+
+def _column_types_key(file_path: str) -> str:
+    return dataset_store.cache_key("dtypes", file_path)
+
+def get_cached_column_types(file_path: str, columns: list) -> dict:
+    """Semantic types already inferred for this dataset version; unknown columns map to None."""
+    columns = [str(c) for c in columns]
+    if not columns:
+        return {}
+    return dict(zip(columns, redis_cache.hmget(_column_types_key(file_path), columns)))
+
+def _queue_column_types(pipe, file_path: str, column_types: dict):
+    if column_types:
+        pipe.hset(_column_types_key(file_path), mapping=column_types)
+        pipe.expire(_column_types_key(file_path), CACHE_TTL_SECONDS)
+
+def store_column_types(file_path: str, column_types: dict):
+    with redis_cache.pipeline(transaction=False) as pipe:
+        _queue_column_types(pipe, file_path, column_types)
+        pipe.execute()
+
+def get_column_types(file_path: str, df: pd.DataFrame) -> dict:
+    """Types for every column of `df`, inferring (in one batch) only the ones not cached for this version."""
+    column_types = get_cached_column_types(file_path, df.columns)
+    unknown = [col for col, data_type in column_types.items() if data_type is None]
+    if unknown:
+        inferred = detect_data_types(df[unknown])
+        store_column_types(file_path, inferred)
+        column_types.update(inferred)
+    return column_types
+
+def _file_summary(file_path: str) -> dict:
+    return {
+        "file_name": os.path.basename(file_path),
+        "last_modified": datetime.fromtimestamp(dataset_store.last_modified(file_path)).strftime('%Y-%m-%d'),
+        "size": f"{os.path.getsize(file_path) / (1024*1024):.1f}MB"
+    }
 
-        redis_cache.set(
-            cache_key,
-            json.dumps(diagnostic_report, cls=NumpyJSONEncoder),
-            ex=86400
+def _profile_cache_keys(file_path: str) -> list:
+    return [dataset_store.cache_key(prefix, file_path) for prefix in ("statistics", "diagnostics", "dtypes")]
+
+def cache_profile(file_path: str, statistics: dict, diagnostics: dict):
+    """Caches a profile and the column types it settled on for the dataset's current version, in one round-trip."""
+    stats_key, diagnostics_key, _ = _profile_cache_keys(file_path)
+    with redis_payloads.pipeline(transaction=False) as pipe:
+        pipe.set(stats_key, encode_payload(statistics, NumpyJSONEncoder), ex=CACHE_TTL_SECONDS)
+        pipe.set(diagnostics_key, encode_payload(diagnostics, NumpyJSONEncoder), ex=CACHE_TTL_SECONDS)
+        _queue_column_types(pipe, file_path, {stat["column"]: stat["dataType"] for stat in statistics["columnStats"]})
+        pipe.execute()
+
+def get_cached_profile(file_path: str):
+    """(statistics, diagnostics) cached for the dataset's current version, or None."""
+    stats_raw, diagnostics_raw = redis_payloads.mget(_profile_cache_keys(file_path)[:2])
+    if not stats_raw or not diagnostics_raw:
+        return None
+    return decode_payload(stats_raw), decode_payload(diagnostics_raw)
+
+def patch_cached_profile(file_path: str, cached_profile, stale_keys: list, changed: pd.DataFrame, duplicate_rows: int = None):
+    """
+    Carries the previous version's cached profile over to the edited dataset, re-profiling only the
+    columns in `changed`. Without a previous profile the next read simply profiles the whole dataset.
+    The previous version's entries are left to expire with their TTL, so a rollback finds them again.
+    """
+    current_keys = _profile_cache_keys(file_path)
+    if current_keys == stale_keys:
+        return  # The edit was a no-op, the cached entries still describe the data
+    catalog.record_dataset(file_path)
+    if cached_profile is None:
+        return
+    try:
+        statistics, diagnostics = update_profile(
+            *cached_profile, changed, dataset_store.dataset_schema(file_path).names,
+            duplicate_rows=duplicate_rows, **_file_summary(file_path)
         )
-        return diagnostic_report
-
+    except (KeyError, ValueError) as e:
+        print(f"Info: Cached profile for {file_path} could not be patched ({e}); it will be rebuilt on next read.")
+        return
+    cache_profile(file_path, statistics, diagnostics)
+    catalog.record_profile(file_path, statistics)
+    publish_event(dataset_channel(os.path.basename(file_path)), {"type": "profile_ready"})
+
+def count_dataset_duplicates(file_path: str) -> int:
+    """
+    Duplicate rows of the current version from its row fingerprints, fed to the counter chunk by chunk.
+    The column store keeps them per version and derives an edited version's from its parent's, so after a
+    column edit only that column is hashed. Datasets read straight from the CSV are fingerprinted chunk by chunk.
+    """
+    dataset_store.ensure_sidecar(file_path)
+    with DuplicateCounter() as duplicate_counter:
+        if dataset_store.has_fresh_sidecar(file_path):
+            fingerprints = dataset_store.row_fingerprints(file_path)
+            for start in range(0, len(fingerprints), dataset_store.CHUNK_ROWS):
+                duplicate_counter.add_fingerprints(np.asarray(fingerprints[start:start + dataset_store.CHUNK_ROWS]))
+        else:
+            for chunk in dataset_store.iter_dataset_chunks(file_path):
+                duplicate_counter.add(chunk)
+        return duplicate_counter.count() if duplicate_counter.rows else 0
+
+def _changed_columns(before: pd.DataFrame, after: pd.DataFrame):
+    """Columns of `after` that are new or hold different values, or None if rows were added or removed."""
+    if len(before) != len(after) or not before.index.equals(after.index):
+        return None
+    changed = []
+    for col in after.columns:
+        if col not in before.columns or not after[col].equals(before[col]) or after[col].dtype != before[col].dtype:
+            changed.append(col)
+    return changed
+
+@celery_app.task(time_limit=900)
+def build_dataset_sidecar(file_path: str):
+    """Converts a freshly uploaded CSV into its columnar sidecar once, before any other task reads it."""
+    try:
+        manifest = dataset_store.build_sidecar(file_path)
+        if manifest.get("sidecar_unavailable"):
+            return {"status": "SKIPPED", "message": "CSV could not be stored by column; tasks will read the CSV directly."}
+        return {"status": "SUCCESS", "rows": manifest["rows"], "columns": len(manifest["columns"])}
     except Exception as e:
-        print(f"CRITICAL ERROR in generate_diagnostic_report: {e}")
+        print(f"CRITICAL ERROR in build_dataset_sidecar for {file_path}: {e}")
         raise e
 
+@celery_app.task(time_limit=1800)
+def generate_dataset_profile(file_path: str, lease_key: str = None):
+    """
+    Profiles a dataset once and writes both the `statistics:` and the `diagnostics:` cache entries
+    from the same scan (one load, one duplicate pass, one loop over the columns).
+    `lease_key` is the single-flight lease taken by `dispatch_profile`, held for as long as this runs.
+    """
+    with hold_lease(lease_key):
+        try:
+            file_name = os.path.basename(file_path)
+            # Settle the content version (hashing hand-dropped CSVs) before deriving any cache key from it
+            dataset_store.ensure_sidecar(file_path)
+            stats_key = dataset_store.cache_key("statistics", file_path)
+            diagnostics_key = dataset_store.cache_key("diagnostics", file_path)
+
+            column_types = get_cached_column_types(file_path, dataset_store.dataset_schema(file_path).names)
+            file_info = {"column_types": column_types, **_file_summary(file_path)}
+
+            if dataset_store.is_large_file(file_path):
+                # Bounded memory: sketches per column instead of holding the whole frame
+                statistics, diagnostics = profile_dataset_streaming(
+                    dataset_store.iter_dataset_chunks(file_path), **file_info,
+                    progress=lambda rows: report_progress(f"{rows:,} rows profiled", file_path=file_path),
+                    total_rows=dataset_store.read_rows(file_path, 0, 0)[1],
+                )
+            else:
+                df = dataset_store.load_dataset(file_path)
+                # Counted from the column store's row fingerprints, which later column edits then build on
+                duplicate_rows = count_dataset_duplicates(file_path) if not df.empty else 0
+                statistics, diagnostics = profile_dataset(
+                    df, **file_info, duplicate_rows=duplicate_rows,
+                    progress=lambda done, total: report_progress(f"Column {done}/{total} profiled", done, total, file_path)
+                ) if not df.empty else (None, None)
+
+            if statistics is None:
+                redis_cache.delete(stats_key, diagnostics_key)
+                return {"status": "ERROR", "message": "Dataset is empty."}
+
+            cache_profile(file_path, statistics, diagnostics)
+            # Lets a byte-identical upload under another name adopt this profile without recomputing it
+            redis_cache.set(f"profiled:{dataset_store.dataset_version(file_path)}", file_name, ex=CACHE_TTL_SECONDS)
+            catalog.record_profile(file_path, statistics)
+            publish_event(dataset_channel(file_name), {"type": "profile_ready"})
+            return statistics
+        except Exception as e:
+            print(f"CRITICAL ERROR in generate_dataset_profile for {file_path}: {e}")
+            raise e
+
+# Single-flight profiling: at most one queued or running profile per dataset version. The lease is taken when
+# the job is dispatched and renewed by the running task's heartbeat, so the lease of a dead worker expires soon.
+PROFILE_QUEUED_LEASE_SECONDS = 600
+PROFILE_RUNNING_LEASE_SECONDS = 60
+
+def _renew_lease(lease_key: str, job_id: str, release: bool = False):
+    """Extends (or releases) the lease if `job_id` holds it, and claims it again if it has lapsed."""
+    with redis_cache.pipeline() as pipe:
+        try:
+            pipe.watch(lease_key)
+            holder = pipe.get(lease_key)
+            pipe.multi()
+            if holder == job_id and release:
+                pipe.delete(lease_key)
+            elif holder == job_id:
+                pipe.expire(lease_key, PROFILE_RUNNING_LEASE_SECONDS)
+            elif holder is None and not release:
+                pipe.set(lease_key, job_id, ex=PROFILE_RUNNING_LEASE_SECONDS)
+            pipe.execute()
+        except WatchError:
+            pass  # Changed hands in the meantime; the new holder owns it
+
+@contextmanager
+def hold_lease(lease_key: str = None):
+    job_id = current_task.request.id if current_task else None
+    if not lease_key or not job_id:
+        yield
+        return
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(PROFILE_RUNNING_LEASE_SECONDS / 3):
+            _renew_lease(lease_key, job_id)
+
+    _renew_lease(lease_key, job_id)
+    thread = threading.Thread(target=heartbeat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+        _renew_lease(lease_key, job_id, release=True)
+
+def dispatch_profile(file_path: str, build_sidecar: bool = False) -> str:
+    """
+    Enqueues `generate_dataset_profile` for the dataset's current version unless one is already queued
+    or running, and returns the id of the job to follow either way. With `build_sidecar` the columnar
+    sidecar is built first, in the same chain.
+    """
+    # Keyed on the file, not its version: a hand-dropped CSV only gets its content version once profiling hashes it
+    lease_key = f"inflight:profile:{os.path.basename(file_path)}:{dataset_store.dataset_signature(file_path)}"
+    while True:
+        job_id = str(uuid.uuid4())
+        if redis_cache.set(lease_key, job_id, nx=True, ex=PROFILE_QUEUED_LEASE_SECONDS):
+            profile = generate_dataset_profile.si(file_path, lease_key).set(task_id=job_id)
+            if build_sidecar:
+                profile = build_dataset_sidecar.si(file_path) | profile
+            profile.delay()
+            return job_id
+        running_job_id = redis_cache.get(lease_key)
+        if running_job_id:
+            return running_job_id
+
 @celery_app.task(time_limit=1800)
 def generate_treatment_plans_task(dataset_name: str, target_variable: str, goal: str):
     """
     Generates three competing data cleaning plans by passing the diagnostic report to an LLM.
     """
     try:
-        cache_key = f"diagnostics:{dataset_name}"
-        report_str = redis_cache.get(cache_key)
+        file_path = os.path.join(os.path.dirname(__file__), '..', 'public', dataset_name)
+        cache_key = dataset_store.cache_key("diagnostics", file_path)
+        diagnostic_report = decode_payload(redis_payloads.get(cache_key))
         
-        if not report_str:
+        if not diagnostic_report:
             return {"status": "FAILURE", "error": f"Diagnostic report for {dataset_name} not found in cache."}
-            
-        diagnostic_report = json.loads(report_str)
         
         # Add context for the AI, which can be used in more advanced prompts later
         diagnostic_report['modeling_context'] = {
             'target_variable': target_variable,
-            'goal': goal
+            'goal': goal,
+            'temporal_column': (temporal.time_index(file_path) or [None])[0]
         }
 
+        report_progress("Asking the AI co-pilot for treatment plans")
         plans = get_treatment_plan_hypotheses(diagnostic_report)
 
         if "error" in plans:
@@ -236,41 +355,31 @@ def generate_treatment_plans_task(dataset_name: str, target_variable: str, goal:
         print(f"CRITICAL ERROR in generate_treatment_plans_task for {dataset_name}: {e}")
         return {"status": "FAILURE", "error": str(e)}
 
-def get_temporal_profile(df: pd.DataFrame, col: str) -> dict:
-    time_cols = [c for c in df.columns if 'time' in c.lower() or 'date' in c.lower()]
-    if not time_cols:
-        return {"is_time_series": False}
-    time_col = time_cols[0]
-    try:
-        ts_data = pd.to_datetime(df[time_col], errors='coerce').dropna()
-        if ts_data.empty: return {"is_time_series": False}
-    except Exception:
+def get_temporal_profile(file_path: str, col: str) -> dict:
+    """Lag structure and gaps of one column along the dataset's time column, from the cached temporal profile."""
+    temporal_profile = temporal.load_temporal_profile(file_path)
+    if temporal_profile is None or col == temporal_profile["time_column"]:
         return {"is_time_series": False}
-    ts_series = df.set_index(time_col)[col].sort_index().dropna()
-    acf_1 = None
-    if ts_series.nunique() > 1 and len(ts_series) > 1:
-        try:
-            acf_1 = round(acf(ts_series, nlags=1, fft=False)[1], 2)
-        except Exception:
-            acf_1 = None
-    return {"is_time_series": True, "temporal_stability_acf1": acf_1}
-
-def get_mnar_indicators(df: pd.DataFrame, col: str) -> dict:
-    correlations = {}
-    missing_indicator = df[col].isnull().astype(int)
-    for other_col in df.columns:
-        if other_col == col: continue
-        try:
-            if pd.api.types.is_numeric_dtype(df[other_col]) and df[other_col].nunique() > 1:
-                corr = missing_indicator.corr(df[other_col])
-                if pd.notnull(corr) and abs(corr) > 0.3:
-                    correlations[other_col] = round(corr, 2)
-        except Exception:
-            continue
-    return correlations
+    column_profile = temporal_profile["columns"].get(col, {})
+    acf_values = column_profile.get("acf")
+    return {
+        "is_time_series": True,
+        "time_column": temporal_profile["time_column"],
+        "temporal_stability_acf1": round(acf_values[0], 2) if acf_values and acf_values[0] is not None else None,
+        "acf": acf_values,
+        "pacf": column_profile.get("pacf"),
+        "gaps": column_profile.get("gaps"),
+        "time_index": temporal_profile["index"],
+    }
+
+def get_mnar_indicators(file_path: str, col: str) -> dict:
+    """Numeric columns whose values track where `col` is missing, read from the dataset's association matrices."""
+    correlations = associations.missingness_correlations(file_path, col).drop(col, errors='ignore')
+    return {other_col: round(float(corr), 2) for other_col, corr in correlations.items() if abs(corr) > 0.3}
 
-def get_statistical_profile(df: pd.DataFrame, column_name: str) -> dict:
-    detected_type = detect_data_type(df[column_name])
+def get_statistical_profile(df: pd.DataFrame, column_name: str, file_path: str, detected_type: str = None) -> dict:
+    if detected_type is None:
+        detected_type = detect_data_types(df[[column_name]])[column_name]
 
     missing_count = int(df[column_name].isnull().sum())
     total_count = len(df[column_name])
@@ -288,13 +397,13 @@ def get_statistical_profile(df: pd.DataFrame, column_name: str) -> dict:
         if not clean_data.empty:
             profile["mean"] = round(clean_data.mean(), 2)
             profile["median"] = round(clean_data.median(), 2)
-    profile["mnar_indicators"] = get_mnar_indicators(df, column_name)
-    profile.update(get_temporal_profile(df, column_name))
+    profile["mnar_indicators"] = get_mnar_indicators(file_path, column_name)
+    profile.update(get_temporal_profile(file_path, column_name))
     return profile
 
 def perform_standardization(df: pd.DataFrame, column_name: str, method: str, file_path: str) -> dict:
     new_col_name = f"{column_name}_{method}_scaled"
-    if new_col_name in df.columns:
+    if new_col_name in dataset_store.dataset_schema(file_path).names:
         return {"status": "SKIPPED", "message": f"Column '{new_col_name}' already exists."}
     if not pd.api.types.is_numeric_dtype(df[column_name]):
         raise ValueError(f"Column '{column_name}' is not numeric.")
@@ -302,7 +411,7 @@ def perform_standardization(df: pd.DataFrame, column_name: str, method: str, fil
         raise ValueError(f"Column '{column_name}' contains missing values. Impute first.")
     scaler = StandardScaler() if method == 'standard' else MinMaxScaler()
     df[new_col_name] = scaler.fit_transform(df[[column_name]].values.astype(np.float32))
-    df.to_csv(file_path, index=False)
+    dataset_store.write_column(file_path, new_col_name, df[new_col_name])
     q1 = float(df[column_name].quantile(0.25))
     q3 = float(df[column_name].quantile(0.75))
     audit_report = {
@@ -312,11 +421,10 @@ def perform_standardization(df: pd.DataFrame, column_name: str, method: str, fil
     }
     return audit_report
 
-def perform_delete_column(df: pd.DataFrame, column_name: str, file_path: str):
-    if column_name not in df.columns:
+def perform_delete_column(column_name: str, file_path: str):
+    if column_name not in dataset_store.dataset_schema(file_path).names:
         raise ValueError(f"Column '{column_name}' not found.")
-    df.drop(columns=[column_name], inplace=True)
-    df.to_csv(file_path, index=False)
+    dataset_store.drop_column(file_path, column_name)
     return {"message": f"Successfully deleted column '{column_name}' and updated the dataset."}
 
 @celery_app.task
@@ -325,7 +433,7 @@ def perform_dataset_cleaning_task(file_path: str, action_type: str):
         if not os.path.exists(file_path):
             return {"status": "FAILURE", "error": "File not found."}
 
-        df = pd.read_csv(file_path, on_bad_lines='skip')
+        df = dataset_store.load_dataset(file_path)
         original_rows = len(df)
 
         if action_type == 'drop_na_rows':
@@ -334,15 +442,17 @@ def perform_dataset_cleaning_task(file_path: str, action_type: str):
             message = f"Successfully dropped {rows_affected} rows with missing values."
         
         elif action_type == 'drop_duplicate_rows':
-            df.drop_duplicates(inplace=True)
+            # Fingerprint-based, with collisions checked before anything is dropped
+            df = df[~duplicate_mask(df, verify=True)]
             rows_affected = original_rows - len(df)
             message = f"Successfully dropped {rows_affected} duplicate rows."
             
         else:
             return {"status": "FAILURE", "error": f"Unknown cleaning action: {action_type}"}
 
-        # Overwrite the original file with the cleaned data
-        df.to_csv(file_path, index=False)
+        # Overwrite the dataset with the cleaned data
+        dataset_store.save_dataset(df, file_path, note=message)
+        catalog.record_dataset(file_path)
 
         return {"status": "SUCCESS", "message": message, "rows_affected": rows_affected}
 
@@ -443,88 +553,319 @@ def execute_ai_transformation(df: pd.DataFrame, code_str: str) -> pd.DataFrame:
         print(f"AI Code Execution Failed: {e}")
         return df
 
-def _validate_plan_robust(df: pd.DataFrame, plan: dict, target: str, goal: str) -> dict:
+def _prepare_plan_data(df: pd.DataFrame, plan: dict, target: str, goal: str) -> tuple:
+    """Applies a plan and returns the model inputs (X, y); raises ValueError when nothing can be scored."""
+    # --- EXECUTION ---
+    if 'python_code' in plan and plan['python_code']:
+        df_processed = execute_ai_transformation(df, plan['python_code'])
+    else:
+        df_processed = _apply_plan_steps(df, plan.get('steps', []))
+
+    # --- PREPARATION ---
+    df_processed = df_processed.dropna(subset=[target])
+    if df_processed.empty:
+        raise ValueError("Dataset became empty after cleaning.")
+    
+    # --- ROBUSTNESS: SANITIZE INFINITY ---
+    # Feature Engineering (e.g. division) often creates inf. Treat as NaN for imputation.
+    df_processed.replace([np.inf, -np.inf], np.nan, inplace=True)
+
+    X = df_processed.drop(columns=[target])
+    y = df_processed[target]
+
+    # Check for single class (Crash prevention for ROC AUC)
+    if goal == 'classification' and y.nunique() < 2:
+        raise ValueError("Target has only 1 class (needs 2+ for classification).")
+    # Handle text targets
+    if goal == 'classification' and y.dtype == 'object':
+        y = pd.Series(LabelEncoder().fit_transform(y), index=y.index)
+    return X, y
+
+# Simulation engines. Each config is part of every simulation memo key: change it whenever the model changes.
+#   random_forest           dense one-hot features, the original probe model
+#   sparse_random_forest    the same forest on sparse one-hot features, so memory follows the non-zeros
+#   hist_gradient_boosting  raw numeric columns and categorical codes the model splits on natively; memory
+#                           stays proportional to the input whatever the cardinality
+SIMULATION_MODEL_CONFIG = {"model": "random_forest", "n_estimators": 30, "max_depth": 8, "random_state": 42, "test_size": 0.2}
+SIMULATION_ENGINES = {
+    "random_forest": SIMULATION_MODEL_CONFIG,
+    "sparse_random_forest": {**SIMULATION_MODEL_CONFIG, "features": "sparse"},
+    "hist_gradient_boosting": {"model": "hist_gradient_boosting", "max_iter": 100, "max_depth": 8,
+                               "random_state": 42, "test_size": 0.2},
+}
+# What a simulation runs unless the request names an engine; 'auto' resolves through `choose_simulation_engine`
+DEFAULT_SIMULATION_ENGINE = "auto"
+# 'auto' keeps the dense forest unless its one-hot matrix would exceed this
+SIMULATION_DENSE_FEATURE_BYTES = int(os.getenv("DATACRAFT_SIMULATION_DENSE_MB", 512)) * 1024 * 1024
+# Histogram gradient boosting splits natively on at most this many categories per column (its max_bins)
+MAX_NATIVE_CATEGORIES = 255
+
+class _FrequencyCodes(BaseEstimator, TransformerMixin):
     """
-    Returns a dict: {"score": float, "error": str/None}
+    Integer codes for a categorical column, most frequent level first. Levels beyond the most frequent
+    `max_categories - 1`, and levels never seen in training, share the last code; missing values stay NaN.
     """
-    try:
-        # --- EXECUTION ---
-        if 'python_code' in plan and plan['python_code']:
-            df_processed = execute_ai_transformation(df, plan['python_code'])
-        else:
-            df_processed = _apply_plan_steps(df, plan.get('steps', []))
-
-        # --- PREPARATION ---
-        df_processed = df_processed.dropna(subset=[target])
-        if df_processed.empty:
-            return {"score": -np.inf, "error": "Dataset became empty after cleaning."}
-        
-        # --- ROBUSTNESS: SANITIZE INFINITY ---
-        # Feature Engineering (e.g. division) often creates inf. Treat as NaN for imputation.
-        df_processed.replace([np.inf, -np.inf], np.nan, inplace=True)
-
-        X = df_processed.drop(columns=[target])
-        y = df_processed[target]
-
-        # Check for single class (Crash prevention for ROC AUC)
-        if goal == 'classification' and y.nunique() < 2:
-             return {"score": -np.inf, "error": "Target has only 1 class (needs 2+ for classification)."}
-
-        # --- PIPELINE SETUP ---
-        numeric_cols = X.select_dtypes(include=['number']).columns
-        categorical_cols = X.select_dtypes(include=['object', 'category']).columns
-
-        numeric_transformer = Pipeline(steps=[
+    def __init__(self, max_categories: int = MAX_NATIVE_CATEGORIES):
+        self.max_categories = max_categories
+
+    def fit(self, X, y=None):
+        self.categories_ = X.iloc[:, 0].value_counts().index[:self.max_categories - 1].tolist()
+        return self
+
+    def transform(self, X):
+        column = X.iloc[:, 0]
+        codes = pd.Categorical(column, categories=self.categories_).codes.astype(np.float64)
+        codes[codes < 0] = len(self.categories_)
+        codes[column.isna().to_numpy()] = np.nan
+        return codes[:, None]
+
+def _as_float_column(X: pd.DataFrame) -> np.ndarray:
+    return X.to_numpy(dtype=np.float64)
+
+def _column_preprocessor(kind: str):
+    if kind == 'num':
+        return Pipeline(steps=[
             ('imputer', SimpleImputer(strategy='median')),
             ('scaler', StandardScaler())
         ])
-        
-        categorical_transformer = Pipeline(steps=[
-            ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
-            ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
-        ])
-
-        preprocessor = ColumnTransformer(transformers=[
-            ('num', numeric_transformer, numeric_cols),
-            ('cat', categorical_transformer, categorical_cols)
-        ])
-
-        if goal == 'classification':
-            model = RandomForestClassifier(n_estimators=30, max_depth=8, random_state=42, n_jobs=-1)
-            # Handle text targets
-            if y.dtype == 'object':
-                le = LabelEncoder()
-                y = le.fit_transform(y)
-            metric = roc_auc_score
-        else:
-            model = RandomForestRegressor(n_estimators=30, max_depth=8, random_state=42, n_jobs=-1)
-            metric = lambda y_true, y_pred: -np.sqrt(mean_squared_error(y_true, y_pred))
+    if kind == 'num_raw':
+        return FunctionTransformer(_as_float_column)
+    if kind == 'cat_codes':
+        return _FrequencyCodes()
+    return Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=kind == 'cat_sparse'))
+    ])
+
+def _column_kinds(engine: str) -> tuple:
+    """How numeric and categorical columns are prepared for an engine."""
+    if engine == "hist_gradient_boosting":
+        return 'num_raw', 'cat_codes'
+    if engine == "sparse_random_forest":
+        return 'num', 'cat_sparse'
+    return 'num', 'cat'
+
+def _fit_preprocessing(X_train: pd.DataFrame, engine: str, memo_path: str = None) -> list:
+    """
+    One fitted transformer per column as (column, kind, transformer), numeric columns first, producing the same
+    features a ColumnTransformer over both groups would. Given `memo_path` (the dataset), fits of identical
+    training columns are reused.
+    """
+    # --- PIPELINE SETUP ---
+    numeric_cols = X_train.select_dtypes(include=['number']).columns
+    categorical_cols = X_train.select_dtypes(include=['object', 'category']).columns
+
+    preprocessing = []
+    for kind, columns in zip(_column_kinds(engine), (numeric_cols, categorical_cols)):
+        fit = lambda column, kind=kind: _column_preprocessor(kind).fit(column.to_frame())
+        for col in columns:
+            if kind == 'num_raw':
+                preprocessing.append((col, kind, fit(X_train[col])))  # nothing is learned
+            elif memo_path:
+                preprocessing.append((col, kind, simulation_memo.fitted_column(memo_path, X_train[col], kind, fit)))
+            else:
+                preprocessing.append((col, kind, fit(X_train[col])))
+    return preprocessing
+
+def _apply_preprocessing(preprocessing: list, X: pd.DataFrame):
+    blocks = [transformer.transform(X[[col]]) for col, _, transformer in preprocessing]
+    if any(sparse.issparse(block) for block in blocks):
+        return sparse.hstack(blocks, format='csr')
+    return np.hstack(blocks) if blocks else np.empty((len(X), 0))
+
+def _build_model(goal: str, engine: str, categorical_mask: list = None):
+    """`categorical_mask` flags the feature columns histogram gradient boosting treats as categories."""
+    config = SIMULATION_ENGINES[engine]
+    if engine == "hist_gradient_boosting":
+        model_class = HistGradientBoostingClassifier if goal == 'classification' else HistGradientBoostingRegressor
+        categorical_features = np.asarray(categorical_mask, dtype=bool) if categorical_mask and any(categorical_mask) else None
+        return model_class(max_iter=config["max_iter"], max_depth=config["max_depth"], random_state=config["random_state"],
+                           categorical_features=categorical_features, max_bins=MAX_NATIVE_CATEGORIES)
+    if goal == 'classification':
+        return RandomForestClassifier(n_estimators=config["n_estimators"], max_depth=config["max_depth"],
+                                      random_state=config["random_state"], n_jobs=-1)
+    return RandomForestRegressor(n_estimators=config["n_estimators"], max_depth=config["max_depth"],
+                                 random_state=config["random_state"], n_jobs=-1)
+
+def _fit_model(X_train: pd.DataFrame, y_train, goal: str, engine: str, memo_path: str = None) -> tuple:
+    """(fitted preprocessing, fitted model)."""
+    preprocessing = _fit_preprocessing(X_train, engine, memo_path)
+    model = _build_model(goal, engine, [kind == 'cat_codes' for _, kind, _ in preprocessing])
+    model.fit(_apply_preprocessing(preprocessing, X_train), y_train)
+    return preprocessing, model
+
+def choose_simulation_engine(file_path: str, target: str) -> str:
+    """
+    Engine for 'auto': the dense forest while its one-hot feature matrix fits SIMULATION_DENSE_FEATURE_BYTES,
+    histogram gradient boosting on native categories beyond that.
+    """
+    schema = dataset_store.dataset_schema(file_path)
+    rows = dataset_store.read_rows(file_path, 0, 0)[1]
+    width = 0
+    for field in schema:
+        if field.name == target:
+            continue
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            width += 1
+        elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type) or pa.types.is_dictionary(field.type):
+            column = dataset_store.read_table(file_path, [field.name]).column(0)
+            width += pc.count_distinct(column, mode="all").as_py()
+    return "random_forest" if rows * width * 8 <= SIMULATION_DENSE_FEATURE_BYTES else "hist_gradient_boosting"
+
+def _predict_for_scoring(fitted: tuple, X_test: pd.DataFrame, goal: str, multiclass: bool) -> np.ndarray:
+    preprocessing, model = fitted
+    features = _apply_preprocessing(preprocessing, X_test)
+    if goal == 'classification':
+        probs = model.predict_proba(features)
+        return probs if multiclass else probs[:, 1]
+    return model.predict(features)
+
+def _score_predictions(y_true, predictions: np.ndarray, goal: str) -> float:
+    # --- SCORING ---
+    if goal == 'classification':
+        # Handle binary vs multiclass
+        if predictions.ndim > 1:
+            return roc_auc_score(y_true, predictions, multi_class='ovr')
+        return roc_auc_score(y_true, predictions)
+    return -np.sqrt(mean_squared_error(y_true, predictions))
+
+def _memoized_split(X: pd.DataFrame, y: pd.Series, split: tuple) -> tuple:
+    """Splits a plan's rows along the raw dataset's memoized split; None when its rows cannot be matched up."""
+    train_labels, test_labels = split
+    if not (y.index.is_unique and pd.api.types.is_integer_dtype(y.index)):
+        return None
+    train = train_labels[np.isin(train_labels, y.index)]
+    test = test_labels[np.isin(test_labels, y.index)]
+    if len(train) + len(test) != len(y) or not len(train) or not len(test):
+        return None
+    return X.loc[train], X.loc[test], y.loc[train], y.loc[test]
+
+def _validate_plan_robust(df: pd.DataFrame, plan: dict, target: str, goal: str, engine: str,
+                          memo_path: str = None) -> dict:
+    """
+    Returns a dict: {"score": float, "error": str/None}
+    Given `memo_path` (the dataset `df` was loaded from), the split and column preprocessing are memoized.
+    """
+    try:
+        X, y = _prepare_plan_data(df, plan, target, goal)
+        multiclass = goal == 'classification' and len(np.unique(y)) > 2
 
         # --- TRAINING ---
-        pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('model', model)])
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        pipeline.fit(X_train, y_train)
-        
-        # --- SCORING ---
-        if goal == 'classification':
-            # Handle binary vs multiclass
-            if len(np.unique(y)) > 2:
-                probs = pipeline.predict_proba(X_test)
-                score = metric(y_test, probs, multi_class='ovr')
-            else:
-                probs = pipeline.predict_proba(X_test)[:, 1]
-                score = metric(y_test, probs)
-        else:
-            preds = pipeline.predict(X_test)
-            score = metric(y_test, preds)
+        parts = None
+        if memo_path:
+            split = simulation_memo.split_labels(memo_path, target, goal, SIMULATION_ENGINES[engine], df[target].dropna())
+            parts = _memoized_split(X, y, split)
+        if parts is None:
+            parts = train_test_split(X, y, test_size=SIMULATION_ENGINES[engine]["test_size"],
+                                     random_state=SIMULATION_ENGINES[engine]["random_state"])
+        X_train, X_test, y_train, y_test = parts
+
+        fitted = _fit_model(X_train, y_train, goal, engine, memo_path)
+        score = _score_predictions(y_test, _predict_for_scoring(fitted, X_test, goal, multiclass), goal)
 
         return {"score": score, "error": None}
 
     except Exception as e:
         return {"score": -np.inf, "error": str(e)}
 
-def detect_data_leakage(df: pd.DataFrame, target: str) -> list:
+# --- Sampled simulation: progressive stratified subsamples, bootstrap intervals, early stopping ---
+SAMPLED_SIMULATION_MIN_ROWS = 50_000  # 'auto' mode samples datasets larger than this
+SAMPLED_START_ROWS = 2_000
+SAMPLED_BOOTSTRAP_ROUNDS = 200
+SAMPLED_CONFIDENCE = 0.95
+SAMPLED_TIME_BUDGET_SECONDS = 60
+
+def _stratified_positions(y: pd.Series, size: int, goal: str, seed: int) -> np.ndarray:
+    """Positions of a `size`-row subsample that keeps the class balance of a classification target."""
+    if size >= len(y):
+        return np.arange(len(y))
+    stratify = y if goal == 'classification' and y.value_counts().min() >= 2 else None
+    positions, _ = train_test_split(np.arange(len(y)), train_size=size, stratify=stratify, random_state=seed)
+    return np.sort(positions)
+
+def _score_sample(X: pd.DataFrame, y: pd.Series, goal: str, multiclass: bool, rng: np.random.Generator,
+                  engine: str) -> tuple:
+    """(point score, bootstrap scores) of one fit on a subsample, resampling its held-out predictions."""
+    stratify = y if goal == 'classification' and y.value_counts().min() >= 2 else None
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=stratify)
+    predictions = _predict_for_scoring(_fit_model(X_train, y_train, goal, engine), X_test, goal, multiclass)
+    y_test = np.asarray(y_test)
+
+    boot = np.full(SAMPLED_BOOTSTRAP_ROUNDS, np.nan)
+    for i in range(SAMPLED_BOOTSTRAP_ROUNDS):
+        resample = rng.integers(0, len(y_test), len(y_test))
+        try:
+            boot[i] = _score_predictions(y_test[resample], predictions[resample], goal)
+        except ValueError:
+            continue  # a resample without every class has no AUC
+    return float(_score_predictions(y_test, predictions, goal)), boot
+
+def _rankings_separated(scores: dict, boots: dict) -> bool:
+    """True when every pair of neighbours in the ranking differs beyond the confidence interval."""
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    lower = (1 - SAMPLED_CONFIDENCE) / 2 * 100
+    for better, worse in zip(ranked, ranked[1:]):
+        difference = boots[better] - boots[worse]
+        if np.isnan(difference).all() or np.nanpercentile(difference, lower) <= 0:
+            return False
+    return True
+
+def run_sampled_simulation(df_raw: pd.DataFrame, plans: dict, target: str, goal: str, engine: str,
+                           time_budget: float = SAMPLED_TIME_BUDGET_SECONDS) -> tuple:
+    """
+    Scores the baseline and every plan on stratified subsamples that double in size each round, until the
+    plan ranking is separated at SAMPLED_CONFIDENCE, the data runs out or the time budget would be exceeded.
+    Returns (scores, bootstrap scores, errors, sampling summary).
+    """
+    started = time.monotonic()
+    rng = np.random.default_rng(42)
+    prepared, errors = {}, {}
+    for key, plan in [("baseline", {})] + [(key, plans[key]) for key in SIMULATION_PLAN_KEYS if key in plans]:
+        try:
+            prepared[key] = _prepare_plan_data(df_raw, plan, target, goal)
+        except Exception as e:
+            errors[key] = str(e)
+    if "baseline" not in prepared:
+        return {}, {}, errors, {"rows": 0, "rounds": 0, "stopped": "error", "seconds": 0.0}
+
+    full_rows = max(len(y) for _, y in prepared.values())
+    size = min(SAMPLED_START_ROWS, full_rows)
+    rounds = 0
+    while True:
+        round_started = time.monotonic()
+        scores, boots = {}, {}
+        for key, (X, y) in list(prepared.items()):
+            try:
+                positions = _stratified_positions(y, size, goal, seed=rounds)
+                multiclass = goal == 'classification' and y.nunique() > 2
+                scores[key], boots[key] = _score_sample(X.iloc[positions], y.iloc[positions], goal, multiclass, rng, engine)
+            except Exception as e:
+                errors[key] = str(e)
+                del prepared[key]
+        rounds += 1
+        report_progress(f"Round {rounds}: {len(scores)} models scored on {size:,} rows")
+
+        if "baseline" not in scores:
+            stopped = "error"
+            break
+        if _rankings_separated(scores, boots):
+            stopped = "separated"
+            break
+        if size >= full_rows:
+            stopped = "full_data"
+            break
+        # The next round fits on twice the rows; stop now rather than overrun the budget
+        elapsed = time.monotonic() - started
+        if elapsed + 2 * (time.monotonic() - round_started) > time_budget:
+            stopped = "time_budget"
+            break
+        size = min(size * 2, full_rows)
+
+    summary = {"rows": size, "rounds": rounds, "stopped": stopped, "seconds": round(time.monotonic() - started, 2),
+               "confidence": SAMPLED_CONFIDENCE}
+    return scores, boots, errors, summary
+
+def detect_data_leakage(df: pd.DataFrame, target: str, file_path: str) -> list:
     print(f"DEBUG: Running Leakage Check on {target}") 
     warnings = []
 
@@ -538,7 +879,11 @@ def detect_data_leakage(df: pd.DataFrame, target: str) -> list:
     numeric_cols = df.select_dtypes(include=[np.number]).columns
 
     if target in numeric_cols:
-        correlations = df[numeric_cols].corrwith(df[target]).abs()
+        correlations = associations.numeric_correlations(file_path, target)
+        if correlations.empty:
+            # The target only became numeric through the conversion above
+            correlations = df[numeric_cols].corrwith(df[target])
+        correlations = correlations.reindex(numeric_cols).dropna().abs()
         # Filter out the target itself
         correlations = correlations.drop(target, errors='ignore')
         
@@ -554,13 +899,20 @@ def detect_data_leakage(df: pd.DataFrame, target: str) -> list:
             msg = f"High Leakage Risk: Columns {suspicious_cols} are >95% correlated with the target."
             print(f"DEBUG: Found Warning: {msg}")
             warnings.append(msg)
+    else:
+        # Categorical targets: Cramér's V plays the part of the correlation
+        scores = associations.categorical_associations(file_path, target).drop(target, errors='ignore')
+        suspicious_cols = scores[scores > 0.95].index.tolist()
+        if suspicious_cols:
+            warnings.append(f"High Leakage Risk: Columns {suspicious_cols} are almost perfectly associated with the target.")
 
     # Check 2: ID Column Detection
     categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+    distinct_counts = associations.distinct_counts(file_path)
     for col in categorical_cols:
         if col == target: continue
         
-        unique_ratio = df[col].nunique() / len(df)
+        unique_ratio = distinct_counts[col] / len(df)
         if unique_ratio > 0.95 and len(df) > 100:
             msg = f"Potential ID Column: '{col}' is nearly unique. It may cause overfitting."
             warnings.append(msg)
@@ -568,67 +920,183 @@ def detect_data_leakage(df: pd.DataFrame, target: str) -> list:
     return warnings
 
 # --- START: NEW MAIN SIMULATION TASK ---
+SIMULATION_PLAN_KEYS = ['conservative_plan', 'balanced_plan', 'aggressive_plan', 'architect_plan']
+
+def _simulation_file_path(dataset_name: str) -> str:
+    return os.path.join(os.path.dirname(__file__), '..', 'public', dataset_name)
+
+def _simulation_step_done(job_id: str, total: int) -> int:
+    """Counts finished steps of a simulation across the workers running them."""
+    counter_key = f"progress:simulation:{job_id}"
+    with redis_cache.pipeline() as pipe:
+        pipe.incr(counter_key)
+        pipe.expire(counter_key, CACHE_TTL_SECONDS)
+        done, _ = pipe.execute()
+    return done
+
 @celery_app.task(time_limit=3600)
-def run_impact_simulation_task(dataset_name: str, plans: dict, target_variable: str, goal: str):
+def check_leakage_task(dataset_name: str, target_variable: str, job_id: str, total_steps: int) -> dict:
     try:
-        file_path = os.path.join(os.path.dirname(__file__), '..', 'public', dataset_name)
-        df_raw = pd.read_csv(file_path, on_bad_lines='skip', low_memory=False)
+        df_raw = dataset_store.load_dataset(_simulation_file_path(dataset_name), shared=True)
+        warnings = detect_data_leakage(df_raw, target_variable, _simulation_file_path(dataset_name))
+    except Exception as e:
+        print(f"Warning: leakage check failed for {dataset_name}: {e}")
+        warnings = []
+    report_progress("Leakage check finished", _simulation_step_done(job_id, total_steps), total_steps, job_id=job_id)
+    return {"key": "leakage", "warnings": warnings}
 
-        leakage_warnings = detect_data_leakage(df_raw, target_variable)
+@celery_app.task(time_limit=3600)
+def score_plan_task(dataset_name: str, key: str, plan: dict, target_variable: str, goal: str,
+                    job_id: str, total_steps: int, engine: str) -> dict:
+    """
+    Scores one plan (or the baseline, an empty plan) of a simulation.
+    Only the dataset's name travels through the broker. The frame is loaded shared: its numeric columns are views
+    of the memory-mapped column files, so concurrent evaluators on a machine keep one copy of them in the page
+    cache. Text columns, and the frame a plan's steps produce, are still private to each evaluator.
+    """
+    try:
+        file_path = _simulation_file_path(dataset_name)
+        df_raw = dataset_store.load_dataset(file_path, shared=True)
+        result = _validate_plan_robust(df_raw, plan, target_variable, goal, engine, memo_path=file_path)
+        simulation_memo.store_score(file_path, target_variable, goal, SIMULATION_ENGINES[engine], plan, result)
+    except Exception as e:
+        result = {"score": -np.inf, "error": str(e)}
+    label = "Baseline model" if key == "baseline" else f"Plan '{key}'"
+    report_progress(f"{label} scored", _simulation_step_done(job_id, total_steps), total_steps, job_id=job_id)
+    return {"key": key, "score": float(result["score"]), "error": result["error"]}
+
+def _measured_impact(metric_name: str, baseline_res: dict, plan_res: dict) -> dict:
+    baseline_score = baseline_res["score"]
+    plan_score = plan_res["score"]
+    error_msg = plan_res["error"]
+    if error_msg or not np.isfinite(plan_score) or not np.isfinite(baseline_score):
+        return {
+            "metric_name": metric_name,
+            "baseline_score": "N/A",
+            "plan_score": "Error",
+            "delta_percent": 0,
+            # Show the REAL error in the UI
+            "impact_string": f"<b>Simulation Failed:</b> {error_msg or baseline_res.get('error') or 'Unknown error'}"
+        }
+    delta = ((plan_score - baseline_score) / abs(baseline_score)) * 100 if baseline_score != 0 else 0
+    sign = "+" if delta >= 0 else ""
+    return {
+        "metric_name": metric_name,
+        "baseline_score": round(baseline_score, 4),
+        "plan_score": round(plan_score, 4),
+        "delta_percent": round(delta, 2),
+        "impact_string": f"{metric_name} changed by *{sign}{delta:.2f}%*"
+    }
 
-        # 1. Baseline
-        baseline_res = _validate_plan_robust(df_raw, {}, target_variable, goal)
-        baseline_score = baseline_res["score"]
-        
-        simulation_results = []
-        plan_keys = ['conservative_plan', 'balanced_plan', 'aggressive_plan', 'architect_plan']
-        metric_name = "AUC" if goal == 'classification' else "Neg RMSE"
+def _simulation_result(plans: dict, goal: str, results: dict, leakage_warnings: list, engine: str) -> dict:
+    """Plans with their measured impact against the baseline, best first."""
+    metric_name = "AUC" if goal == 'classification' else "Neg RMSE"
+    simulation_results = []
+    for key in SIMULATION_PLAN_KEYS:
+        if key not in plans:
+            continue
+        plan = plans[key]
+        plan['measured_impact'] = _measured_impact(metric_name, results["baseline"], results[key])
+        simulation_results.append(plan)
 
-        for key in plan_keys:
-            if key not in plans: continue
-            plan = plans[key]
-            
-            # 2. Plan Score
-            plan_res = _validate_plan_robust(df_raw, plan, target_variable, goal)
-            plan_score = plan_res["score"]
-            error_msg = plan_res["error"]
-            
-            # 3. Handle Errors/Deltas
-            if error_msg or not np.isfinite(plan_score) or not np.isfinite(baseline_score):
-                 impact_data = {
-                    "metric_name": metric_name,
-                    "baseline_score": "N/A",
-                    "plan_score": "Error",
-                    "delta_percent": 0,
-                    # Show the REAL error in the UI
-                    "impact_string": f"<b>Simulation Failed:</b> {error_msg or baseline_res.get('error') or 'Unknown error'}"
-                }
-            else:
-                delta = ((plan_score - baseline_score) / abs(baseline_score)) * 100 if baseline_score != 0 else 0
-                sign = "+" if delta >= 0 else ""
-                impact_data = {
-                    "metric_name": metric_name,
-                    "baseline_score": round(baseline_score, 4),
-                    "plan_score": round(plan_score, 4),
-                    "delta_percent": round(delta, 2),
-                    "impact_string": f"{metric_name} changed by *{sign}{delta:.2f}%*"
-                }
-
-            plan['measured_impact'] = impact_data
-            simulation_results.append(plan)
-
-        sorted_results = sorted(
-            simulation_results, 
-            key=lambda p: p['measured_impact'].get('delta_percent', -999), 
-            reverse=True
-        )
+    sorted_results = sorted(
+        simulation_results, 
+        key=lambda p: p['measured_impact'].get('delta_percent', -999), 
+        reverse=True
+    )
+    return {"status": "SUCCESS", "result": sorted_results, "warnings": leakage_warnings, "engine": engine}
 
-        return {"status": "SUCCESS", "result": sorted_results,"warnings": leakage_warnings}
+@celery_app.task
+def collect_simulation_task(step_results: list, plans: dict, goal: str, memoized: dict, engine: str):
+    """Chord callback: turns the baseline and plan scores (fresh or `memoized`) into the simulation result."""
+    try:
+        results = dict(memoized or {})
+        results.update({result["key"]: result for result in step_results})
+        return _simulation_result(plans, goal, results, results["leakage"]["warnings"], engine)
 
     except Exception as e:
         print(f"CRITICAL ERROR: {e}")
         return {"status": "FAILURE", "error": str(e)}
 
+def _run_sampled_simulation_job(file_path: str, plans: dict, target_variable: str, goal: str, time_budget: float,
+                                engine: str) -> dict:
+    df_raw = dataset_store.load_dataset(file_path)
+    leakage_warnings = detect_data_leakage(df_raw, target_variable, file_path)
+    scores, boots, errors, sampling = run_sampled_simulation(df_raw, plans, target_variable, goal, engine, time_budget)
+
+    results = {
+        key: {"score": scores.get(key, -np.inf), "error": errors.get(key) or (None if key in scores else "Not scored.")}
+        for key in ["baseline"] + SIMULATION_PLAN_KEYS
+    }
+    response = _simulation_result(plans, goal, results, leakage_warnings, engine)
+
+    # Delta intervals: the spread of (plan - baseline) over the bootstrap resamples, relative to the baseline
+    lower, upper = (1 - SAMPLED_CONFIDENCE) / 2 * 100, (1 + SAMPLED_CONFIDENCE) / 2 * 100
+    for key in SIMULATION_PLAN_KEYS:
+        if key not in scores or key not in plans or not scores.get("baseline"):
+            continue
+        impact = plans[key]['measured_impact']
+        if impact["plan_score"] == "Error":
+            continue
+        deltas = (boots[key] - boots["baseline"]) / abs(scores["baseline"]) * 100
+        if np.isnan(deltas).all():
+            continue
+        low, high = float(np.nanpercentile(deltas, lower)), float(np.nanpercentile(deltas, upper))
+        impact["confidence_interval"] = [round(low, 2), round(high, 2)]
+        impact["sample_rows"] = sampling["rows"]
+        impact["impact_string"] += f" ({SAMPLED_CONFIDENCE:.0%} CI {low:+.2f}% to {high:+.2f}%, {sampling['rows']:,} sampled rows)"
+    response["sampling"] = sampling
+    return response
+
+@celery_app.task(bind=True, time_limit=3600)
+def run_impact_simulation_task(self, dataset_name: str, plans: dict, target_variable: str, goal: str,
+                               mode: str = "full", time_budget: float = SAMPLED_TIME_BUDGET_SECONDS,
+                               engine: str = DEFAULT_SIMULATION_ENGINE):
+    """
+    Scores the baseline and every plan concurrently: the job is replaced by a chord of one evaluator per
+    plan (plus the leakage check) whose callback keeps this job's id, so clients follow it as before.
+    `mode` 'sampled' ranks the plans on growing subsamples within `time_budget` seconds instead; 'auto'
+    does so for datasets over SAMPLED_SIMULATION_MIN_ROWS rows.
+    `engine` is one of SIMULATION_ENGINES, or 'auto' to pick by the size of the one-hot feature matrix.
+    """
+    try:
+        file_path = _simulation_file_path(dataset_name)
+        if not os.path.exists(file_path):
+            return {"status": "FAILURE", "error": "File not found."}
+        if mode == "auto":
+            rows = dataset_store.read_rows(file_path, 0, 0)[1]
+            mode = "sampled" if rows > SAMPLED_SIMULATION_MIN_ROWS else "full"
+        if engine == "auto":
+            engine = choose_simulation_engine(file_path, target_variable)
+        if engine not in SIMULATION_ENGINES:
+            return {"status": "FAILURE", "error": f"Unknown simulation engine '{engine}'."}
+        if mode == "sampled":
+            return _run_sampled_simulation_job(file_path, plans, target_variable, goal, time_budget, engine)
+        # Settle the column files once, so the evaluators do not all build them from the CSV in parallel
+        dataset_store.ensure_sidecar(file_path)
+
+        job_id = self.request.id
+        to_score = {"baseline": {}, **{key: plans[key] for key in SIMULATION_PLAN_KEYS if key in plans}}
+        # Repeat simulations only pay for the plans (or baseline) that were not scored on this version before
+        memoized = simulation_memo.cached_scores(file_path, target_variable, goal, SIMULATION_ENGINES[engine], to_score)
+        to_score = {key: plan for key, plan in to_score.items() if key not in memoized}
+        # Trim what earlier simulations memoized back to its budget, once, before the evaluators add to it
+        simulation_memo.evict(file_path)
+        total_steps = len(to_score) + 1
+        steps = [check_leakage_task.s(dataset_name, target_variable, job_id, total_steps)]
+        steps.extend(
+            score_plan_task.s(dataset_name, key, plan, target_variable, goal, job_id, total_steps, engine)
+            for key, plan in to_score.items()
+        )
+        message = f"Scoring {len(to_score)} model{'s' if len(to_score) != 1 else ''} in parallel"
+        if memoized:
+            message += f" ({len(memoized)} reused from earlier simulations)"
+        report_progress(message, 0, total_steps)
+    except Exception as e:
+        print(f"CRITICAL ERROR: {e}")
+        return {"status": "FAILURE", "error": str(e)}
+    return self.replace(chord(steps, collect_simulation_task.s(plans, goal, memoized, engine)))
+
 @celery_app.task
 def apply_ai_plan_task(dataset_name: str, python_code: str, note: str = "Applied AI Plan"):
     try:
@@ -637,22 +1105,25 @@ def apply_ai_plan_task(dataset_name: str, python_code: str, note: str = "Applied
             return {"status": "FAILURE", "error": "File not found."}
 
         # 1. Load Data
-        df = pd.read_csv(file_path, on_bad_lines='skip', low_memory=False)
+        df = dataset_store.load_dataset(file_path)
         original_rows = len(df)
+        cached_profile = get_cached_profile(file_path)
+        stale_keys = _profile_cache_keys(file_path)
 
         # 2. Execute the AI Code (REUSING the safe executor we made)
         # Note: We must define 'execute_ai_transformation' if it's not globally available in this scope,
         # but since we defined it in the previous step in this file, it works.
         df_clean = execute_ai_transformation(df, python_code)
         
-        # 3. Save Over the Original File (Or you could version it)
-        # For this stage, overwriting is expected behavior for "Cleaning"
-        df_clean.to_csv(file_path, index=False)
+        # 3. Save as a new version of the dataset; the previous one stays available for rollback
+        dataset_store.save_dataset(df_clean, file_path, note=note)
 
-        # 4. Invalidate Cache (CRITICAL)
-        # If we don't do this, the UI will still show the old "Dirty" stats
-        redis_cache.delete(f"statistics:{dataset_name}")
-        redis_cache.delete(f"diagnostics:{dataset_name}")
+        # 4. Carry the cached profile over when only some columns changed; otherwise it is rebuilt on next read
+        changed = _changed_columns(df, df_clean)
+        if changed is None:
+            catalog.record_dataset(file_path)
+        else:
+            patch_cached_profile(file_path, cached_profile, stale_keys, df_clean[changed], duplicate_rows=count_dataset_duplicates(file_path))
 
         return {
             "status": "SUCCESS", 
@@ -670,23 +1141,37 @@ def apply_ai_plan_task(dataset_name: str, python_code: str, note: str = "Applied
 def route_task(dataset_name: str, column_name: str, task_type: str, task_params: dict = None):
     try:
         file_path = os.path.join(os.path.dirname(__file__), '..', 'public', dataset_name)
-        df = pd.read_csv(file_path)
         if task_type == 'diagnosis':
-            profile = get_statistical_profile(df, column_name)
+            df = dataset_store.load_dataset(file_path, columns=[column_name])
+            detected_type = get_column_types(file_path, df[[column_name]])[column_name]
+            profile = get_statistical_profile(df, column_name, file_path, detected_type)
             result = get_ai_interpretation(profile)
             return {"status": "SUCCESS", "result": result}
-        elif task_type == 'delete_column':
-            result = perform_delete_column(df, column_name, file_path)
+
+        # Column edits read and write only the column they touch, and patch the cached profile of the
+        # previous version instead of re-profiling everything
+        cached_profile = get_cached_profile(file_path)
+        stale_keys = _profile_cache_keys(file_path)
+        if task_type == 'delete_column':
+            result = perform_delete_column(column_name, file_path)
+            patch_cached_profile(file_path, cached_profile, stale_keys, pd.DataFrame(), duplicate_rows=count_dataset_duplicates(file_path))
             return {"status": "SUCCESS", "result": result}
-        elif task_type.startswith('impute_'):
+
+        df = dataset_store.load_dataset(file_path, columns=[column_name])
+        if task_type.startswith('impute_'):
             method = task_type.split('_')[1]
             custom_value = task_params.get('value') if task_params else None
             result = perform_imputation(df, column_name, method, value=custom_value)
-            df.to_csv(file_path, index=False)
+            if result["rows_affected"]:
+                dataset_store.write_column(file_path, column_name, df[column_name])
+                patch_cached_profile(file_path, cached_profile, stale_keys, df[[column_name]], duplicate_rows=count_dataset_duplicates(file_path))
             return {"status": "SUCCESS", "result": result}
         elif task_type in ['standard_scale', 'minmax_scale']:
             method = 'standard' if task_type == 'standard_scale' else 'minmax'
             result = perform_standardization(df, column_name, method, file_path)
+            if "new_column_added" in result:
+                # A scaled copy is a function of an existing column, so duplicate rows stay the same
+                patch_cached_profile(file_path, cached_profile, stale_keys, df[[result["new_column_added"]]])
             return {"status": "SUCCESS", "result": result}
         else:
             return {"status": "ERROR", "message": "Unknown task type."}
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import re
 
@@ -15,13 +16,11 @@ def is_likely_date_column(series: pd.Series) -> bool:
     match_count = sample.astype(str).str.match(DATE_REGEX).sum()
     return (match_count / len(sample)) > 0.75
 
-def detect_data_type(series: pd.Series) -> str:
-    series_cleaned = series.dropna()
-
-    if series_cleaned.empty:
-        return 'empty'
-
-    sample = series_cleaned.head(1000)
+def detect_sample_type(sample: pd.Series):
+    """
+    Numeric and date detection on a sample of non-null values.
+    Returns None when the sample is neither, leaving the decision to `classify_by_uniqueness`.
+    """
     numeric_sample = pd.to_numeric(sample, errors='coerce')
     if numeric_sample.notna().sum() / len(sample) > 0.90:
         try:
@@ -34,15 +33,15 @@ def detect_data_type(series: pd.Series) -> str:
         except (ValueError, TypeError):
              return 'float'
 
-    if is_likely_date_column(series_cleaned):
+    if is_likely_date_column(sample):
         try:
             pd.to_datetime(sample, errors='raise', format='mixed')
             return 'date'
         except (ValueError, TypeError, AttributeError):
             pass
+    return None
 
-    unique_count = series_cleaned.nunique()
-    total_count = len(series_cleaned)
+def classify_by_uniqueness(unique_count: int, total_count: int) -> str:
     unique_ratio = unique_count / total_count if total_count > 0 else 0
 
     if unique_ratio > 0.95:
@@ -51,4 +50,89 @@ def detect_data_type(series: pd.Series) -> str:
     if unique_ratio < 0.5 or unique_count < 50:
         return 'categorical'
         
-    return 'text'
\ No newline at end of file
+    return 'text'
+
+def detect_data_type(series: pd.Series) -> str:
+    series_cleaned = series.dropna()
+
+    if series_cleaned.empty:
+        return 'empty'
+
+    sample_type = detect_sample_type(series_cleaned.head(1000))
+    if sample_type:
+        return sample_type
+
+    return classify_by_uniqueness(series_cleaned.nunique(), len(series_cleaned))
+
+def _spread_positions(length: int, size: int) -> np.ndarray:
+    """Evenly spaced row positions covering the whole frame, not just its head."""
+    return np.unique(np.linspace(0, length - 1, num=min(length, size)).astype(np.int64))
+
+def _classify_numeric_block(block: pd.DataFrame) -> dict:
+    """Integer / float / identifier decision for all numeric columns of a sample at once."""
+    counts = block.count()
+    finite = np.isfinite(block) | block.isna()
+    integral = ((block == np.trunc(block)) | block.isna()) & finite
+    is_integral = integral.all() & finite.all()
+    unique_ratio = block.nunique() / counts.where(counts > 0)
+
+    types = {}
+    for col in block.columns:
+        if not is_integral[col]:
+            types[col] = 'float'
+        elif unique_ratio[col] > 0.95:
+            types[col] = 'identifier'
+        else:
+            types[col] = 'integer'
+    return types
+
+def detect_data_types(df: pd.DataFrame, sample_size: int = 1000) -> dict:
+    """
+    Batch version of `detect_data_type` for every column of a frame.
+    Uses one row sample spread across the whole frame; numeric columns are classified together,
+    and only columns left undecided by the sample pay for a full distinct count.
+    """
+    sample = df.iloc[_spread_positions(len(df), sample_size)] if len(df) else df
+
+    def column_sample(col):
+        series_cleaned = df[col].dropna()
+        return series_cleaned.iloc[_spread_positions(len(series_cleaned), sample_size)]
+
+    return types_from_sample(sample, df.count(), column_sample, lambda cols: df[cols].nunique())
+
+def types_from_sample(sample: pd.DataFrame, non_null_counts: pd.Series, column_sample, unique_counts) -> dict:
+    """
+    The decisions of `detect_data_types`, given its row sample spread across the frame, so frames streamed in
+    chunks are typed the same way. `non_null_counts` cover the whole frame; `column_sample(col)` is a spread of
+    a column's own non-null values, for columns too sparse to appear in the row sample, and `unique_counts(cols)`
+    the distinct counts of the columns the sample leaves undecided.
+    """
+    sample_counts = sample.count()
+
+    types = {}
+    numeric_cols = []
+    other_cols = []
+    for col in sample.columns:
+        if non_null_counts[col] == 0:
+            types[col] = 'empty'
+        elif sample_counts[col] == 0:
+            # Too sparse for the shared sample: take a spread of this column's own non-null values.
+            types[col] = detect_sample_type(column_sample(col))
+            if types[col] is None:
+                other_cols.append(col)
+        elif pd.api.types.is_numeric_dtype(sample[col]):
+            numeric_cols.append(col)
+        else:
+            column_values = sample[col].dropna()
+            types[col] = detect_sample_type(column_values)
+            if types[col] is None:
+                other_cols.append(col)
+
+    if numeric_cols:
+        types.update(_classify_numeric_block(sample[numeric_cols].astype(np.float64)))
+
+    if other_cols:
+        counts = unique_counts(other_cols)
+        for col in other_cols:
+            types[col] = classify_by_uniqueness(int(counts[col]), int(non_null_counts[col]))
+    return {col: types[col] for col in sample.columns}
\ No newline at end of file
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import dataset_store
+import temporal
+
+# Sorted, filtered and searched views of a dataset are answered from indexes built on first use and kept
+# next to the dataset version they describe, so they never need invalidating:
+#   sort-*  row permutation for a list of sort keys (nulls last); the time column sorts by its parsed timestamps
+#   vals-*  non-null values of a numeric column in ascending order, for range predicates via binary search
+#   dict-*  per-row dictionary codes of a column rendered as text (-1 for nulls), for text predicates and search
+# Row id lists of recent queries are kept in memory so paging through one result never recomputes it.
+QUERY_CACHE_SIZE = int(os.getenv("DATACRAFT_QUERY_CACHE_SIZE", 8))
+
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def _index_path(csv_path: str, kind: str, spec) -> str:
+    digest = hashlib.sha1(json.dumps(spec).encode()).hexdigest()[:16]
+    return os.path.join(dataset_store.index_dir(csv_path), f"{kind}-{digest}")
+
+
+def _tmp_path(path: str) -> str:
+    # Concurrent block requests may build the same index; each builder writes its own file and the last rename wins
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+
+def _cached_array(path: str, build) -> np.ndarray:
+    if os.path.exists(f"{path}.npy"):
+        return np.load(f"{path}.npy", mmap_mode="r")
+    array = build()
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, f"{path}.npy")
+    return array
+
+
+def _chronological_order(csv_path: str, sort_keys: list):
+    """
+    Row ids for a sort on the dataset's time column alone when it is stored as text, whose string order is not
+    its time order: taken from the temporal index, rows without a timestamp last, as nulls. None otherwise.
+    """
+    if len(sort_keys) != 1:
+        return None
+    column, order = sort_keys[0]
+    schema = dataset_store.dataset_schema(csv_path)
+    if column not in schema.names or not (pa.types.is_string(schema.field(column).type) or
+                                          pa.types.is_large_string(schema.field(column).type)):
+        return None
+    index = temporal.time_index(csv_path)
+    if index is None or index[0] != column:
+        return None
+    _, row_ids, times = index
+    if order == "desc":
+        # Latest first; equal timestamps keep file order, as in any other stable sort
+        row_ids = row_ids[np.argsort(-np.asarray(times), kind="stable")]
+    untimed = np.ones(dataset_store.read_rows(csv_path, 0, 0)[1], dtype=bool)
+    untimed[row_ids] = False
+    return np.concatenate([row_ids, np.flatnonzero(untimed)]).astype(np.int64)
+
+
+def sort_permutation(csv_path: str, sort_keys: list) -> np.ndarray:
+    """Row ids of the current version in the order given by `sort_keys`, a list of (column, 'asc'|'desc')."""
+    def build():
+        chronological = _chronological_order(csv_path, sort_keys)
+        if chronological is not None:
+            return chronological
+        table = dataset_store.read_table(csv_path, list(dict.fromkeys(column for column, _ in sort_keys)))
+        arrow_keys = [(column, "descending" if order == "desc" else "ascending") for column, order in sort_keys]
+        return pc.sort_indices(table, sort_keys=arrow_keys).to_numpy().astype(np.int64)
+    return _cached_array(_index_path(csv_path, "sort", sort_keys), build)
+
+
+def _sorted_values(csv_path: str, column: str) -> np.ndarray:
+    def build():
+        values = dataset_store.read_table(csv_path, [column]).column(0)
+        if not (pa.types.is_integer(values.type) or pa.types.is_floating(values.type)):
+            raise ValueError(f"Column '{column}' is not numeric.")
+        non_null = len(values) - values.null_count
+        return values.take(sort_permutation(csv_path, [(column, "asc")])[:non_null]).to_numpy().astype(np.float64)
+    return _cached_array(_index_path(csv_path, "vals", column), build)
+
+
+def _dictionary(csv_path: str, column: str) -> tuple:
+    """(distinct values as lowercase text, per-row codes into them with -1 for nulls)."""
+    path = _index_path(csv_path, "dict", column)
+    uniques_path = f"{path}.arrow"
+
+    def build():
+        values = dataset_store.read_table(csv_path, [column]).column(0).combine_chunks()
+        encoded = pc.cast(values, pa.string()).dictionary_encode()
+        uniques = pc.utf8_lower(encoded.dictionary)
+        tmp_path = _tmp_path(uniques_path)
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, pa.schema([("value", pa.string())])) as writer:
+            writer.write_table(pa.table({"value": uniques}))
+        os.replace(tmp_path, uniques_path)
+        return encoded.indices.fill_null(-1).to_numpy().astype(np.int32)
+
+    codes = _cached_array(path, build)
+    uniques = pa.ipc.open_file(pa.memory_map(uniques_path)).read_all().column(0)
+    return uniques, codes
+
+
+def _rows_matching(codes: np.ndarray, matches: pa.Array, negate: bool = False) -> np.ndarray:
+    matches = np.append(matches.fill_null(False).to_numpy(zero_copy_only=False), False)
+    mask = matches[codes]  # code -1 picks the trailing False, so nulls never match
+    return (codes >= 0) & ~mask if negate else mask
+
+
+def _text_mask(csv_path: str, column: str, op: str, value: str) -> np.ndarray:
+    uniques, codes = _dictionary(csv_path, column)
+    value = str(value).lower()
+    if op in ("contains", "notContains"):
+        matches = pc.match_substring(uniques, value)
+    elif op in ("equals", "notEqual"):
+        matches = pc.equal(uniques, value)
+    elif op == "startsWith":
+        matches = pc.starts_with(uniques, value)
+    elif op == "endsWith":
+        matches = pc.ends_with(uniques, value)
+    else:
+        raise ValueError(f"Unsupported text filter '{op}'.")
+    return _rows_matching(codes, matches, negate=op in ("notContains", "notEqual"))
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Number filter value {value!r} is not a number.")
+
+
+def _number_mask(csv_path: str, column: str, op: str, value, value_to=None) -> np.ndarray:
+    values = _sorted_values(csv_path, column)
+    permutation = sort_permutation(csv_path, [(column, "asc")])
+    value = _number(value)
+    if op == "equals" or op == "notEqual":
+        lo, hi = np.searchsorted(values, value, "left"), np.searchsorted(values, value, "right")
+    elif op == "lessThan":
+        lo, hi = 0, np.searchsorted(values, value, "left")
+    elif op == "lessThanOrEqual":
+        lo, hi = 0, np.searchsorted(values, value, "right")
+    elif op == "greaterThan":
+        lo, hi = np.searchsorted(values, value, "right"), len(values)
+    elif op == "greaterThanOrEqual":
+        lo, hi = np.searchsorted(values, value, "left"), len(values)
+    elif op == "inRange":
+        lo, hi = np.searchsorted(values, value, "right"), np.searchsorted(values, _number(value_to), "left")
+    else:
+        raise ValueError(f"Unsupported number filter '{op}'.")
+    mask = np.zeros(len(permutation), dtype=bool)
+    if op == "notEqual":
+        mask[permutation[:len(values)]] = True
+        mask[permutation[lo:hi]] = False
+    else:
+        mask[permutation[lo:max(lo, hi)]] = True
+    return mask
+
+
+def _condition_mask(csv_path: str, column: str, condition: dict):
+    """
+    Evaluates one AG Grid filter model entry (text, number or set, possibly combined with AND/OR).
+    Returns None for an incomplete condition, which the grid sends with null values (an emptied filter box,
+    a range without its upper end) and, like the grid, treats as no filter.
+    """
+    if "conditions" in condition or "condition1" in condition:
+        parts = condition.get("conditions") or [condition["condition1"], condition["condition2"]]
+        kind = condition.get("filterType", "text")
+        masks = [_condition_mask(csv_path, column, {"filterType": kind, **part}) for part in parts]
+        masks = [mask for mask in masks if mask is not None]
+        if not masks:
+            return None
+        combine = np.logical_or if condition.get("operator", "AND").upper() == "OR" else np.logical_and
+        return combine.reduce(masks)
+
+    kind = condition.get("filterType", "text")
+    op = condition.get("type", "contains")
+    if op in ("blank", "notBlank"):
+        null_mask = _dictionary(csv_path, column)[1] < 0
+        return null_mask if op == "blank" else ~null_mask
+    if kind == "number":
+        if condition.get("filter") is None or (op == "inRange" and condition.get("filterTo") is None):
+            return None
+        return _number_mask(csv_path, column, op, condition["filter"], condition.get("filterTo"))
+    if kind == "text":
+        if condition.get("filter") is None:
+            return None
+        return _text_mask(csv_path, column, op, condition["filter"])
+    if kind == "set":
+        uniques, codes = _dictionary(csv_path, column)
+        wanted = pa.array([str(v).lower() for v in condition.get("values", []) if v is not None], type=pa.string())
+        mask = _rows_matching(codes, pc.is_in(uniques, value_set=wanted))
+        if None in condition.get("values", []):
+            mask |= codes < 0
+        return mask
+    raise ValueError(f"Unsupported filter type '{kind}'.")
+
+
+def _search_mask(csv_path: str, search: str) -> np.ndarray:
+    """Rows where any column's text contains `search` (case-insensitive), like the grid's quick filter."""
+    mask = None
+    for column in dataset_store.dataset_schema(csv_path).names:
+        column_mask = _text_mask(csv_path, column, "contains", search)
+        mask = column_mask if mask is None else mask | column_mask
+    return mask
+
+
+def query_row_ids(csv_path: str, sort: list = None, filters: dict = None, search: str = None):
+    """
+    Row ids of the current version that pass `filters` and `search`, in `sort` order.
+    Returns None when the query is the identity (no sort, no filter, no search).
+    """
+    if not sort and not filters and not search:
+        return None
+    # Settle the dataset version first: indexes and cached results are keyed by it
+    dataset_store.ensure_sidecar(csv_path)
+    cache_key = (dataset_store.cache_key("query", csv_path), json.dumps([sort, filters, search], sort_keys=True))
+    with _query_cache_lock:
+        if cache_key in _query_cache:
+            _query_cache.move_to_end(cache_key)
+            return _query_cache[cache_key]
+
+    mask = None
+    for column, condition in (filters or {}).items():
+        column_mask = _condition_mask(csv_path, column, condition)
+        if column_mask is not None:
+            mask = column_mask if mask is None else mask & column_mask
+    if search:
+        search_mask = _search_mask(csv_path, search)
+        mask = search_mask if mask is None else mask & search_mask
+
+    if sort:
+        row_ids = sort_permutation(csv_path, sort)
+        if mask is not None:
+            row_ids = row_ids[mask[row_ids]]
+    elif mask is None:
+        return None  # Only incomplete filters: the unfiltered dataset
+    else:
+        row_ids = np.flatnonzero(mask)
+
+    with _query_cache_lock:
+        _query_cache[cache_key] = row_ids
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+    return row_ids
+
+
+def run_query(csv_path: str, offset: int, limit: int, columns: list = None,
+              sort: list = None, filters: dict = None, search: str = None) -> tuple:
+    """One page of a sorted/filtered/searched view: (Arrow table, total matching rows)."""
+    row_ids = query_row_ids(csv_path, sort, filters, search)
+    if row_ids is None:
+        return dataset_store.read_rows(csv_path, offset, limit, columns)
+    return dataset_store.read_rows_at(csv_path, row_ids[offset:offset + limit], columns), len(row_ids)
@@ -0,0 +1,986 @@
+import codecs
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+from duplicates import column_fingerprints
+
+# Typed columnar copies of the uploaded CSVs live outside of `public/` so they are never served statically.
+# Each dataset gets a directory holding one Arrow IPC file per column plus a manifest listing them in order,
+# so a single-column edit writes one file instead of the whole dataset.
+STORE_DIR = os.getenv("DATACRAFT_STORE_DIR", os.path.join(os.path.dirname(__file__), '..', '.datacraft'))
+
+# Files above this size are converted and profiled in chunks of CHUNK_ROWS rows instead of being loaded whole.
+LARGE_FILE_BYTES = int(os.getenv("DATACRAFT_LARGE_FILE_MB", 512)) * 1024 * 1024
+CHUNK_ROWS = int(os.getenv("DATACRAFT_CHUNK_ROWS", 250_000))
+
+# Uploaded bytes are stored once per SHA-256 and hard-linked into `public/` under each dataset name.
+BLOB_DIR = os.path.join(STORE_DIR, "blobs")
+UPLOAD_TMP_DIR = os.path.join(STORE_DIR, "tmp")
+HASH_CHUNK_BYTES = 1024 * 1024
+# Bytes from the start of a CSV used to detect its encoding and delimiter.
+SNIFF_BYTES = 64 * 1024
+
+
+def _dataset_dir(csv_path: str) -> str:
+    return os.path.join(STORE_DIR, os.path.basename(csv_path))
+
+
+def _manifest_path(csv_path: str) -> str:
+    return os.path.join(_dataset_dir(csv_path), "manifest.json")
+
+
+def _columns_dir(csv_path: str) -> str:
+    return os.path.join(_dataset_dir(csv_path), "columns")
+
+
+def _column_path(csv_path: str, file_name: str) -> str:
+    return os.path.join(_columns_dir(csv_path), file_name)
+
+
+def _csv_signature(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_manifest(csv_path: str):
+    try:
+        with open(_manifest_path(csv_path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_manifest(csv_path: str, manifest: dict):
+    path = _manifest_path(csv_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def sniff_csv_options(head: bytes) -> dict:
+    """Encoding and delimiter of a CSV from its first bytes, as `pd.read_csv` keyword arguments."""
+    if head.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    elif head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = "utf-16"
+    else:
+        try:
+            head.decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError as e:
+            # A multi-byte character cut in half at the end of the sample is still UTF-8
+            encoding = "utf-8" if e.reason == "unexpected end of data" else "latin-1"
+    text = head.decode(encoding, errors="ignore")
+    sample = text[:text.rfind("\n")] if "\n" in text else text
+    try:
+        sep = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        sep = ","
+    return {"sep": sep, "encoding": encoding}
+
+
+def _csv_options(csv_path: str) -> dict:
+    manifest = _read_manifest(csv_path) or {}
+    return manifest.get("csv_options") or {}
+
+
+def _read_csv(csv_path: str, csv_options: dict = None, **kwargs):
+    """`pd.read_csv` with the dataset's detected encoding and delimiter."""
+    options = _csv_options(csv_path) if csv_options is None else csv_options
+    return pd.read_csv(csv_path, on_bad_lines='skip', **options, **kwargs)
+
+
+def _to_arrow(series: pd.Series) -> pa.Array:
+    try:
+        return pa.Array.from_pandas(series)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Object columns holding mixed Python types (e.g. after AI plan code) have no Arrow type; keep them as text.
+        return pa.Array.from_pandas(series.where(series.isnull(), series.astype(str)))
+
+
+def _new_column_file(csv_path: str) -> str:
+    # Column files are immutable: every write gets a fresh name and the manifest is switched over atomically.
+    os.makedirs(_columns_dir(csv_path), exist_ok=True)
+    return f"{uuid.uuid4().hex}.arrow"
+
+
+def _write_column(csv_path: str, name: str, values) -> str:
+    """Writes one column as an uncompressed Arrow IPC file that readers can memory-map."""
+    file_name = _new_column_file(csv_path)
+    path = _column_path(csv_path, file_name)
+    table = pa.table({name: values})
+    with pa.OSFile(f"{path}.tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(f"{path}.tmp", path)
+    return file_name
+
+
+def _write_columns(csv_path: str, df: pd.DataFrame) -> dict:
+    return {str(col): _write_column(csv_path, str(col), _to_arrow(df.iloc[:, i])) for i, col in enumerate(df.columns)}
+
+
+def _common_type(types: list) -> pa.DataType:
+    """The type every chunk of a column can be cast to: their shared type, float64 for mixed numbers, else text."""
+    types = [t for t in types if not pa.types.is_null(t)]
+    if not types:
+        return pa.string()  # Entirely empty column; text accepts anything
+    if all(t == types[0] for t in types):
+        return types[0]
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+        return pa.float64()
+    return pa.string()
+
+
+class _ColumnWriter:
+    """
+    Streams one column of a chunked conversion into segment files, opening a new segment whenever a chunk's
+    type does not fit the current one (e.g. numbers, then text). `finish` casts every segment to the type they
+    all fit, so a column that changes kind mid-file is promoted instead of failing the build.
+    """
+    def __init__(self, csv_path: str, name: str):
+        self.csv_path = csv_path
+        self.name = name
+        self.segments = []  # (tmp path, type)
+        self._sink = self._writer = None
+
+    def _open_segment(self, data_type: pa.DataType):
+        self._close_segment()
+        path = f"{_column_path(self.csv_path, _new_column_file(self.csv_path))}.tmp"
+        self._sink = pa.OSFile(path, "wb")
+        self._writer = pa.ipc.new_file(self._sink, pa.schema([pa.field(self.name, data_type)]))
+        self.segments.append((path, data_type))
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._sink = self._writer = None
+
+    def write(self, values: pa.Array):
+        current = self.segments[-1][1] if self.segments else None
+        if current is None or (values.type != current and _common_type([current, values.type]) != current):
+            self._open_segment(values.type)
+            current = values.type
+        self._writer.write_table(pa.table({self.name: values.cast(current)}))
+
+    def finish(self) -> str:
+        """
+        Publishes the column as one file of its promoted type and returns the file name. The file holds a single
+        record batch, so readers get the whole column as one contiguous buffer they can use without copying.
+        """
+        self._close_segment()
+        schema = pa.schema([pa.field(self.name, _common_type([segment_type for _, segment_type in self.segments]))])
+        segments = [pa.ipc.open_file(pa.memory_map(path)).read_all().cast(schema) for path, _ in self.segments]
+        file_name = _new_column_file(self.csv_path)
+        path = _column_path(self.csv_path, file_name)
+        with pa.OSFile(f"{path}.tmp", "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(pa.concat_tables(segments).combine_chunks())
+        del segments
+        os.replace(f"{path}.tmp", path)
+        self.discard()
+        return file_name
+
+    def discard(self):
+        self._close_segment()
+        for segment_path, _ in self.segments:
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
+
+
+def _write_columns_chunked(csv_path: str, csv_options: dict) -> tuple:
+    """
+    Streams a large CSV into per-column files one chunk at a time. A column whose chunks infer different types
+    is promoted to the type they all fit (float64 for ints and floats, text otherwise), as a whole-file parse would.
+    """
+    writers = None
+    rows = 0
+    try:
+        for chunk in _read_csv(csv_path, csv_options, chunksize=CHUNK_ROWS):
+            if writers is None:
+                writers = [_ColumnWriter(csv_path, str(col)) for col in chunk.columns]
+            for i, writer in enumerate(writers):
+                writer.write(_to_arrow(chunk.iloc[:, i]))
+            rows += len(chunk)
+        if writers is None:
+            # Header-only file: fall back to the regular writer so empty column files still exist.
+            df = _read_csv(csv_path, csv_options)
+            return 0, _write_columns(csv_path, df)
+        return rows, {writer.name: writer.finish() for writer in writers}
+    except Exception:
+        for writer in writers or []:
+            writer.discard()
+        raise
+
+
+def _versions_dir(csv_path: str) -> str:
+    return os.path.join(_dataset_dir(csv_path), "versions")
+
+
+def _history_path(csv_path: str) -> str:
+    return os.path.join(_dataset_dir(csv_path), "history.jsonl")
+
+
+def _row_mask_path(csv_path: str, file_name: str) -> str:
+    return os.path.join(_dataset_dir(csv_path), "row_masks", file_name)
+
+
+def _version_index_dir(csv_path: str, version: str) -> str:
+    return os.path.join(_dataset_dir(csv_path), "indexes", version)
+
+
+def _fingerprints_path(csv_path: str, file_name: str) -> str:
+    return os.path.join(_dataset_dir(csv_path), "fingerprints", f"{file_name}.npy")
+
+
+# Fields of the manifest that describe one version of the data. Each version record holds only these,
+# so versions share column files and differ by the columns they list and the rows they keep.
+VERSION_FIELDS = ("version", "rows", "physical_rows", "columns", "column_files", "row_mask")
+
+
+def _commit_version(csv_path: str, manifest: dict, note: str):
+    """
+    Records `manifest` as a version whose parent is the current head, then moves the head to it.
+    Nothing already on disk is rewritten or deleted, so every earlier version stays readable.
+    """
+    previous = _read_manifest(csv_path) or {}
+    parent = previous.get("version") if "column_files" in previous else None
+    manifest["parent"] = parent
+    os.makedirs(_versions_dir(csv_path), exist_ok=True)
+    record_path = os.path.join(_versions_dir(csv_path), f"{manifest['version']}.json")
+    if not os.path.exists(record_path):
+        record = {field: manifest.get(field) for field in VERSION_FIELDS}
+        record.update({"content_hash": manifest.get("content_hash"), "created_at": time.time()})
+        with open(f"{record_path}.tmp", "w") as f:
+            json.dump(record, f)
+        os.replace(f"{record_path}.tmp", record_path)
+    with open(_history_path(csv_path), "a") as f:
+        f.write(json.dumps({
+            "version": manifest["version"], "parent": parent, "note": note, "created_at": time.time(),
+            "rows": manifest.get("rows"), "columns": len(manifest.get("columns", [])),
+        }) + "\n")
+    _write_manifest(csv_path, manifest)
+
+
+def _write_row_positions(path: str, positions: np.ndarray):
+    # Also rebuilt lazily by concurrent readers, so every writer gets its own temp file
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    positions.astype(np.int64).tofile(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_row_mask(csv_path: str, positions: np.ndarray, physical_rows: int):
+    """
+    Stores the rows a version keeps as a bitmap over the physical rows of its column files (1 bit per row),
+    plus the kept positions as an int64 index so row N of the version is found without a scan.
+    """
+    if len(positions) == physical_rows:
+        return None
+    mask = np.zeros(physical_rows, dtype=bool)
+    mask[positions] = True
+    file_name = f"{uuid.uuid4().hex}.bits"
+    path = _row_mask_path(csv_path, file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.packbits(mask).tofile(f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+    _write_row_positions(f"{path}.pos", positions)
+    return file_name
+
+
+def _row_positions(csv_path: str, manifest: dict):
+    """
+    Physical positions of the rows the current version keeps, memory-mapped from the row index,
+    or None when it keeps all of them.
+    """
+    if not manifest.get("row_mask"):
+        return None
+    path = _row_mask_path(csv_path, manifest["row_mask"])
+    if not os.path.exists(f"{path}.pos"):
+        bits = np.fromfile(path, dtype=np.uint8)
+        _write_row_positions(f"{path}.pos", np.flatnonzero(np.unpackbits(bits, count=manifest["physical_rows"])))
+    if manifest["rows"] == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.memmap(f"{path}.pos", dtype=np.int64, mode="r")
+
+
+def _restore_nan(df: pd.DataFrame) -> pd.DataFrame:
+    # Arrow hands back missing strings as None; restore the NaN that pd.read_csv would have produced.
+    text_cols = df.select_dtypes(include=['object']).columns
+    if len(text_cols):
+        df[text_cols] = df[text_cols].where(df[text_cols].notna(), np.nan)
+    return df
+
+
+def _open_column(csv_path: str, file_name: str) -> pa.Table:
+    # Memory-mapped: only the pages a reader actually touches are loaded from disk.
+    return pa.ipc.open_file(pa.memory_map(_column_path(csv_path, file_name))).read_all()
+
+
+def _read_physical_table(csv_path: str, manifest: dict, columns: list = None) -> pa.Table:
+    column_files = manifest["column_files"]
+    names = manifest["columns"] if columns is None else [str(c) for c in columns]
+    missing = [name for name in names if name not in column_files]
+    if missing:
+        raise KeyError(f"Columns not found in dataset: {missing}")
+    tables = [_open_column(csv_path, column_files[name]) for name in names]
+    return pa.Table.from_arrays(
+        [table.column(0) for table in tables], schema=pa.schema([table.schema.field(0) for table in tables])
+    )
+
+
+def _read_table(csv_path: str, columns: list = None) -> pa.Table:
+    manifest = _read_manifest(csv_path)
+    table = _read_physical_table(csv_path, manifest, columns)
+    positions = _row_positions(csv_path, manifest)
+    return table if positions is None else table.take(positions)
+
+
+def is_large_file(csv_path: str) -> bool:
+    return os.path.getsize(csv_path) > LARGE_FILE_BYTES
+
+
+def _sidecar_unavailable(csv_path: str) -> bool:
+    """True when a chunked conversion of this exact CSV already failed, so tasks read the CSV directly."""
+    manifest = _read_manifest(csv_path)
+    return bool(manifest and manifest.get("sidecar_unavailable")
+                and os.path.exists(csv_path) and manifest.get("csv_signature") == _csv_signature(csv_path))
+
+
+def _manifest_is_current(csv_path: str, manifest: dict) -> bool:
+    """The stored columns win while the CSV is untouched (or stale after an edit); a CSV replaced on disk wins over them."""
+    if not os.path.exists(csv_path):
+        return manifest.get("csv_stale", False)
+    return manifest.get("csv_stale", False) or manifest.get("csv_signature") == _csv_signature(csv_path)
+
+
+def has_fresh_sidecar(csv_path: str) -> bool:
+    """True when the per-column files describe the dataset's current data."""
+    manifest = _read_manifest(csv_path)
+    if not manifest or manifest.get("sidecar_unavailable") or "column_files" not in manifest:
+        return False
+    return _manifest_is_current(csv_path, manifest)
+
+
+def build_sidecar(csv_path: str) -> dict:
+    """Parses the CSV once and stores it as typed per-column files next to its manifest."""
+    os.makedirs(_dataset_dir(csv_path), exist_ok=True)
+    signature = _csv_signature(csv_path)
+    # Uploads register their hash up front; a CSV dropped into `public/` by hand is hashed here.
+    previous = _read_manifest(csv_path) or {}
+    if previous.get("csv_signature") == signature and previous.get("content_hash"):
+        content_hash = previous["content_hash"]
+    else:
+        content_hash = file_digest(csv_path)
+    if previous.get("csv_signature") == signature and "csv_options" in previous:
+        csv_options = previous["csv_options"]
+    else:
+        with open(csv_path, "rb") as f:
+            csv_options = sniff_csv_options(f.read(SNIFF_BYTES))
+    if is_large_file(csv_path):
+        try:
+            rows, column_files = _write_columns_chunked(csv_path, csv_options)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            print(f"Warning: no columnar sidecar for {csv_path}, tasks will read the CSV directly: {e}")
+            manifest = {"version": content_hash, "content_hash": content_hash, "blob_hash": previous.get("blob_hash"),
+                        "csv_signature": signature, "csv_options": csv_options, "sidecar_unavailable": True,
+                        "updated_at": time.time()}
+            _write_manifest(csv_path, manifest)
+            return manifest
+    else:
+        df = _read_csv(csv_path, csv_options, low_memory=False)
+        rows, column_files = len(df), _write_columns(csv_path, df)
+    manifest = {
+        "version": content_hash,
+        "content_hash": content_hash,
+        "blob_hash": previous.get("blob_hash"),
+        "csv_signature": signature,
+        "csv_options": csv_options,
+        "csv_stale": False,
+        "rows": rows,
+        "physical_rows": rows,
+        "columns": list(column_files),
+        "column_files": column_files,
+        "row_mask": None,
+        "updated_at": time.time(),
+    }
+    _commit_version(csv_path, manifest, "Imported CSV")
+    return manifest
+
+
+def ensure_sidecar(csv_path: str):
+    if not has_fresh_sidecar(csv_path) and not _sidecar_unavailable(csv_path):
+        build_sidecar(csv_path)
+
+
+def load_dataset(csv_path: str, columns: list = None, shared: bool = False) -> pd.DataFrame:
+    """
+    Loads a dataset from its column files, building them from the CSV on first use.
+    Pass `columns` to read only the columns a task actually needs.
+    With `shared`, numeric columns without missing values are not copied: they stay views of the memory-mapped
+    column files, so every process loading the same version shares one copy through the page cache. Those
+    columns are read-only; copy the frame before changing it. Versions that dropped rows are always copied.
+    """
+    if _sidecar_unavailable(csv_path):
+        return _read_csv(csv_path, low_memory=False, usecols=columns)
+    ensure_sidecar(csv_path)
+    return _restore_nan(_read_table(csv_path, columns).to_pandas(split_blocks=shared))
+
+
+def iter_dataset_chunks(csv_path: str, columns: list = None, chunk_rows: int = None):
+    """Yields the dataset as DataFrames of at most `chunk_rows` rows, so memory stays bounded for any file size."""
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    ensure_sidecar(csv_path)
+    if has_fresh_sidecar(csv_path):
+        manifest = _read_manifest(csv_path)
+        table = _read_physical_table(csv_path, manifest, columns)
+        positions = _row_positions(csv_path, manifest)
+        for offset in range(0, manifest["rows"], chunk_rows):
+            if positions is None:
+                chunk = table.slice(offset, chunk_rows)
+            else:
+                chunk = table.take(positions[offset:offset + chunk_rows])
+            yield _restore_nan(chunk.to_pandas())
+    else:
+        yield from _read_csv(csv_path, chunksize=chunk_rows, usecols=columns)
+
+
+def _csv_units(csv_path: str) -> tuple:
+    """(code unit dtype, bytes before the first unit) of a CSV's encoding; UTF-16 is scanned in 2-byte units."""
+    with open(csv_path, "rb") as f:
+        bom = f.read(2)
+    if bom == codecs.BOM_UTF16_LE:
+        return np.dtype("<u2"), 2
+    if bom == codecs.BOM_UTF16_BE:
+        return np.dtype(">u2"), 2
+    return np.dtype(np.uint8), 0
+
+
+def _csv_record_offsets(csv_path: str) -> np.ndarray:
+    """
+    Byte offset of every data row of a CSV the column store could not take, followed by the file size. They
+    are found once, by a quote-aware scan for the line breaks that end records, and kept with the version's
+    indexes, so any window of rows is one seek away. Blank lines are skipped, as `pd.read_csv` does; malformed
+    rows that pandas would drop still count as rows here.
+    """
+    path = os.path.join(index_dir(csv_path), "record_offsets.npy")
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    dtype, start = _csv_units(csv_path)
+    units = np.memmap(csv_path, dtype=dtype, mode="r", offset=start)
+    block = HASH_CHUNK_BYTES // dtype.itemsize
+    ends, quoted = [], 0
+    for block_start in range(0, len(units), block):
+        values = units[block_start:block_start + block]
+        quotes = np.cumsum(values == ord('"')) + quoted
+        line_breaks = np.flatnonzero(values == ord('\n'))
+        # A line break inside a quoted field (an odd number of quotes so far) does not end the record
+        ends.append(line_breaks[quotes[line_breaks] % 2 == 0] + block_start)
+        quoted = int(quotes[-1]) if len(quotes) else quoted
+    ends = np.concatenate(ends + [np.array([len(units)])])
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
+    blank = (lengths == 0) | ((lengths == 1) & (units[np.minimum(starts, len(units) - 1)] == ord('\r')))
+    records = starts[~blank]
+    # The first record is the header
+    offsets = np.append(records[1:], len(units)).astype(np.int64) * dtype.itemsize + start
+    _save_array(path, offsets)
+    return offsets
+
+
+def _read_csv_records(csv_path: str, offsets: np.ndarray, row_ids: np.ndarray, columns: list = None) -> pa.Table:
+    """The given data rows of a CSV, in that order, parsed from their bytes alone behind the header."""
+    dtype, _ = _csv_units(csv_path)
+    line_break = np.array([ord('\n')], dtype=dtype).tobytes()
+    with open(csv_path, "rb") as f:
+        parts = [f.read(int(offsets[0]))]
+        if len(row_ids) and np.all(np.diff(row_ids) == 1):
+            ranges = [(row_ids[0], row_ids[-1] + 1)]
+        else:
+            ranges = [(row_id, row_id + 1) for row_id in row_ids]
+        for first, stop in ranges:
+            f.seek(int(offsets[first]))
+            part = f.read(int(offsets[stop] - offsets[first]))
+            parts.append(part if part.endswith(line_break) else part + line_break)
+    df = _read_csv(io.BytesIO(b"".join(parts)), _csv_options(csv_path), usecols=columns)
+    return pa.Table.from_arrays([_to_arrow(df[col]) for col in df.columns], names=[str(c) for c in df.columns])
+
+
+def read_rows(csv_path: str, offset: int, limit: int, columns: list = None) -> tuple:
+    """
+    Returns (rows offset..offset+limit as an Arrow table, total row count). Column files are memory-mapped
+    and rows are addressed by position (through the row index when the version dropped rows), so the cost
+    depends on the window, not on how far into the dataset it starts. A CSV without column files is read
+    the same way through its byte-offset record index.
+    """
+    if _sidecar_unavailable(csv_path):
+        offsets = _csv_record_offsets(csv_path)
+        rows = len(offsets) - 1
+        return _read_csv_records(csv_path, offsets, np.arange(min(offset, rows), min(offset + limit, rows)), columns), rows
+    ensure_sidecar(csv_path)
+    manifest = _read_manifest(csv_path)
+    table = _read_physical_table(csv_path, manifest, columns)
+    positions = _row_positions(csv_path, manifest)
+    if positions is None:
+        return table.slice(offset, limit), manifest["rows"]
+    return table.take(positions[offset:offset + limit]), manifest["rows"]
+
+
+def read_rows_at(csv_path: str, row_ids: np.ndarray, columns: list = None) -> pa.Table:
+    """Rows at arbitrary positions of the current version (e.g. one page of a sorted or filtered query)."""
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    if _sidecar_unavailable(csv_path):
+        return _read_csv_records(csv_path, _csv_record_offsets(csv_path), row_ids, columns)
+    ensure_sidecar(csv_path)
+    manifest = _read_manifest(csv_path)
+    positions = _row_positions(csv_path, manifest)
+    return _read_physical_table(csv_path, manifest, columns).take(row_ids if positions is None else positions[row_ids])
+
+
+def read_table(csv_path: str, columns: list = None) -> pa.Table:
+    """The current version as a (memory-mapped where possible) Arrow table."""
+    if _sidecar_unavailable(csv_path):
+        df = _read_csv(csv_path, low_memory=False, usecols=columns)
+        return pa.Table.from_arrays([_to_arrow(df[col]) for col in df.columns], names=[str(c) for c in df.columns])
+    ensure_sidecar(csv_path)
+    return _read_table(csv_path, columns)
+
+
+def index_dir(csv_path: str) -> str:
+    """Directory for derived indexes of the current version; they never need invalidating, only a new directory."""
+    path = _version_index_dir(csv_path, dataset_version(csv_path))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _save_array(path: str, values: np.ndarray):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+def _column_fingerprints(csv_path: str, name: str, file_name: str) -> np.ndarray:
+    """A column file's term of the row fingerprints over its physical rows; files are immutable, so it is hashed once."""
+    path = _fingerprints_path(csv_path, file_name)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        values = _restore_nan(_open_column(csv_path, file_name).to_pandas()).iloc[:, 0]
+        _save_array(path, column_fingerprints(values, name))
+    return np.load(path, mmap_mode="r")
+
+
+def _physical_row_fingerprints(csv_path: str, manifest: dict) -> np.ndarray:
+    """
+    Starts from the parent version's fingerprints when it has the same physical rows and swaps in the terms
+    of the columns that differ; otherwise sums the (cached) terms of every column.
+    """
+    fingerprints, base_files = np.zeros(manifest["physical_rows"], dtype=np.uint64), {}
+    parent = manifest.get("parent")
+    parent_path = os.path.join(_version_index_dir(csv_path, parent), "row_fingerprints.npy") if parent else None
+    if parent_path and os.path.exists(parent_path):
+        with open(os.path.join(_versions_dir(csv_path), f"{parent}.json")) as f:
+            record = json.load(f)
+        if record["physical_rows"] == manifest["physical_rows"]:
+            fingerprints, base_files = np.load(parent_path), record["column_files"]
+    for name, file_name in base_files.items():
+        if manifest["column_files"].get(name) != file_name:
+            fingerprints -= _column_fingerprints(csv_path, name, file_name)
+    for name, file_name in manifest["column_files"].items():
+        if base_files.get(name) != file_name:
+            fingerprints += _column_fingerprints(csv_path, name, file_name)
+    return fingerprints
+
+
+def row_fingerprints(csv_path: str) -> np.ndarray:
+    """
+    Additive 64-bit fingerprints of the current version's rows (see `duplicates.column_fingerprints`), kept
+    with the version's indexes. A version derived by a column edit only hashes the columns it changed.
+    """
+    ensure_sidecar(csv_path)
+    manifest = _read_manifest(csv_path)
+    path = os.path.join(index_dir(csv_path), "row_fingerprints.npy")
+    if not os.path.exists(path):
+        _save_array(path, _physical_row_fingerprints(csv_path, manifest))
+    fingerprints = np.load(path, mmap_mode="r")
+    positions = _row_positions(csv_path, manifest)
+    return fingerprints if positions is None else fingerprints[positions]
+
+
+def dataset_schema(csv_path: str) -> pa.Schema:
+    """Column names and Arrow types, read from the column file footers without loading any data."""
+    if _sidecar_unavailable(csv_path):
+        return pa.Schema.from_pandas(_read_csv(csv_path, nrows=CHUNK_ROWS), preserve_index=False)
+    ensure_sidecar(csv_path)
+    manifest = _read_manifest(csv_path)
+    return pa.schema([
+        pa.ipc.open_file(pa.memory_map(_column_path(csv_path, manifest["column_files"][name]))).schema.field(0)
+        for name in manifest["columns"]
+    ])
+
+
+def _scatter(values: pa.Array, positions, physical_rows: int) -> pa.Array:
+    """Places a version's visible values at their physical positions; rows the version hides hold nulls."""
+    if positions is None:
+        return values
+    index = np.full(physical_rows, -1, dtype=np.int64)
+    index[positions] = np.arange(len(positions))
+    return values.take(pa.array(index, mask=index < 0))
+
+
+def _kept_row_positions(df: pd.DataFrame, manifest: dict, positions):
+    """
+    Physical positions of `df`'s rows when it is a row subset of the current version (rows were only
+    dropped, so its index still points at the loaded rows), or None when it has to be stored afresh.
+    """
+    index = df.index
+    if not pd.api.types.is_integer_dtype(index) or not index.is_monotonic_increasing or not index.is_unique:
+        return None
+    if len(index) and (index[0] < 0 or index[-1] >= manifest["rows"]):
+        return None
+    visible = np.arange(manifest["physical_rows"]) if positions is None else positions
+    return visible[index.to_numpy()]
+
+
+def save_dataset(df: pd.DataFrame, csv_path: str, note: str = "Saved dataset"):
+    """
+    Persists a modified dataset as a new version in the column store. Columns whose values are unchanged
+    keep their existing files and dropped rows only cost a bitmap, so a version stores just what changed.
+    The CSV is marked stale and is re-exported lazily by `materialize_csv` when somebody downloads it.
+    """
+    os.makedirs(_dataset_dir(csv_path), exist_ok=True)
+    parent_is_current = has_fresh_sidecar(csv_path)
+    manifest = _read_manifest(csv_path) or {}
+    manifest.pop("sidecar_unavailable", None)
+    kept = None
+    if parent_is_current:
+        kept = _kept_row_positions(df, manifest, _row_positions(csv_path, manifest))
+
+    if kept is None:
+        physical_rows = len(df)
+        column_files = _write_columns(csv_path, df)
+    else:
+        physical_rows = manifest["physical_rows"]
+        column_files = {}
+        for i, col in enumerate(df.columns):
+            name, values = str(col), df.iloc[:, i].reset_index(drop=True)
+            parent_file = manifest["column_files"].get(name)
+            if parent_file:
+                parent_values = _restore_nan(_open_column(csv_path, parent_file).take(kept).to_pandas()).iloc[:, 0]
+                if parent_values.dtype == values.dtype and parent_values.equals(values.rename(parent_values.name)):
+                    column_files[name] = parent_file
+                    continue
+            column_files[name] = _write_column(csv_path, name, _scatter(_to_arrow(values), kept, physical_rows))
+
+    manifest.update({
+        "version": frame_digest(df),
+        "content_hash": None,
+        "csv_signature": _csv_signature(csv_path) if os.path.exists(csv_path) else None,
+        "csv_stale": True,
+        "rows": len(df),
+        "physical_rows": physical_rows,
+        "columns": list(column_files),
+        "column_files": column_files,
+        "row_mask": None if kept is None else _write_row_mask(csv_path, kept, physical_rows),
+        "updated_at": time.time(),
+    })
+    _commit_version(csv_path, manifest, note)
+
+
+def _update_columns(csv_path: str, operation: str, name: str, file_name: str = None, note: str = None):
+    manifest = _read_manifest(csv_path)
+    columns = list(manifest["columns"])
+    column_files = dict(manifest["column_files"])
+    if file_name is None:
+        columns.remove(name)
+        del column_files[name]
+    else:
+        if name not in column_files:
+            columns.append(name)
+        column_files[name] = file_name
+    # Derived rather than re-hashed from all the data, so a column edit costs O(column)
+    token = f"{manifest['version']}:{operation}:{name}:{file_name}"
+    manifest.update({
+        "version": hashlib.sha256(token.encode()).hexdigest(),
+        "content_hash": None,
+        "csv_stale": True,
+        "columns": columns,
+        "column_files": column_files,
+        "updated_at": time.time(),
+    })
+    _commit_version(csv_path, manifest, note or f"{operation.capitalize()} column '{name}'")
+
+
+def write_column(csv_path: str, name: str, values: pd.Series, note: str = None):
+    """Adds `name` as the last column, or replaces it in place, writing only that column's file."""
+    ensure_sidecar(csv_path)
+    if not has_fresh_sidecar(csv_path):
+        df = load_dataset(csv_path)
+        df[name] = values.to_numpy()
+        save_dataset(df, csv_path, note or f"Write column '{name}'")
+        return
+    manifest = _read_manifest(csv_path)
+    if len(values) != manifest["rows"]:
+        raise ValueError(f"Column '{name}' has {len(values)} rows, the dataset has {manifest['rows']}.")
+    values = _scatter(_to_arrow(values.reset_index(drop=True)), _row_positions(csv_path, manifest), manifest["physical_rows"])
+    _update_columns(csv_path, "write", str(name), _write_column(csv_path, str(name), values), note)
+
+
+def drop_column(csv_path: str, name: str, note: str = None):
+    """Removes a column by dropping it from the manifest; no other column is read or rewritten."""
+    ensure_sidecar(csv_path)
+    if not has_fresh_sidecar(csv_path):
+        df = load_dataset(csv_path)
+        save_dataset(df.drop(columns=[name]), csv_path, note or f"Drop column '{name}'")
+        return
+    if str(name) not in _read_manifest(csv_path)["column_files"]:
+        raise ValueError(f"Column '{name}' not found.")
+    _update_columns(csv_path, "drop", str(name), note=note)
+
+
+def list_versions(csv_path: str) -> list:
+    """The dataset's history, oldest first; `current` marks the version the head points at."""
+    manifest = _read_manifest(csv_path) or {}
+    try:
+        with open(_history_path(csv_path)) as f:
+            history = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+    for entry in history:
+        entry["current"] = entry["version"] == manifest.get("version")
+    return history
+
+
+def rollback(csv_path: str, version: str) -> dict:
+    """Moves the head back to an earlier version. Only the manifest is rewritten; no data is copied."""
+    try:
+        with open(os.path.join(_versions_dir(csv_path), f"{version}.json")) as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"Version '{version}' not found.")
+    manifest = _read_manifest(csv_path)
+    manifest.pop("sidecar_unavailable", None)
+    manifest.update({field: record.get(field) for field in VERSION_FIELDS})
+    manifest.update({"content_hash": None, "csv_stale": True, "updated_at": time.time()})
+    _commit_version(csv_path, manifest, f"Rolled back to {version[:12]}")
+    return manifest
+
+
+def materialize_csv(csv_path: str) -> str:
+    """Regenerates the CSV from the column store if edits were made since it was last written."""
+    manifest = _read_manifest(csv_path)
+    if manifest and manifest.get("csv_stale"):
+        ensure_sidecar(csv_path)
+    if manifest and manifest.get("csv_stale") and has_fresh_sidecar(csv_path):
+        tmp_path = f"{csv_path}.tmp"
+        for i, chunk in enumerate(iter_dataset_chunks(csv_path)):
+            chunk.to_csv(tmp_path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        if not os.path.exists(tmp_path):
+            pd.DataFrame(columns=_read_manifest(csv_path)["columns"]).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, csv_path)
+        manifest = _read_manifest(csv_path)
+        # The export is a plain comma-separated UTF-8 file, whatever the upload used
+        manifest.update({"csv_signature": _csv_signature(csv_path), "csv_stale": False, "csv_options": {}})
+        _write_manifest(csv_path, manifest)
+    return csv_path
+
+
+def dataset_version(csv_path: str) -> str:
+    """
+    Content-derived token for the dataset's current data: the SHA-256 of the uploaded bytes, or a digest
+    of the frame after an edit. Cheap enough for request handlers: nothing is hashed or parsed here, so a
+    CSV that was never registered gets a size/mtime token until a worker builds its sidecar.
+    """
+    manifest = _read_manifest(csv_path)
+    if manifest and manifest.get("version"):
+        if manifest.get("csv_stale") or manifest.get("csv_signature") == _csv_signature(csv_path):
+            return manifest["version"]
+    signature = _csv_signature(csv_path)
+    return f"csv-{signature['mtime_ns']}-{signature['size']}"
+
+
+def dataset_signature(csv_path: str) -> str:
+    """
+    Token that, like `dataset_version`, changes with the dataset's data, but stays put while a worker registers
+    or hashes the CSV: the CSV's size/mtime until the dataset is edited, the edited version after that.
+    For keys that must hold across the sidecar build, such as the profiling lease.
+    """
+    manifest = _read_manifest(csv_path)
+    if manifest and manifest.get("version") and manifest.get("csv_stale"):
+        return manifest["version"]
+    signature = _csv_signature(csv_path)
+    return f"csv-{signature['mtime_ns']}-{signature['size']}"
+
+
+def cache_key(prefix: str, csv_path: str) -> str:
+    """Redis key for a cached result about this dataset; it can never outlive the content it describes."""
+    return f"{prefix}:{os.path.basename(csv_path)}:{dataset_version(csv_path)}"
+
+
+def file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame: column names, dtypes and per-row fingerprints."""
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+def new_upload_path() -> str:
+    os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+    return os.path.join(UPLOAD_TMP_DIR, uuid.uuid4().hex)
+
+
+def chunked_upload_path(upload_id: str) -> str:
+    return os.path.join(UPLOAD_TMP_DIR, f"{upload_id}.part")
+
+
+def allocate_chunked_upload(upload_id: str, size: int) -> str:
+    """Creates the file a chunked upload is written into, sized up front so chunks can land in any order."""
+    os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+    path = chunked_upload_path(upload_id)
+    with open(path, "wb") as f:
+        f.truncate(size)
+    return path
+
+
+def write_upload_chunk(upload_id: str, offset: int, data: bytes):
+    """Writes one chunk in place at its offset; re-sending a chunk simply overwrites it."""
+    fd = os.open(chunked_upload_path(upload_id), os.O_WRONLY)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view, offset = view[written:], offset + written
+    finally:
+        os.close(fd)
+
+
+def remove_chunked_upload(upload_id: str):
+    try:
+        os.remove(chunked_upload_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def idle_chunked_uploads(idle_seconds: float) -> list:
+    """Ids of chunked uploads whose file has not been written for `idle_seconds`."""
+    try:
+        names = os.listdir(UPLOAD_TMP_DIR)
+    except FileNotFoundError:
+        return []
+    cutoff = time.time() - idle_seconds
+    idle = []
+    for name in names:
+        if not name.endswith(".part"):
+            continue
+        try:
+            if os.path.getmtime(os.path.join(UPLOAD_TMP_DIR, name)) < cutoff:
+                idle.append(name[:-len(".part")])
+        except FileNotFoundError:
+            continue  # completed or aborted meanwhile
+    return idle
+
+
+def read_upload_head(path: str, size: int = SNIFF_BYTES) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(size)
+
+
+def store_blob(tmp_path: str, content_hash: str) -> str:
+    """Moves a fully written upload into the blob store, or drops it if identical bytes are already there."""
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    blob_path = os.path.join(BLOB_DIR, content_hash)
+    if os.path.exists(blob_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, blob_path)
+    return blob_path
+
+
+def link_blob(content_hash: str, csv_path: str):
+    blob_path = os.path.join(BLOB_DIR, content_hash)
+    try:
+        os.link(blob_path, csv_path)
+    except OSError:
+        # Store and public dir on different filesystems: fall back to a copy.
+        shutil.copyfile(blob_path, csv_path)
+
+
+def register_upload(csv_path: str, content_hash: str, csv_options: dict = None):
+    """
+    Records the content hash (and the encoding and delimiter, when sniffed during the upload) of a
+    freshly linked upload; the sidecar itself is built later by a worker.
+    """
+    os.makedirs(_dataset_dir(csv_path), exist_ok=True)
+    manifest = {
+        "version": content_hash,
+        "content_hash": content_hash,
+        # The blob this upload was linked from; unlike `content_hash` it survives edits, for `remove_dataset`
+        "blob_hash": content_hash,
+        "csv_signature": _csv_signature(csv_path),
+        "updated_at": time.time(),
+    }
+    if csv_options is not None:
+        manifest["csv_options"] = csv_options
+    _write_manifest(csv_path, manifest)
+
+
+def content_hash(csv_path: str):
+    """SHA-256 of the dataset's current bytes, or None if it was edited or never registered."""
+    manifest = _read_manifest(csv_path)
+    if manifest and not manifest.get("csv_stale") and manifest.get("csv_signature") == _csv_signature(csv_path):
+        return manifest.get("content_hash")
+    return None
+
+
+def clone_sidecar(source_csv_path: str, target_csv_path: str) -> bool:
+    """Hard-links the column files of a byte-identical dataset instead of parsing the same CSV again."""
+    if not has_fresh_sidecar(source_csv_path) or content_hash(source_csv_path) != content_hash(target_csv_path):
+        return False
+    manifest = _read_manifest(source_csv_path)
+    os.makedirs(_columns_dir(target_csv_path), exist_ok=True)
+    for file_name in manifest["column_files"].values():
+        if not os.path.exists(_column_path(target_csv_path, file_name)):
+            os.link(_column_path(source_csv_path, file_name), _column_path(target_csv_path, file_name))
+    manifest.update({"csv_signature": _csv_signature(target_csv_path), "updated_at": time.time()})
+    _commit_version(target_csv_path, manifest, "Imported CSV")
+    return True
+
+
+def last_modified(csv_path: str) -> float:
+    manifest = _read_manifest(csv_path)
+    if manifest and manifest.get("csv_stale"):
+        return manifest["updated_at"]
+    return os.path.getmtime(csv_path)
+
+
+def remove_dataset(csv_path: str):
+    """
+    Drops the dataset's store entry, and the blob it was uploaded as once no dataset name links to it anymore.
+    Call it after the CSV itself is deleted. An edited dataset's CSV was re-exported (breaking its hard link)
+    and no longer matches `content_hash`, so the blob is found through `blob_hash`, which edits never clear.
+    """
+    manifest = _read_manifest(csv_path) or {}
+    shutil.rmtree(_dataset_dir(csv_path), ignore_errors=True)
+    if manifest.get("blob_hash"):
+        blob_path = os.path.join(BLOB_DIR, manifest["blob_hash"])
+        if os.path.exists(blob_path) and os.stat(blob_path).st_nlink == 1:
+            os.remove(blob_path)
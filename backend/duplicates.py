@@ -0,0 +1,154 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# A second, independent hash key widens fingerprints to 128 bits when 64 are not enough.
+_SECOND_HASH_KEY = "datacraft-dup-2k"
+
+# In-memory budget for the streaming counter before fingerprints are partitioned to disk.
+SPILL_MEMORY_BYTES = int(os.getenv("DATACRAFT_DUPLICATE_MEMORY_MB", 256)) * 1024 * 1024
+SPILL_DIR = os.getenv("DATACRAFT_SPILL_DIR") or None
+
+
+def _canonical_floats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Folds -0.0 into 0.0 and every NaN bit pattern into one, so values that compare equal (and that
+    `df.duplicated()` treats as equal) also hash equal.
+    """
+    float_columns = [i for i, dtype in enumerate(df.dtypes) if dtype.kind in 'fc']
+    if not float_columns:
+        return df
+    df = df.copy(deep=False)
+    for i in float_columns:
+        values = df.iloc[:, i]
+        df.isetitem(i, (values + 0).where(values.notna()))
+    return df
+
+
+def row_fingerprints(df: pd.DataFrame, bits: int = 64) -> np.ndarray:
+    """
+    Vectorized per-row hashes: shape (n,) uint64 for 64 bits, (n, 2) uint64 for 128 bits.
+    No per-row tuples are built, unlike `df.duplicated()` on object columns.
+    """
+    df = _canonical_floats(df)
+    first = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    if bits == 64:
+        return first
+    second = pd.util.hash_pandas_object(df, index=False, hash_key=_SECOND_HASH_KEY).to_numpy()
+    return np.column_stack([first, second])
+
+
+def column_fingerprints(values: pd.Series, name: str) -> np.ndarray:
+    """
+    One column's term of additive row fingerprints: its value hashes times an odd multiplier drawn from the
+    column name. A row's fingerprint is the wrapping sum of its columns' terms, so an edit swaps one column's
+    term in or out without hashing the others.
+    """
+    multiplier = np.uint64(int(hashlib.sha1(str(name).encode()).hexdigest()[:16], 16) | 1)
+    hashes = pd.util.hash_pandas_object(_canonical_floats(values.to_frame()).iloc[:, 0], index=False).to_numpy()
+    return hashes * multiplier
+
+
+def _first_occurrence(fingerprints: np.ndarray) -> tuple:
+    """Returns (is_duplicate, position of the first row with the same fingerprint) for every row."""
+    if fingerprints.ndim == 1:
+        codes, _ = pd.factorize(fingerprints)
+    else:
+        codes = pd.MultiIndex.from_arrays([fingerprints[:, 0], fingerprints[:, 1]]).factorize()[0]
+    n_groups = codes.max() + 1 if len(codes) else 0
+    first_positions = np.full(n_groups, len(codes), dtype=np.int64)
+    np.minimum.at(first_positions, codes, np.arange(len(codes)))
+    first = first_positions[codes]
+    return first != np.arange(len(codes)), first
+
+
+def duplicate_mask(df: pd.DataFrame, bits: int = 64, verify: bool = False) -> np.ndarray:
+    """
+    Boolean mask of `df.duplicated(keep='first')`, computed on row fingerprints.
+    Without `verify` the mask is approximate: rows whose values differ but hash alike are flagged too, e.g.
+    a hash collision or an object column holding both 1 and '1'. With `verify=True` it is exact: only the
+    rows that share a fingerprint with another row are handed to `df.duplicated()`.
+    """
+    if df.empty:
+        return np.zeros(len(df), dtype=bool)
+    is_duplicate, first = _first_occurrence(row_fingerprints(df, bits))
+    if verify and is_duplicate.any():
+        # Equal rows always share a fingerprint, so every duplicate and its first occurrence are candidates
+        candidates = np.zeros(len(df), dtype=bool)
+        candidates[is_duplicate] = True
+        candidates[first[is_duplicate]] = True
+        positions = np.flatnonzero(candidates)
+        is_duplicate[positions] = df.iloc[positions].duplicated(keep='first').to_numpy()
+    return is_duplicate
+
+
+def count_duplicates(df: pd.DataFrame, bits: int = 64, verify: bool = False) -> int:
+    return int(duplicate_mask(df, bits=bits, verify=verify).sum())
+
+
+class DuplicateCounter:
+    """
+    Counts duplicate rows across a stream of chunks from 64-bit fingerprints.
+    Fingerprints stay in memory up to `memory_bytes`; beyond that they are split by their top bits into
+    `partitions` (a power of two) files on disk, and each partition is de-duplicated on its own at the end.
+    """
+    def __init__(self, memory_bytes: int = SPILL_MEMORY_BYTES, partitions: int = 64, spill_dir: str = SPILL_DIR):
+        self.memory_bytes = memory_bytes
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.rows = 0
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._spill_path = None
+
+    def add(self, chunk: pd.DataFrame):
+        self.add_fingerprints(row_fingerprints(chunk))
+
+    def add_fingerprints(self, fingerprints: np.ndarray):
+        self.rows += len(fingerprints)
+        self._buffer.append(fingerprints)
+        self._buffered_bytes += fingerprints.nbytes
+        if self._buffered_bytes > self.memory_bytes:
+            self._spill()
+
+    def _spill(self):
+        if self._spill_path is None:
+            self._spill_path = tempfile.mkdtemp(prefix="datacraft-dups-", dir=self.spill_dir)
+        fingerprints = np.concatenate(self._buffer)
+        self._buffer, self._buffered_bytes = [], 0
+        shift = np.uint64(64 - int(np.log2(self.partitions)))
+        partition_ids = (fingerprints >> shift).astype(np.int64)
+        order = np.argsort(partition_ids, kind='stable')
+        boundaries = np.searchsorted(partition_ids[order], np.arange(self.partitions + 1))
+        for partition in range(self.partitions):
+            part = fingerprints[order[boundaries[partition]:boundaries[partition + 1]]]
+            if len(part):
+                with open(os.path.join(self._spill_path, f"{partition}.bin"), "ab") as f:
+                    f.write(part.tobytes())
+
+    def count(self) -> int:
+        if self._spill_path is None:
+            unique = len(np.unique(np.concatenate(self._buffer))) if self._buffer else 0
+            return self.rows - unique
+        if self._buffer:
+            self._spill()
+        unique = 0
+        for name in os.listdir(self._spill_path):
+            part = np.fromfile(os.path.join(self._spill_path, name), dtype=np.uint64)
+            unique += len(np.unique(part))
+        return self.rows - unique
+
+    def close(self):
+        if self._spill_path is not None:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
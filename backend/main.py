@@ -1,25 +1,64 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from pydantic import BaseModel
-import shutil
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request, BackgroundTasks
+from pydantic import BaseModel, Field
+import asyncio
+import gzip
+import hashlib
+import io
 import os
-import glob
 import json
-from typing import Optional, Dict, Any
+import re
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Literal
 from fastapi.staticfiles import StaticFiles
-from celery_worker import celery_app as worker, generate_comprehensive_stats, generate_diagnostic_report, generate_treatment_plans_task,run_impact_simulation_task ,apply_ai_plan_task
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from celery_worker import celery_app as worker, generate_treatment_plans_task,run_impact_simulation_task ,apply_ai_plan_task, dispatch_profile, job_channel, dataset_channel, _profile_cache_keys, DEFAULT_SIMULATION_ENGINE
 from celery.result import AsyncResult
+import dataset_store
+import dataset_query
+import catalog
+import pandas as pd
+from profiling import profile_dataset
+import pyarrow as pa
+import pyarrow.compute as pc
 from fastapi.middleware.cors import CORSMiddleware
-from redis import Redis
-from dotenv import load_dotenv
-
-
-load_dotenv()
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-REDIS_DB_CACHE = int(os.getenv("REDIS_DB_CACHE", 1))
-redis_cache: Redis = Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB_CACHE, decode_responses=True)
-
-app = FastAPI()
+# Handlers use the async client; `redis_cache` is only for code that already runs in a worker thread
+from cache import redis_async, redis_cache, redis_events, redis_payloads, redis_payloads_async, CACHE_TTL_SECONDS
+from cache import ETAG_LENGTH, encode_payload, decode_payload, split_payload
+
+def sweep_abandoned_uploads() -> int:
+    """Deletes the files of chunked uploads whose Redis state has expired; returns how many were removed."""
+    removed = 0
+    for upload_id in dataset_store.idle_chunked_uploads(UPLOAD_SWEEP_GRACE_SECONDS):
+        if not redis_cache.exists(f"chunked_upload:{upload_id}"):
+            dataset_store.remove_chunked_upload(upload_id)
+            removed += 1
+    return removed
+
+async def _sweep_uploads_periodically():
+    while True:
+        try:
+            removed = await run_in_threadpool(sweep_abandoned_uploads)
+            if removed:
+                print(f"Info: Removed {removed} abandoned chunked upload(s).")
+        except Exception as e:
+            print(f"Warning: could not sweep abandoned uploads: {e}")
+        await asyncio.sleep(UPLOAD_SWEEP_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pick up CSVs added or removed while the API was down, then optionally follow public/ live
+    await run_in_threadpool(catalog.sync_directory, public_dir)
+    observer = catalog.watch_directory(public_dir) if os.getenv("DATACRAFT_WATCH_PUBLIC") == "1" else None
+    sweeper = asyncio.create_task(_sweep_uploads_periodically())
+    yield
+    sweeper.cancel()
+    if observer:
+        observer.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["http://localhost:5173"]
 app.add_middleware(
@@ -42,7 +81,36 @@ class CleanRequest(BaseModel):
     dataset_name: str
     action_type: str
 
+class RollbackRequest(BaseModel):
+    version: str
+
+class QueryRequest(BaseModel):
+    offset: int = 0
+    limit: int = 100
+    columns: Optional[List[str]] = None
+    sort: Optional[List[Dict[str, str]]] = None  # AG Grid sort model: [{"colId": ..., "sort": "asc"|"desc"}]
+    filters: Optional[Dict[str, Any]] = None  # AG Grid filter model, keyed by column
+    search: Optional[str] = None
+
 public_dir = os.path.join(os.path.dirname(__file__), '..', 'public')
+MAX_ROWS_PER_PAGE = 5000
+# While an upload is still arriving, its first PREVIEW_BYTES (at most PREVIEW_ROWS rows) are profiled
+# and published under `upload_preview:<upload id>` for the UI.
+PREVIEW_BYTES = 1024 * 1024
+PREVIEW_ROWS = 1000
+UPLOAD_ID_PATTERN = re.compile(r"^[A-Za-z0-9-]{8,64}$")
+# Chunked uploads: the client picks the chunk size within these bounds; state lives in Redis for a day.
+UPLOAD_CHUNK_BYTES = 16 * 1024 * 1024
+MAX_UPLOAD_CHUNK_BYTES = 64 * 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("DATACRAFT_MAX_UPLOAD_MB", 50 * 1024)) * 1024 * 1024
+MAX_UPLOAD_CHUNKS = 10_000
+CHUNKED_UPLOAD_TTL = 86400
+# Files of chunked uploads whose state expired (abandoned, never completed nor aborted) are swept this often.
+# The grace period covers the moment between allocating an upload's file and recording its state.
+UPLOAD_SWEEP_SECONDS = 3600
+UPLOAD_SWEEP_GRACE_SECONDS = 3600
+# An event stream re-checks job status this often, in case a worker died without announcing it
+EVENT_KEEPALIVE_SECONDS = 15
 class TaskRequest(BaseModel):
     dataset_name: str
     column_name: str
@@ -53,6 +121,18 @@ class RunSimulationRequest(BaseModel):
     plans: Dict[str, Any]
     target_variable: str
     goal: str
+    # 'full' scores every plan on the whole dataset; 'sampled' ranks them on growing subsamples within
+    # `time_budget_seconds`; 'auto' samples large datasets only
+    mode: Literal["full", "sampled", "auto"] = "full"
+    time_budget_seconds: float = Field(60, gt=0, le=3000)
+    # Model behind the scores; 'auto' switches to gradient boosting on native categories when one-hot
+    # features would not fit in memory
+    engine: Literal["auto", "random_forest", "sparse_random_forest", "hist_gradient_boosting"] = DEFAULT_SIMULATION_ENGINE
+
+class CreateUploadRequest(BaseModel):
+    filename: str
+    size: int
+    chunk_size: int = UPLOAD_CHUNK_BYTES
 
 @app.post("/api/dataset/{dataset_name}/run-simulation")
 async def run_simulation(dataset_name: str, request: RunSimulationRequest):
@@ -61,7 +141,10 @@ async def run_simulation(dataset_name: str, request: RunSimulationRequest):
             dataset_name=dataset_name,
             plans=request.plans,
             target_variable=request.target_variable,
-            goal=request.goal
+            goal=request.goal,
+            mode=request.mode,
+            time_budget=request.time_budget_seconds,
+            engine=request.engine
         )
         return {"job_id": task.id, "status": "Impact simulation job started."}
     except Exception as e:
@@ -118,21 +201,252 @@ async def apply_plan(dataset_name: str, request: ApplyPlanRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def adopt_cached_profile(file_path: str, content_hash: str) -> bool:
+    """
+    Gives a byte-identical upload the statistics, diagnostics, column types and sidecar
+    of the dataset that was already profiled with the same content.
+    """
+    donor_name = redis_cache.get(f"profiled:{content_hash}")
+    if not donor_name:
+        return False
+    donor_path = os.path.join(public_dir, donor_name)
+    if not os.path.exists(donor_path) or dataset_store.dataset_version(donor_path) != content_hash:
+        return False
+    donor_keys = [dataset_store.cache_key(prefix, donor_path) for prefix in ("statistics", "diagnostics", "dtypes")]
+    with redis_payloads.pipeline(transaction=False) as pipe:
+        pipe.mget(donor_keys[:2])
+        pipe.hgetall(donor_keys[2])
+        (donor_stats, donor_diagnostics), column_types = pipe.execute()
+    if not donor_stats or not donor_diagnostics:
+        return False
+
+    dataset_name = os.path.basename(file_path)
+    statistics = decode_payload(donor_stats)
+    diagnostics = decode_payload(donor_diagnostics)
+    statistics["filename"] = diagnostics["filename"] = dataset_name
+    stats_key, diagnostics_key, types_key = [dataset_store.cache_key(prefix, file_path) for prefix in ("statistics", "diagnostics", "dtypes")]
+    with redis_payloads.pipeline(transaction=False) as pipe:
+        pipe.set(stats_key, encode_payload(statistics), ex=CACHE_TTL_SECONDS)
+        pipe.set(diagnostics_key, encode_payload(diagnostics), ex=CACHE_TTL_SECONDS)
+        if column_types:
+            pipe.hset(types_key, mapping=column_types)
+            pipe.expire(types_key, CACHE_TTL_SECONDS)
+        pipe.execute()
+    dataset_store.clone_sidecar(donor_path, file_path)
+    catalog.record_profile(file_path, statistics)
+    return True
+
+def _write_chunk(buffer, hasher, chunk: bytes):
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+def _publish_upload_preview(upload_id: str, filename: str, head: bytes):
+    """Profiles the first rows of an upload that is still arriving."""
+    csv_options = dataset_store.sniff_csv_options(head[:dataset_store.SNIFF_BYTES])
+    preview_key = f"upload_preview:{upload_id}"
+    try:
+        text = head.decode(csv_options["encoding"], errors="ignore")
+        if "\n" in text:
+            text = text[:text.rfind("\n") + 1]  # the last line may be cut off mid-row
+        df = pd.read_csv(io.StringIO(text), sep=csv_options["sep"], on_bad_lines='skip', nrows=PREVIEW_ROWS)
+        statistics, _ = profile_dataset(
+            df, filename, datetime.now().strftime('%Y-%m-%d'), f"{len(head) / (1024*1024):.1f}MB"
+        )
+        statistics["preview"] = True
+        preview = {"status": "SUCCESS", "filename": filename, "csv_options": csv_options, "statistics": statistics}
+    except Exception as e:
+        print(f"Warning: could not profile the start of upload {upload_id}: {e}")
+        preview = {"status": "FAILURE", "filename": filename, "csv_options": csv_options, "error": str(e)}
+    redis_cache.set(preview_key, json.dumps(preview), ex=3600)
+
+def _finalize_upload(tmp_path: str, content_hash: str, filename: str, csv_options: dict) -> str:
+    """Keeps the bytes once per content hash and registers the upload as a dataset; returns its file name."""
+    dataset_store.store_blob(tmp_path, content_hash)
+    original_path = os.path.join(public_dir, filename)
+    if os.path.exists(original_path) and dataset_store.content_hash(original_path) == content_hash:
+        # Same name, same bytes: the existing dataset already is this upload
+        return filename
+    versioned_path = get_next_version_path(original_path)
+    dataset_store.link_blob(content_hash, versioned_path)
+    dataset_store.register_upload(versioned_path, content_hash, csv_options)
+    catalog.record_dataset(versioned_path)
+    if not adopt_cached_profile(versioned_path, content_hash):
+        # Convert to the columnar sidecar once, then profile statistics and diagnostics in a single pass
+        dispatch_profile(versioned_path, build_sidecar=True)
+    return os.path.basename(versioned_path)
+
+async def _receive_upload(chunks, filename: str, upload_id: str = None) -> dict:
+    """
+    Writes an upload to disk off the event loop while hashing it. The first bytes are kept to detect
+    the encoding and delimiter and, when the client gave an upload id, to profile a preview early.
+    """
+    filename = os.path.basename(filename or "")
+    if not filename:
+        raise HTTPException(status_code=400, detail="A file name is required.")
+    tmp_path = dataset_store.new_upload_path()
+    hasher = hashlib.sha256()
+    head = bytearray()
+    preview = None
+    try:
+        with open(tmp_path, "wb") as buffer:
+            async for chunk in chunks:
+                await asyncio.to_thread(_write_chunk, buffer, hasher, chunk)
+                if len(head) < PREVIEW_BYTES:
+                    head += chunk[:PREVIEW_BYTES - len(head)]
+                    if upload_id and len(head) >= PREVIEW_BYTES:
+                        preview = asyncio.create_task(asyncio.to_thread(_publish_upload_preview, upload_id, filename, bytes(head)))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if upload_id and preview is None:
+        preview = asyncio.create_task(asyncio.to_thread(_publish_upload_preview, upload_id, filename, bytes(head)))
+
+    csv_options = dataset_store.sniff_csv_options(bytes(head[:dataset_store.SNIFF_BYTES]))
+    name = await asyncio.to_thread(_finalize_upload, tmp_path, hasher.hexdigest(), filename, csv_options)
+    if preview is not None:
+        await preview
+        await _mark_preview_complete(upload_id, name)
+    return {"status": "SUCCESS", "message": "File uploaded", "path": f"/{name}", "name": name}
+
+async def _mark_preview_complete(upload_id: str, name: str):
+    preview_key = f"upload_preview:{upload_id}"
+    upload_preview = json.loads(await redis_async.get(preview_key) or "{}")
+    upload_preview.update({"upload_complete": True, "name": name})
+    await redis_async.set(preview_key, json.dumps(upload_preview), ex=3600)
+
+async def _upload_file_chunks(file: UploadFile):
+    while chunk := await file.read(dataset_store.HASH_CHUNK_BYTES):
+        yield chunk
+
 @app.post("/api/upload")
 async def upload_dataset(file: UploadFile = File(...)):
     try:
-        original_path = os.path.join(public_dir, file.filename)
-        versioned_path = get_next_version_path(original_path)
-        with open(versioned_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Dispatch both tasks concurrently for efficiency
-        generate_comprehensive_stats.delay(versioned_path)
-        generate_diagnostic_report.delay(versioned_path)
+        return await _receive_upload(_upload_file_chunks(file), file.filename)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
 
-        return {"status": "SUCCESS", "message": "File uploaded", "path": f"/{os.path.basename(versioned_path)}", "name": os.path.basename(versioned_path)}
+@app.post("/api/upload/stream")
+async def upload_dataset_stream(request: Request, filename: str, upload_id: Optional[str] = None):
+    """Upload with the raw file as the request body, so it is written as it arrives instead of spooled first."""
+    if upload_id is not None and not UPLOAD_ID_PATTERN.match(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id.")
+    try:
+        return await _receive_upload(request.stream(), filename, upload_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
+
+async def _chunked_upload(upload_id: str) -> dict:
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id.")
+    upload = await redis_async.hgetall(f"chunked_upload:{upload_id}")
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found or expired.")
+    return {**upload, "size": int(upload["size"]), "chunk_size": int(upload["chunk_size"]),
+            "total_chunks": int(upload["total_chunks"])}
+
+async def _received_chunks(upload_id: str) -> list:
+    return sorted(int(index) for index in await redis_async.smembers(f"chunked_upload:{upload_id}:received"))
+
+@app.post("/api/uploads")
+async def create_chunked_upload(request: CreateUploadRequest):
+    """
+    Starts a resumable upload. Chunks of `chunk_size` bytes (the last one shorter) are then PUT in any
+    order and in parallel, each written in place into one preallocated file, so finishing needs no copy.
+    """
+    filename = os.path.basename(request.filename)
+    if not filename or request.size <= 0:
+        raise HTTPException(status_code=400, detail="A file name and a positive size are required.")
+    if request.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Uploads are limited to {MAX_UPLOAD_BYTES} bytes.")
+    if not 0 < request.chunk_size <= MAX_UPLOAD_CHUNK_BYTES:
+        raise HTTPException(status_code=400, detail=f"Chunk size must be at most {MAX_UPLOAD_CHUNK_BYTES} bytes.")
+    total_chunks = -(-request.size // request.chunk_size)
+    if total_chunks > MAX_UPLOAD_CHUNKS:
+        raise HTTPException(status_code=400, detail=f"Uploads are limited to {MAX_UPLOAD_CHUNKS} chunks; use larger chunks.")
+    upload_id = uuid.uuid4().hex
+    await asyncio.to_thread(dataset_store.allocate_chunked_upload, upload_id, request.size)
+    async with redis_async.pipeline(transaction=False) as pipe:
+        pipe.hset(f"chunked_upload:{upload_id}", mapping={
+            "filename": filename, "size": request.size, "chunk_size": request.chunk_size, "total_chunks": total_chunks,
+        })
+        pipe.expire(f"chunked_upload:{upload_id}", CHUNKED_UPLOAD_TTL)
+        await pipe.execute()
+    return {"upload_id": upload_id, "chunk_size": request.chunk_size, "total_chunks": total_chunks}
+
+@app.put("/api/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(upload_id: str, index: int, request: Request, background_tasks: BackgroundTasks):
+    upload = await _chunked_upload(upload_id)
+    if upload.get("finalizing"):
+        raise HTTPException(status_code=409, detail="Upload is already being finalized.")
+    if not 0 <= index < upload["total_chunks"]:
+        raise HTTPException(status_code=400, detail="Chunk index out of range.")
+    offset = index * upload["chunk_size"]
+    expected = min(upload["chunk_size"], upload["size"] - offset)
+    data = await request.body()
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected} bytes, got {len(data)}.")
+
+    await asyncio.to_thread(dataset_store.write_upload_chunk, upload_id, offset, data)
+    async with redis_async.pipeline(transaction=False) as pipe:
+        pipe.sadd(f"chunked_upload:{upload_id}:received", index)
+        pipe.expire(f"chunked_upload:{upload_id}:received", CHUNKED_UPLOAD_TTL)
+        pipe.expire(f"chunked_upload:{upload_id}", CHUNKED_UPLOAD_TTL)
+        await pipe.execute()
+    if index == 0:
+        # The first chunk already holds enough rows for the preview profile
+        background_tasks.add_task(_publish_upload_preview, upload_id, upload["filename"], data[:PREVIEW_BYTES])
+    return {"status": "SUCCESS", "index": index}
+
+@app.get("/api/uploads/{upload_id}")
+async def get_chunked_upload(upload_id: str):
+    """Which chunks the server has, so an interrupted upload resumes with only the missing ones."""
+    upload = await _chunked_upload(upload_id)
+    received = await _received_chunks(upload_id)
+    received_set = set(received)
+    missing = [index for index in range(upload["total_chunks"]) if index not in received_set]
+    return {**upload, "received": received, "missing": missing}
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def complete_chunked_upload(upload_id: str):
+    """Hashes the assembled file, moves it into the blob store and registers it like any other upload."""
+    upload = await _chunked_upload(upload_id)
+    missing = upload["total_chunks"] - len(await _received_chunks(upload_id))
+    if missing:
+        raise HTTPException(status_code=409, detail=f"{missing} chunk(s) still missing.")
+    if not await redis_async.hsetnx(f"chunked_upload:{upload_id}", "finalizing", 1):
+        raise HTTPException(status_code=409, detail="Upload is already being finalized.")
+    try:
+        path = dataset_store.chunked_upload_path(upload_id)
+        content_hash = await asyncio.to_thread(dataset_store.file_digest, path)
+        csv_options = dataset_store.sniff_csv_options(await asyncio.to_thread(dataset_store.read_upload_head, path))
+        name = await asyncio.to_thread(_finalize_upload, path, content_hash, upload["filename"], csv_options)
     except Exception as e:
+        await redis_async.hdel(f"chunked_upload:{upload_id}", "finalizing")
         raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
+    await redis_async.delete(f"chunked_upload:{upload_id}", f"chunked_upload:{upload_id}:received")
+    await _mark_preview_complete(upload_id, name)
+    return {"status": "SUCCESS", "message": "File uploaded", "path": f"/{name}", "name": name}
+
+@app.delete("/api/uploads/{upload_id}")
+async def abort_chunked_upload(upload_id: str):
+    await _chunked_upload(upload_id)
+    await redis_async.delete(f"chunked_upload:{upload_id}", f"chunked_upload:{upload_id}:received")
+    await asyncio.to_thread(dataset_store.remove_chunked_upload, upload_id)
+    return {"status": "SUCCESS", "message": "Upload aborted."}
+
+@app.get("/api/upload/{upload_id}/preview")
+async def get_upload_preview(upload_id: str):
+    """Profile of the first rows of an upload, available before the upload finishes."""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id.")
+    cached_result = await redis_async.get(f"upload_preview:{upload_id}")
+    if cached_result:
+        return json.loads(cached_result)
+    return {"status": "PENDING", "message": "No preview yet."}
     
 @app.delete("/api/dataset/{dataset_name}")
 async def delete_dataset(dataset_name: str):
@@ -141,20 +455,17 @@ async def delete_dataset(dataset_name: str):
             raise HTTPException(status_code=400, detail="Invalid dataset name.")
 
         file_path = os.path.join(public_dir, dataset_name)
-        
-        # Expanded to also clear the new diagnostic cache
-        cache_keys_to_delete = [
-            f"statistics:{dataset_name}",
-            f"diagnostics:{dataset_name}"
-        ]
 
         if os.path.exists(file_path):
-            os.remove(file_path)
+            # Expanded to also clear the diagnostic and column type caches of the current version
+            cache_keys_to_delete = await run_in_threadpool(_profile_cache_keys, file_path)
+            await run_in_threadpool(os.remove, file_path)
+            # Delete multiple keys from Redis if they exist
+            await redis_async.delete(*cache_keys_to_delete)
         else:
             print(f"Info: Attempted to delete '{dataset_name}', but file was already gone.")
-
-        # Delete multiple keys from Redis if they exist
-        redis_cache.delete(*cache_keys_to_delete)
+        await run_in_threadpool(dataset_store.remove_dataset, file_path)
+        await run_in_threadpool(catalog.remove_dataset, dataset_name)
 
         return {"message": f"Successfully ensured dataset '{dataset_name}' is deleted."}
     except Exception as e:
@@ -163,71 +474,90 @@ async def delete_dataset(dataset_name: str):
 @app.get("/api/datasets")
 async def get_available_datasets():
     try:
-        csv_files = glob.glob(os.path.join(public_dir, "*.csv"))
-        datasets = []
-        for file_path in csv_files:
-            file_name = os.path.basename(file_path)
-            datasets.append({"name": file_name, "path": f"/{file_name}", "source": "server"})
-        return datasets
+        file_names = await run_in_threadpool(catalog.dataset_names)
+        return [{"name": file_name, "path": f"/{file_name}", "source": "server"} for file_name in file_names]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list datasets: {str(e)}")
 
+def _unprofiled_datasets(limit: int) -> list:
+    """(path, statistics cache key) of datasets the catalog holds no summary for at their current version."""
+    paths = [os.path.join(public_dir, name) for name in catalog.unprofiled_names(limit)]
+    return [(file_path, dataset_store.cache_key("statistics", file_path)) for file_path in paths if os.path.exists(file_path)]
+
 @app.get("/api/datasets/dashboard-summary")
-async def get_dashboard_summary():
+async def get_dashboard_summary(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    sort: str = Query("lastModified"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+):
+    """One page of profiled dataset summaries from the catalog; the total is in the X-Total-Count header."""
+    if sort not in catalog.SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{sort}'.")
     try:
-        disk_files = {os.path.basename(p) for p in glob.glob(os.path.join(public_dir, "*.csv"))}
-        cached_files = {k.split(':')[1] for k in redis_cache.keys("statistics:*")}
-        files_to_process = disk_files - cached_files
-        for filename in files_to_process:
-            generate_comprehensive_stats.delay(os.path.join(public_dir, filename))
-
-        files_to_remove = cached_files - disk_files
-        if files_to_remove:
-            keys_to_delete = [f"statistics:{fname}" for fname in files_to_remove]
-            redis_cache.delete(*keys_to_delete)
-
-        stat_keys = redis_cache.keys("statistics:*")
-        if not stat_keys: return []
-        
-        all_stats_raw = redis_cache.mget(stat_keys)
-        all_stats = [json.loads(s) for s in all_stats_raw if s]
-        
-        summaries = [{
-            "id": stats["filename"], "filename": stats["filename"], "size": stats["size"],
-            "rows": stats["rows"], "columns": stats["columns"], "status": stats["status"],
-            "qualityScore": stats["qualityScore"], "missing": stats["missing_pct"],
-            "duplicates": stats["duplicates_pct"], "inconsistencies": 0,
-            "lastModified": stats["lastModified"]
-        } for stats in all_stats]
+        # Datasets without a summary for their current version: take it from the cache if the profile is
+        # there (e.g. after a rollback), otherwise profile them (at most one job per version)
+        pending = await run_in_threadpool(_unprofiled_datasets, limit)
+        cached_stats = await redis_payloads_async.mget([stats_key for _, stats_key in pending]) if pending else []
+        for (file_path, _), stats_raw in zip(pending, cached_stats):
+            if stats_raw:
+                await run_in_threadpool(catalog.record_profile, file_path, decode_payload(stats_raw))
+            else:
+                await run_in_threadpool(dispatch_profile, file_path)
+
+        summaries, total = await run_in_threadpool(catalog.list_summaries, offset, limit, sort, order == "desc")
+        response.headers["X-Total-Count"] = str(total)
         return summaries
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve summaries: {str(e)}")
     
+async def _cached_payload_response(request: Request, cache_key: str) -> Optional[Response]:
+    """
+    Serves a pre-serialized cache entry without decoding it: the stored gzip bytes go out as they are
+    (inflated only for the rare client without gzip support), and a matching If-None-Match gets a 304
+    after reading just the stored ETag. Returns None on a cache miss.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        stored_etag = await redis_payloads_async.getrange(cache_key, 0, ETAG_LENGTH - 1)
+        if stored_etag and stored_etag.decode() in if_none_match:
+            return Response(status_code=304, headers={"ETag": f'W/"{stored_etag.decode()}"'})
+    raw = await redis_payloads_async.get(cache_key)
+    if raw is None:
+        return None
+    etag, body = split_payload(raw)
+    # Revalidate on every use: the browser keeps the body and only asks whether it is still current
+    headers = {"ETag": f'W/"{etag}"', "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/dataset/{dataset_name}/diagnostics")
-async def get_dataset_diagnostics(dataset_name: str):
-    cache_key = f"diagnostics:{dataset_name}"
-    cached_result = redis_cache.get(cache_key)
-    if cached_result:
-        return json.loads(cached_result)
+async def get_dataset_diagnostics(dataset_name: str, request: Request):
+    file_path = os.path.join(public_dir, dataset_name)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    cached_response = await _cached_payload_response(request, dataset_store.cache_key("diagnostics", file_path))
+    if cached_response:
+        return cached_response
     else:
-        file_path = os.path.join(public_dir, dataset_name)
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Dataset not found.")
-        # The task is already triggered on upload, so we just signal it's in progress
-        generate_diagnostic_report.delay(file_path)
+        # Usually already running since the upload; this attaches to that job instead of queueing another
+        await run_in_threadpool(dispatch_profile, file_path)
         raise HTTPException(status_code=202, detail="Diagnostic report generation is in progress.")
     
 @app.get("/api/dataset/{dataset_name}/statistics")
-async def get_dataset_statistics(dataset_name: str):
-    cache_key = f"statistics:{dataset_name}"
-    cached_result = redis_cache.get(cache_key)
-    if cached_result:
-        return json.loads(cached_result)
+async def get_dataset_statistics(dataset_name: str, request: Request):
+    file_path = os.path.join(public_dir, dataset_name)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    cached_response = await _cached_payload_response(request, dataset_store.cache_key("statistics", file_path))
+    if cached_response:
+        return cached_response
     else:
-        file_path = os.path.join(public_dir, dataset_name)
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Dataset not found.")
-        generate_comprehensive_stats.delay(file_path)
+        await run_in_threadpool(dispatch_profile, file_path)
         raise HTTPException(status_code=202, detail="Statistics generation is in progress.")
     
 @app.post("/api/dataset/{dataset_name}/refresh-statistics")
@@ -237,14 +567,105 @@ async def refresh_dataset_statistics(dataset_name: str):
         raise HTTPException(status_code=404, detail="Dataset not found.")
     
     # Refresh both statistics and diagnostics
-    redis_cache.delete(f"statistics:{dataset_name}")
-    redis_cache.delete(f"diagnostics:{dataset_name}")
-    generate_comprehensive_stats.delay(file_path)
-    generate_diagnostic_report.delay(file_path)
+    await redis_async.delete(dataset_store.cache_key("statistics", file_path), dataset_store.cache_key("diagnostics", file_path))
+    await run_in_threadpool(dispatch_profile, file_path)
     return {"message": "Statistics and diagnostics refresh initiated."}
 
 
 
+def _json_safe(table: pa.Table) -> pa.Table:
+    # NaN and infinity are not valid JSON; send them as null like any other missing value
+    columns = []
+    for column in table.columns:
+        if pa.types.is_floating(column.type):
+            column = pc.if_else(pc.is_finite(column), column, pa.scalar(None, column.type))
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=table.schema)
+
+@app.get("/api/dataset/{dataset_name}/rows")
+async def get_dataset_rows(
+    dataset_name: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_ROWS_PER_PAGE),
+    columns: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|arrow)$"),
+):
+    """
+    One window of rows, so the grid can load a dataset of any size lazily.
+    `columns` is a comma-separated subset; `format=arrow` returns an Arrow IPC stream instead of JSON.
+    """
+    file_path = os.path.join(public_dir, dataset_name)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    column_list = columns.split(",") if columns else None
+    try:
+        table, total_rows = await run_in_threadpool(dataset_store.read_rows, file_path, offset, limit, column_list)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return _rows_response(table, total_rows, offset, format)
+
+def _rows_response(table: pa.Table, total_rows: int, offset: int, format: str = "json"):
+    if format == "arrow":
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(
+            content=sink.getvalue().to_pybytes(), media_type="application/vnd.apache.arrow.stream",
+            headers={"X-Total-Rows": str(total_rows)}
+        )
+    return {
+        "offset": offset,
+        "total_rows": total_rows,
+        "columns": [{"name": field.name, "type": str(field.type)} for field in table.schema],
+        "rows": _json_safe(table).to_pylist(),
+    }
+
+@app.post("/api/dataset/{dataset_name}/query")
+async def query_dataset_rows(dataset_name: str, request: QueryRequest, format: str = Query("json", pattern="^(json|arrow)$")):
+    """
+    One window of a sorted, filtered and/or searched view over the whole dataset. Sort permutations and
+    value indexes are built on first use and cached per dataset version, so later pages and repeated
+    queries are answered without sorting or scanning again.
+    """
+    file_path = os.path.join(public_dir, dataset_name)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    if request.offset < 0 or not 1 <= request.limit <= MAX_ROWS_PER_PAGE:
+        raise HTTPException(status_code=422, detail=f"offset must be >= 0 and limit between 1 and {MAX_ROWS_PER_PAGE}.")
+    sort = [(key["colId"], key.get("sort", "asc")) for key in request.sort or []]
+    try:
+        table, total_rows = await run_in_threadpool(
+            dataset_query.run_query, file_path, request.offset, request.limit, request.columns,
+            sort, request.filters, request.search or None
+        )
+    except (KeyError, ValueError, pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _rows_response(table, total_rows, request.offset, format)
+
+@app.get("/api/dataset/{dataset_name}/versions")
+async def get_dataset_versions(dataset_name: str):
+    file_path = os.path.join(public_dir, dataset_name)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    return await run_in_threadpool(dataset_store.list_versions, file_path)
+
+@app.post("/api/dataset/{dataset_name}/rollback")
+async def rollback_dataset(dataset_name: str, request: RollbackRequest):
+    """
+    Points the dataset back at an earlier version. Versions share their column files, so this only
+    rewrites the manifest; statistics cached for that version are served again if still present.
+    """
+    file_path = os.path.join(public_dir, dataset_name)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    try:
+        manifest = await run_in_threadpool(dataset_store.rollback, file_path, request.version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    await run_in_threadpool(catalog.record_dataset, file_path)
+    return {"status": "SUCCESS", "version": manifest["version"], "rows": manifest["rows"], "columns": len(manifest["columns"])}
+
 @app.post("/api/submit_task")
 async def submit_task(request: TaskRequest):
     task = worker.send_task(
@@ -253,8 +674,7 @@ async def submit_task(request: TaskRequest):
     )
     return {"job_id": task.id, "status": "Job accepted."}
 
-@app.get("/api/analyze/status/{job_id}")
-async def get_analysis_status(job_id: str):
+def _job_status(job_id: str) -> dict:
     task_result = AsyncResult(job_id, app=worker)
     if task_result.ready():
         if task_result.successful():
@@ -264,27 +684,95 @@ async def get_analysis_status(job_id: str):
     else:
         return {"status": "PENDING"}
 
+@app.get("/api/analyze/status/{job_id}")
+async def get_analysis_status(job_id: str):
+    return await run_in_threadpool(_job_status, job_id)
+
+def _sse(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/api/events")
+async def stream_events(request: Request, job_id: Optional[str] = None, dataset: Optional[str] = None):
+    """
+    Server-sent events for a job and/or a dataset, pushed from the workers through Redis pub/sub:
+    `progress` as tasks report it, `job` with the same payload as /api/analyze/status once the job
+    finishes, and `profile` when the dataset's statistics and diagnostics are cached.
+    A job-only stream ends after its `job` event.
+    """
+    if not job_id and not dataset:
+        raise HTTPException(status_code=400, detail="Follow a job_id, a dataset, or both.")
+    channels = [job_channel(job_id)] if job_id else []
+    file_path = None
+    if dataset:
+        dataset = os.path.basename(dataset)
+        file_path = os.path.join(public_dir, dataset)
+        channels.append(dataset_channel(dataset))
+
+    async def events():
+        pubsub = redis_events.pubsub()
+        # Subscribe before reading the current state, so nothing that happens in between is missed
+        await pubsub.subscribe(*channels)
+        try:
+            job_pending = bool(job_id)
+            if job_id:
+                status = await run_in_threadpool(_job_status, job_id)
+                if status.get("status") != "PENDING":
+                    job_pending = False
+                    yield _sse("job", status)
+            if file_path and os.path.exists(file_path) and await redis_async.exists(dataset_store.cache_key("statistics", file_path)):
+                yield _sse("profile", {"type": "profile_ready"})
+            if job_id and not job_pending and not dataset:
+                return
+
+            idle = 0.0
+            while not await request.is_disconnected():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    idle += 1.0
+                    if idle < EVENT_KEEPALIVE_SECONDS:
+                        continue
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+                    if not job_pending:
+                        continue
+                    status = await run_in_threadpool(_job_status, job_id)
+                    if status.get("status") == "PENDING":
+                        continue
+                    event = {"type": "finished"}
+                else:
+                    event = json.loads(message["data"])
+                    if event["type"] == "finished":
+                        status = await run_in_threadpool(_job_status, job_id)
+
+                if event["type"] == "finished":
+                    job_pending = False
+                    yield _sse("job", status)
+                    if not dataset:
+                        return
+                elif event["type"] == "profile_ready":
+                    yield _sse("profile", event)
+                else:
+                    yield _sse("progress", event)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/api/statistics/{dataset_name}")
 async def start_statistics_generation(dataset_name: str):
     try:
         file_path = os.path.join(public_dir, dataset_name)
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="Dataset not found.")
-        task = generate_comprehensive_stats.delay(file_path)
-        return {"job_id": task.id, "status": "Statistics generation job started."}
+        return {"job_id": await run_in_threadpool(dispatch_profile, file_path), "status": "Statistics generation job started."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/statistics/status/{job_id}")
 async def get_statistics_status(job_id: str):
-    task_result = AsyncResult(job_id, app=worker)
-    if task_result.ready():
-        if task_result.successful():
-            return task_result.get()
-        else:
-            return {"status": "FAILURE", "error": str(task_result.info)}
-    else:
-        return {"status": "PENDING"}
+    return await run_in_threadpool(_job_status, job_id)
     
 @app.post("/api/dataset/clean")
 async def clean_dataset(request: CleanRequest):
@@ -302,4 +790,19 @@ async def clean_dataset(request: CleanRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/{dataset_stem}.csv")
+async def download_dataset(dataset_stem: str):
+    """
+    Serves a dataset as CSV. Edits only touch the columnar sidecar, so the CSV is
+    re-exported here on demand before falling through to the file itself.
+    """
+    dataset_name = f"{dataset_stem}.csv"
+    if ".." in dataset_name or "/" in dataset_name:
+        raise HTTPException(status_code=400, detail="Invalid dataset name.")
+    file_path = os.path.join(public_dir, dataset_name)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    await run_in_threadpool(dataset_store.materialize_csv, file_path)
+    return FileResponse(file_path, media_type="text/csv", filename=dataset_name)
+
 app.mount("/", StaticFiles(directory=public_dir, html=True), name="public")
\ No newline at end of file
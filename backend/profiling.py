@@ -0,0 +1,367 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_type_detector import detect_data_types, types_from_sample, _spread_positions
+from sketches import MomentSketch, QuantileSketch, DistinctCounter, TopKSketch
+from duplicates import count_duplicates, DuplicateCounter
+
+# Rows in the sample `detect_data_types` types a dataset from.
+TYPE_SAMPLE_SIZE = 1000
+
+# Wide datasets are profiled on a thread pool. Threads read the loaded frame in place (no copies or pickling),
+# the per-column pandas/NumPy kernels release the GIL, and Celery's prefork workers cannot start child
+# processes anyway. Narrow frames stay serial; the pool would cost more than it saves.
+PROFILE_WORKERS = int(os.getenv("DATACRAFT_PROFILE_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_COLUMNS = 16
+
+
+def map_columns(func, columns: list, progress=None):
+    """
+    Yields `func(column)` for each column, in column order, spreading the calls over `PROFILE_WORKERS` threads.
+    `progress(done, total)` is called from the calling thread as results come in.
+    """
+    columns = list(columns)
+    total = len(columns)
+    if PROFILE_WORKERS <= 1 or total < PARALLEL_MIN_COLUMNS:
+        results = map(func, columns)
+        executor = None
+    else:
+        executor = ThreadPoolExecutor(max_workers=min(PROFILE_WORKERS, total), thread_name_prefix="profile")
+        results = executor.map(func, columns)
+    try:
+        for done, result in enumerate(results, 1):
+            if progress:
+                progress(done, total)
+            yield result
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def _profile_column(series: pd.Series, rows: int, data_type: str) -> tuple:
+    """
+    Computes every per-column metric shown in the statistics sidebar and the diagnostic report,
+    sharing the null mask, the non-null values and the distinct count between both.
+    """
+    null_mask = series.isnull()
+    null_count = int(null_mask.sum())
+    clean_series = series[~null_mask]
+    unique_count = int(clean_series.nunique())
+
+    # --- Statistics entry (semantic type) ---
+    stat = {
+        "column": series.name, "dataType": data_type, "nullCount": null_count,
+        "nullPercentage": (null_count / rows) * 100 if rows > 0 else 0,
+        "uniqueValues": unique_count, "totalValues": len(clean_series),
+        "mean": "N/A", "median": "N/A", "mode": "N/A"
+    }
+    if data_type in ['integer', 'float'] and not clean_series.empty:
+        stat["mean"] = round(clean_series.mean(), 2)
+        stat["median"] = round(clean_series.median(), 2)
+        modes = clean_series.mode()
+        if not modes.empty:
+            stat["mode"] = ", ".join(modes.astype(str).tolist())
+
+    # --- Diagnostics entry (storage type) ---
+    if pd.api.types.is_numeric_dtype(series):
+        storage_type = "float" if pd.api.types.is_float_dtype(series) else "integer"
+    else:
+        storage_type = "categorical"
+
+    col_diag = {
+        "column_name": series.name,
+        "data_type": storage_type,
+        "missing_count": null_count,
+        "missing_percentage": round(null_count / rows * 100, 2) if rows > 0 else 0,
+        "constant_flag": unique_count == 1
+    }
+    # Numeric columns: only add allowed numeric metrics if at least 3 unique values
+    if storage_type in ["integer", "float"] and unique_count > 2:
+        col_diag["skewness"] = round(float(clean_series.skew()), 2)
+        col_diag["kurtosis"] = round(float(clean_series.kurtosis()), 2)
+    # Categorical columns: only add allowed categorical metrics if non-empty
+    if storage_type == "categorical" and len(clean_series) > 0:
+        col_diag["unique_count"] = unique_count
+        col_diag["unique_ratio"] = round(unique_count / len(clean_series), 4)
+
+    return stat, col_diag
+
+
+def profile_dataset(df: pd.DataFrame, file_name: str, last_modified: str, size: str, column_types: dict = None,
+                    progress=None, duplicate_rows: int = None) -> tuple:
+    """
+    Single-pass profile of a loaded dataset.
+    Returns the `statistics:` payload and the `diagnostics:` payload built from the same scan.
+    `column_types` holds already known semantic types; the rest are inferred in one batch.
+    `progress(done, total)` is called after each column. `duplicate_rows` is counted from `df` unless given.
+    """
+    rows = len(df)
+    if duplicate_rows is None:
+        duplicate_rows = count_duplicates(df)
+    column_types = dict(column_types or {})
+    unknown = [header for header in df.columns if column_types.get(header) is None]
+    if unknown:
+        column_types.update(detect_data_types(df[unknown]))
+
+    column_stats = []
+    column_diagnostics = []
+    profile_column = lambda header: _profile_column(df[header], rows, column_types[header])
+    for stat, col_diag in map_columns(profile_column, df.columns, progress):
+        column_stats.append(stat)
+        column_diagnostics.append(col_diag)
+
+    return _assemble_payloads(column_stats, column_diagnostics, rows, duplicate_rows, file_name, last_modified, size)
+
+
+def update_profile(statistics: dict, diagnostics: dict, df: pd.DataFrame, column_order: list, file_name: str,
+                   last_modified: str, size: str, column_types: dict = None, duplicate_rows: int = None) -> tuple:
+    """
+    Patches cached payloads after a column-level edit instead of re-profiling the whole dataset.
+    `df` holds only the columns that were added or changed; they are profiled again, columns missing from
+    `column_order` are dropped, every other entry is reused as is and the dataset totals are rebuilt.
+    `duplicate_rows` is the recounted duplicate total, or None when the edit cannot change it.
+    """
+    rows = statistics["rows"]
+    if len(df.columns) and len(df) != rows:
+        raise ValueError("Row count changed; the dataset needs a full profile.")
+    column_stats = {stat["column"]: stat for stat in statistics["columnStats"]}
+    column_diagnostics = {col_diag["column_name"]: col_diag for col_diag in diagnostics["column_diagnostics"]}
+
+    column_types = dict(column_types or {})
+    unknown = [header for header in df.columns if column_types.get(header) is None]
+    if unknown:
+        column_types.update(detect_data_types(df[unknown]))
+    profile_column = lambda header: _profile_column(df[header], rows, column_types[header])
+    for header, (stat, col_diag) in zip(df.columns, map_columns(profile_column, df.columns)):
+        column_stats[header], column_diagnostics[header] = stat, col_diag
+
+    if duplicate_rows is None:
+        duplicate_rows = diagnostics["dataset_summary"]["duplicate_row_count"]
+    return _assemble_payloads(
+        [column_stats[header] for header in column_order], [column_diagnostics[header] for header in column_order],
+        rows, duplicate_rows, file_name, last_modified, size
+    )
+
+
+class _TypeSample:
+    """
+    The sample `detect_data_types` classifies, gathered across chunks. With the row count known up front it
+    holds exactly the evenly spread rows the in-memory path takes, so both paths settle on the same types;
+    otherwise it is a uniform sample of rows (those with the smallest random keys). Each column also keeps a
+    uniform sample of its own non-null values, for columns too sparse to show up in the row sample.
+    """
+    def __init__(self, total_rows: int = None, size: int = TYPE_SAMPLE_SIZE):
+        self.size = size
+        self.positions = _spread_positions(total_rows, size) if total_rows else None
+        self.rng = np.random.default_rng(0)
+        self.rows = 0
+        self.pieces = []
+        self.keys = np.empty(0)
+        self.sample = None
+        self.column_values = {}
+
+    def _smallest(self, keys: np.ndarray) -> np.ndarray:
+        return np.argpartition(keys, self.size)[:self.size] if len(keys) > self.size else np.arange(len(keys))
+
+    def _at(self, data, positions: np.ndarray):
+        """Rows of a chunk, labelled by their position in the whole dataset."""
+        picked = data.iloc[positions]
+        picked.index = positions + self.rows
+        return picked
+
+    def update(self, chunk: pd.DataFrame):
+        keys = self.rng.random(len(chunk))
+        if self.positions is not None:
+            lo, hi = np.searchsorted(self.positions, [self.rows, self.rows + len(chunk)])
+            self.pieces.append(chunk.iloc[self.positions[lo:hi] - self.rows])
+        else:
+            # Only rows whose key beats the current sample's largest can enter it
+            threshold = self.keys.max() if len(self.keys) >= self.size else np.inf
+            candidates = np.flatnonzero(keys < threshold)
+            rows = self._at(chunk, candidates)
+            rows = pd.concat([self.sample, rows]) if self.sample is not None else rows
+            all_keys = np.concatenate([self.keys, keys[candidates]])
+            keep = self._smallest(all_keys)
+            self.sample, self.keys = rows.iloc[keep], all_keys[keep]
+        for col in chunk.columns:
+            values = chunk[col]
+            present = values.notna().to_numpy()
+            old_keys, old_values = self.column_values.get(col, (np.empty(0), None))
+            threshold = old_keys.max() if len(old_keys) >= self.size else np.inf
+            candidates = np.flatnonzero(present & (keys < threshold))
+            if not len(candidates):
+                continue
+            new_values = self._at(values, candidates)
+            merged = pd.concat([old_values, new_values]) if old_values is not None else new_values
+            merged_keys = np.concatenate([old_keys, keys[candidates]])
+            keep = self._smallest(merged_keys)
+            self.column_values[col] = (merged_keys[keep], merged.iloc[keep])
+        self.rows += len(chunk)
+
+    def types(self, columns: list, non_null_counts: dict, unique_counts) -> dict:
+        """`detect_data_types` for `columns`, from the sample; `unique_counts(cols)` maps them to distinct counts."""
+        if self.positions is not None:
+            sample = pd.concat(self.pieces) if self.pieces else pd.DataFrame(columns=columns)
+        else:
+            # Back into file order, as the in-memory sample is
+            sample = self.sample.iloc[np.argsort(self.sample.index.to_numpy(), kind="stable")]
+        sample = sample[columns].reset_index(drop=True)
+
+        def column_sample(col):
+            values = self.column_values[col][1]
+            return values.iloc[np.argsort(values.index.to_numpy(), kind="stable")].reset_index(drop=True)
+
+        return types_from_sample(sample, non_null_counts, column_sample, unique_counts)
+
+
+class _ColumnAccumulator:
+    """Per-column state for the streaming profile; every field is mergeable across chunks."""
+    def __init__(self, name):
+        self.name = name
+        self.null_count = 0
+        self.non_null_count = 0
+        self.is_numeric = True
+        self.is_float = False
+        self.moments = MomentSketch()
+        self.quantiles = QuantileSketch()
+        self.distinct = DistinctCounter()
+        self.top_values = TopKSketch()
+
+    def update(self, series: pd.Series):
+        null_mask = series.isnull()
+        clean_series = series[~null_mask]
+        self.null_count += int(null_mask.sum())
+        self.non_null_count += len(clean_series)
+
+        if pd.api.types.is_numeric_dtype(series):
+            self.is_float = self.is_float or pd.api.types.is_float_dtype(series)
+        else:
+            self.is_numeric = False
+
+        values = clean_series.to_numpy()
+        self.distinct.update(values)
+        if self.is_numeric and len(values):
+            self.moments.update(values)
+            self.quantiles.update(values)
+            self.top_values.update(values)
+
+    def finalize(self, rows: int, data_type: str) -> tuple:
+        unique_count = self.distinct.count()
+        stat = {
+            "column": self.name, "dataType": data_type, "nullCount": self.null_count,
+            "nullPercentage": (self.null_count / rows) * 100 if rows > 0 else 0,
+            "uniqueValues": unique_count, "totalValues": self.non_null_count,
+            "mean": "N/A", "median": "N/A", "mode": "N/A"
+        }
+        if data_type in ['integer', 'float'] and self.is_numeric and self.non_null_count:
+            stat["mean"] = round(self.moments.mean, 2)
+            stat["median"] = round(self.quantiles.quantile(0.5), 2)
+            modes = self.top_values.modes()
+            if modes:
+                stat["mode"] = ", ".join(str(m) for m in modes)
+
+        storage_type = ("float" if self.is_float else "integer") if self.is_numeric else "categorical"
+        col_diag = {
+            "column_name": self.name,
+            "data_type": storage_type,
+            "missing_count": self.null_count,
+            "missing_percentage": round(self.null_count / rows * 100, 2) if rows > 0 else 0,
+            "constant_flag": unique_count == 1
+        }
+        if storage_type in ["integer", "float"] and unique_count > 2:
+            col_diag["skewness"] = round(float(self.moments.skewness()), 2)
+            col_diag["kurtosis"] = round(float(self.moments.kurtosis()), 2)
+        if storage_type == "categorical" and self.non_null_count > 0:
+            col_diag["unique_count"] = unique_count
+            col_diag["unique_ratio"] = round(unique_count / self.non_null_count, 4)
+        return stat, col_diag
+
+
+def profile_dataset_streaming(chunks, file_name: str, last_modified: str, size: str, column_types: dict = None,
+                              progress=None, total_rows: int = None) -> tuple:
+    """
+    Out-of-core variant of `profile_dataset` for files larger than worker memory.
+    Consumes an iterable of DataFrame chunks and keeps only bounded-size sketches per column:
+    exact null counts, Welford moments (mean, skewness, kurtosis), a KLL quantile sketch (median),
+    exact-then-HyperLogLog distinct counts and a Misra-Gries summary (mode).
+    Duplicate rows are counted from 64-bit row fingerprints that spill to disk past a memory budget.
+    Column types come from the same spread sample `detect_data_types` takes, which needs `total_rows`;
+    without it a uniform sample of the rows is used instead.
+    `progress(rows)` is called after each chunk with the number of rows consumed so far.
+    """
+    accumulators = None
+    type_sample = _TypeSample(total_rows)
+    with DuplicateCounter() as duplicate_counter:
+        for chunk in chunks:
+            if accumulators is None:
+                accumulators = [_ColumnAccumulator(header) for header in chunk.columns]
+            for accumulator, header in zip(accumulators, chunk.columns):
+                accumulator.update(chunk[header])
+            type_sample.update(chunk)
+            duplicate_counter.add(chunk)
+            if progress:
+                progress(duplicate_counter.rows)
+        rows = duplicate_counter.rows
+        duplicate_rows = duplicate_counter.count() if rows else 0
+
+    if not rows:
+        return None, None
+
+    types = dict(column_types or {})
+    untyped = [accumulator.name for accumulator in accumulators if types.get(accumulator.name) is None]
+    if untyped:
+        by_name = {accumulator.name: accumulator for accumulator in accumulators}
+        types.update(type_sample.types(
+            untyped, {name: by_name[name].non_null_count for name in untyped},
+            lambda cols: {name: by_name[name].distinct.count() for name in cols},
+        ))
+
+    column_stats = []
+    column_diagnostics = []
+    for accumulator in accumulators:
+        stat, col_diag = accumulator.finalize(rows, types[accumulator.name])
+        column_stats.append(stat)
+        column_diagnostics.append(col_diag)
+
+    return _assemble_payloads(column_stats, column_diagnostics, rows, duplicate_rows, file_name, last_modified, size)
+
+
+def _assemble_payloads(column_stats: list, column_diagnostics: list, rows: int, duplicate_rows: int,
+                       file_name: str, last_modified: str, size: str) -> tuple:
+    columns = len(column_stats)
+    missing_cells = sum(stat["nullCount"] for stat in column_stats)
+    total_cells = rows * columns if rows > 0 else 1
+    missing_pct = (missing_cells / total_cells) * 100
+    duplicate_pct = (duplicate_rows / rows) * 100 if rows > 0 else 0
+    quality_score = max(0, 100 - missing_pct - duplicate_pct)
+    status = "RAW"
+    if quality_score > 90: status = "CLEANED"
+    elif quality_score > 60: status = "CLEANING"
+
+    numeric_column_count = sum(1 for stat in column_stats if stat["dataType"] in ['integer', 'float', 'identifier'])
+
+    statistics = {
+        "filename": file_name,
+        "lastModified": last_modified,
+        "size": size,
+        "rows": rows, "columns": columns, "totalCells": total_cells,
+        "status": status, "qualityScore": round(quality_score),
+        "missing_pct": round(missing_pct), "duplicates_pct": round(duplicate_pct),
+        "overallNullCount": int(missing_cells),
+        "columnStats": column_stats,
+        "numericColumnCount": numeric_column_count,
+        "textColumnCount": columns - numeric_column_count
+    }
+    diagnostics = {
+        "filename": file_name,
+        "dataset_summary": {
+            "row_count": rows,
+            "column_count": columns,
+            "duplicate_row_count": duplicate_rows,
+        },
+        "column_diagnostics": column_diagnostics,
+    }
+    return statistics, diagnostics
@@ -0,0 +1,142 @@
+import glob
+import hashlib
+import json
+import os
+import uuid
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+import dataset_store
+from cache import redis_cache, CACHE_TTL_SECONDS
+
+# Memo layer for impact simulations, so iterating on plans for the same dataset, target and goal only pays
+# for the plans that changed. Everything is keyed by (dataset version, target, goal, model config):
+#   scores        Redis, one entry per plan content (the baseline is the empty plan)
+#   split         the train/test split of the raw rows, by row label, in the version's index directory;
+#                 plans keep the rows they did not drop on the same side, so baseline and plans are paired
+#   preprocessing fitted per-column imputers, scalers and encoders, keyed by the training values they saw,
+#                 so columns a plan left untouched are never refitted
+# The files of all versions of a dataset share a size budget, enforced once per simulation by `evict`: past it,
+# the least recently used ones are removed.
+
+MEMO_MAX_BYTES = int(os.getenv("DATACRAFT_SIMULATION_MEMO_MB", 256)) * 1024 * 1024
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _memo_dir(file_path: str) -> str:
+    path = os.path.join(dataset_store.index_dir(file_path), "simulation")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _plan_content(plan: dict) -> dict:
+    """The parts of a plan that change its score; names, rationale and past results do not."""
+    return {"python_code": plan.get("python_code") or None, "steps": plan.get("steps") or []}
+
+
+def _score_key(file_path: str, target: str, goal: str, model_config: dict, plan: dict) -> str:
+    return dataset_store.cache_key(f"simulation:{_digest(target, goal, model_config, _plan_content(plan))}", file_path)
+
+
+def cached_scores(file_path: str, target: str, goal: str, model_config: dict, plans: dict) -> dict:
+    """Memoized {"score", "error"} results of the given plans (key -> plan), for the ones that have one."""
+    keys = list(plans)
+    if not keys:
+        return {}
+    raw = redis_cache.mget([_score_key(file_path, target, goal, model_config, plans[key]) for key in keys])
+    return {key: json.loads(value) for key, value in zip(keys, raw) if value is not None}
+
+
+def store_score(file_path: str, target: str, goal: str, model_config: dict, plan: dict, result: dict):
+    # -inf marks a failed plan; JSON has no infinity, and failures are not worth remembering anyway
+    if result["error"] or not np.isfinite(result["score"]):
+        return
+    redis_cache.set(_score_key(file_path, target, goal, model_config, plan),
+                    json.dumps({"score": float(result["score"]), "error": None}), ex=CACHE_TTL_SECONDS)
+
+
+def evict(file_path: str):
+    """
+    Removes the least recently used memo files of every version of the dataset until they fit the budget.
+    It lists every memo file, so it runs once per simulation rather than after each write.
+    """
+    pattern = os.path.join(os.path.dirname(dataset_store.index_dir(file_path)), "*", "simulation", "*")
+    files = []
+    for path in glob.glob(pattern):
+        if path.endswith(".tmp"):
+            continue  # Still being written by another evaluator
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # Evicted by a concurrent evaluator
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= MEMO_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def _reused(path: str):
+    # The modification time doubles as the last use, so eviction spares memos that keep being hit
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def _save_atomically(path: str, save):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_arrays(tmp_path: str, **arrays):
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def split_labels(file_path: str, target: str, goal: str, model_config: dict, y_raw: pd.Series) -> tuple:
+    """
+    (train labels, test labels) of the raw rows with a target, in the order `train_test_split` returns them,
+    computed once per dataset version.
+    """
+    path = os.path.join(_memo_dir(file_path), f"split-{_digest(target, goal, model_config)}.npz")
+    try:
+        with np.load(path) as split:
+            train, test = split["train"], split["test"]
+        _reused(path)
+        return train, test
+    except FileNotFoundError:
+        pass  # Not computed yet, or evicted; the split is deterministic, so recomputing gives the same one
+    train, test = train_test_split(
+        np.asarray(y_raw.index), test_size=model_config["test_size"], random_state=model_config["random_state"]
+    )
+    _save_atomically(path, lambda tmp_path: _save_arrays(tmp_path, train=train, test=test))
+    return train, test
+
+
+def fitted_column(file_path: str, column: pd.Series, kind: str, fit):
+    """`fit(column)` for a training column, reused from an earlier fit on exactly the same values."""
+    values_digest = hashlib.sha1(pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes()).hexdigest()
+    path = os.path.join(_memo_dir(file_path), f"prep-{_digest(kind, str(column.name), str(column.dtype), values_digest)}.joblib")
+    if os.path.exists(path):
+        try:
+            fitted = joblib.load(path)
+            _reused(path)
+            return fitted
+        except Exception as e:
+            print(f"Warning: discarding unreadable preprocessing memo {path}: {e}")
+    fitted = fit(column)
+    _save_atomically(path, lambda tmp_path: joblib.dump(fitted, tmp_path))
+    return fitted
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+# Mergeable, bounded-memory accumulators used to profile datasets chunk by chunk.
+# Each sketch supports `update(values)` with a NumPy array of non-null values and `merge(other)`.
+
+
+class MomentSketch:
+    """
+    Streaming count, mean and central moments (Welford, generalised by Pebay for M3/M4).
+    Chunks are reduced with NumPy and folded in with the pairwise merge formulas, so the result
+    matches a single pass over all values up to floating point error.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        chunk = MomentSketch()
+        chunk.n = values.size
+        chunk.mean = float(values.mean())
+        deviations = values - chunk.mean
+        squared = deviations * deviations
+        chunk.m2 = float(squared.sum())
+        chunk.m3 = float((squared * deviations).sum())
+        chunk.m4 = float((squared * squared).sum())
+        self.merge(chunk)
+
+    def merge(self, other: "MomentSketch"):
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2, self.m3, self.m4 = other.n, other.mean, other.m2, other.m3, other.m4
+            return
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        delta2 = delta * delta
+        m2 = self.m2 + other.m2 + delta2 * na * nb / n
+        m3 = (self.m3 + other.m3
+              + delta * delta2 * na * nb * (na - nb) / (n * n)
+              + 3.0 * delta * (na * other.m2 - nb * self.m2) / n)
+        m4 = (self.m4 + other.m4
+              + delta2 * delta2 * na * nb * (na * na - na * nb + nb * nb) / (n ** 3)
+              + 6.0 * delta2 * (na * na * other.m2 + nb * nb * self.m2) / (n * n)
+              + 4.0 * delta * (na * other.m3 - nb * self.m3) / n)
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, self.mean + delta * nb / n, m2, m3, m4
+
+    def skewness(self) -> float:
+        """Sample skewness with the same bias adjustment as `pd.Series.skew`."""
+        n = self.n
+        if n < 3:
+            return float('nan')
+        if self.m2 == 0:
+            return 0.0
+        return (n * (n - 1) ** 0.5 / (n - 2)) * (self.m3 / self.m2 ** 1.5)
+
+    def kurtosis(self) -> float:
+        """Excess kurtosis with the same bias adjustment as `pd.Series.kurtosis`."""
+        n = self.n
+        if n < 4:
+            return float('nan')
+        if self.m2 == 0:
+            return 0.0
+        adjustment = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        numerator = n * (n + 1) * (n - 1) * self.m4
+        denominator = (n - 2) * (n - 3) * self.m2 ** 2
+        return numerator / denominator - adjustment
+
+
+class QuantileSketch:
+    """
+    KLL-style compactor sketch. Level `i` holds items of weight 2**i; whenever a level exceeds
+    `k` items it is sorted and every other item is promoted to the next level.
+    Rank error is roughly log2(n / k) / k, i.e. well under 1% for the defaults.
+    """
+    def __init__(self, k: int = 2048, seed: int = 0):
+        self.k = k
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # An odd item out stays at this level so no weight is lost.
+                leftover = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(leftover)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = leftover
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q: float) -> float:
+        values = np.concatenate(self.levels)
+        if values.size == 0:
+            return float('nan')
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(values[order][min(position, len(values) - 1)])
+
+
+def hash_values(values: np.ndarray) -> np.ndarray:
+    """
+    64-bit hashes of column values. Numbers are hashed as float64 so 3 and 3.0 collide across chunks, and
+    -0.0 is folded into 0.0 since pandas counts them as one value.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'biuf':
+        values = values.astype(np.float64) + 0.0
+    return pd.util.hash_array(values)
+
+
+class DistinctCounter:
+    """
+    Counts distinct values exactly while the set of hashes is small, then switches to HyperLogLog
+    with 2**precision registers (about 0.8% standard error at the default precision of 14).
+    """
+    def __init__(self, precision: int = 14, exact_limit: int = 1 << 16):
+        self.precision = precision
+        self.exact_limit = exact_limit
+        self._exact = np.empty(0, dtype=np.uint64)
+        self._registers = None
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        self.update_hashes(hash_values(values))
+
+    def update_hashes(self, hashes: np.ndarray):
+        if self._registers is None:
+            self._exact = np.union1d(self._exact, hashes)
+            if len(self._exact) <= self.exact_limit:
+                return
+            hashes, self._exact = self._exact, np.empty(0, dtype=np.uint64)
+            self._registers = np.zeros(1 << self.precision, dtype=np.uint8)
+        self._add_to_registers(hashes)
+
+    def _add_to_registers(self, hashes: np.ndarray):
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        # Rank = position of the lowest set bit of the remaining 64-p bits; a sentinel bit bounds it.
+        remainder = (hashes & np.uint64((1 << (64 - self.precision)) - 1)) | np.uint64(1 << (64 - self.precision))
+        lowest_bit = remainder & (~remainder + np.uint64(1))
+        rank = (np.log2(lowest_bit.astype(np.float64)) + 1).astype(np.uint8)
+        np.maximum.at(self._registers, index, rank)
+
+    def merge(self, other: "DistinctCounter"):
+        if other._registers is None:
+            self.update_hashes(other._exact)
+            return
+        if self._registers is None:
+            exact, self._exact = self._exact, np.empty(0, dtype=np.uint64)
+            self._registers = other._registers.copy()
+            if len(exact):
+                self._add_to_registers(exact)
+            return
+        np.maximum(self._registers, other._registers, out=self._registers)
+
+    def count(self) -> int:
+        if self._registers is None:
+            return int(len(self._exact))
+        m = float(len(self._registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self._registers.astype(np.float64)))
+        empty_registers = int(np.count_nonzero(self._registers == 0))
+        if estimate <= 2.5 * m and empty_registers:
+            # Linear counting is more accurate in the small range.
+            estimate = m * np.log(m / empty_registers)
+        return int(round(estimate))
+
+
+class TopKSketch:
+    """
+    Misra-Gries frequent items summary holding at most `capacity` counters.
+    Exact whenever the column has no more than `capacity` distinct values.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        self._absorb(pd.Series(values).value_counts(sort=False))
+
+    def merge(self, other: "TopKSketch"):
+        self._absorb(other.counts)
+
+    def _absorb(self, counts: pd.Series):
+        merged = self.counts.add(counts, fill_value=0) if len(self.counts) else counts
+        if len(merged) > self.capacity:
+            threshold = merged.nlargest(self.capacity + 1).iloc[-1]
+            merged = merged - threshold
+            merged = merged[merged > 0]
+        self.counts = merged.astype(np.int64)
+
+    def modes(self) -> list:
+        """All values tied for the highest count, in ascending order like `pd.Series.mode`."""
+        if self.counts.empty:
+            return []
+        top = self.counts[self.counts == self.counts.max()].index
+        return sorted(top.tolist())
@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import dataset_store
+
+# Temporal profile of a dataset version, kept in its index directory like the other derived indexes:
+#   index.json   the time column, or null when the dataset has none, so detection runs once per version
+#   order.npy    row ids in time order (rows whose timestamp does not parse are left out)
+#   times.npy    the parsed timestamps in that order, as int64 nanoseconds
+#   profile.json the time column, spacing statistics of the index, and per column: ACF and PACF up to
+#                TEMPORAL_MAX_LAG (numeric columns) and runs of missing values in time order (every column)
+# The time column is found by type: a timestamp/date column, or a text column whose values parse as dates.
+# The time index (the first three) is built on its own, for consumers such as chronological grid sorts;
+# the profile is computed from it on first use.
+TEMPORAL_MAX_LAG = 10
+TIME_SAMPLE_SIZE = 200
+TIME_PARSE_RATIO = 0.9
+TEMPORAL_BLOCK_BYTES = 256 * 1024 * 1024
+TEMPORAL_CACHE_SIZE = 4
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _parse_times(values: pd.Series) -> pd.Series:
+    """
+    Text to timestamps (NaT where unparseable); time zones are normalised to naive UTC.
+    One format inferred for the whole column is fast; element-wise parsing is the fallback for mixed formats.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        parsed = pd.to_datetime(values, errors="coerce", utc=True)
+        if parsed.notna().sum() < TIME_PARSE_RATIO * values.notna().sum():
+            parsed = pd.to_datetime(values, errors="coerce", utc=True, format="mixed")
+    return parsed.dt.tz_localize(None)
+
+
+def detect_time_column(csv_path: str):
+    """
+    The dataset's time column, or None. Native timestamp and date columns win; otherwise the first text
+    column whose spread sample mostly parses as dates, preferring names that mention time or date.
+    """
+    schema = dataset_store.dataset_schema(csv_path)
+    native = [field.name for field in schema if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type)]
+    if native:
+        return native[0]
+
+    text_columns = [field.name for field in schema if pa.types.is_string(field.type) or pa.types.is_large_string(field.type)]
+    text_columns.sort(key=lambda name: not ('time' in name.lower() or 'date' in name.lower()))
+    for name in text_columns:
+        values = dataset_store.read_table(csv_path, [name]).column(0).drop_null()
+        if len(values) == 0:
+            continue
+        positions = np.unique(np.linspace(0, len(values) - 1, num=min(len(values), TIME_SAMPLE_SIZE)).astype(np.int64))
+        sample = values.take(positions).to_pandas()
+        # Plain numbers parse as epoch offsets; they are measurements, not times
+        if pd.to_numeric(sample, errors="coerce").notna().mean() > 0.5:
+            continue
+        if _parse_times(sample).notna().mean() >= TIME_PARSE_RATIO:
+            return name
+    return None
+
+
+def _time_index(csv_path: str, time_column: str) -> tuple:
+    """(row ids in time order, their timestamps as int64 ns); a stable sort keeps ties in file order."""
+    values = dataset_store.read_table(csv_path, [time_column]).column(0)
+    if pa.types.is_timestamp(values.type) or pa.types.is_date(values.type):
+        times = pd.Series(pc.cast(values, pa.timestamp("ns")).to_numpy(zero_copy_only=False))
+    else:
+        times = _parse_times(values.to_pandas())
+    nanoseconds = times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    valid = np.flatnonzero(~times.isna().to_numpy())
+    order = valid[np.argsort(nanoseconds[valid], kind="stable")]
+    return order.astype(np.int64), nanoseconds[order]
+
+
+def _spacing(times: np.ndarray) -> dict:
+    """How regularly the time index is spaced."""
+    if len(times) < 2:
+        return {"rows": int(len(times))}
+    intervals = np.diff(times)
+    positive = intervals[intervals > 0]
+    median = float(np.median(positive)) if len(positive) else 0.0
+    return {
+        "rows": int(len(times)),
+        "start": str(np.datetime64(int(times[0]), "ns")),
+        "end": str(np.datetime64(int(times[-1]), "ns")),
+        "median_interval_seconds": median / 1e9,
+        "max_interval_seconds": float(intervals.max()) / 1e9,
+        "duplicate_timestamps": int((intervals == 0).sum()),
+        # Intervals more than 1.5x the usual spacing: holes in the time index itself
+        "irregular_intervals": int((intervals > 1.5 * median).sum()) if median else 0,
+    }
+
+
+def autocorrelations(values: np.ndarray, max_lag: int = TEMPORAL_MAX_LAG) -> np.ndarray:
+    """
+    ACF at lags 0..max_lag of every column of `values` (rows in time order, NaN for missing) in one FFT pass.
+    Missing values are dropped per column first, like `acf(series.dropna())`; constant columns give NaN.
+    """
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    # Move each column's present values to the front, keeping their order, and zero-pad the rest
+    compacted = np.take_along_axis(values, np.argsort(~valid, axis=0, kind="stable"), axis=0)
+    present = np.arange(len(values))[:, None] < counts[None, :]
+    means = np.where(present, compacted, 0).sum(axis=0) / np.maximum(counts, 1)
+    centred = np.where(present, compacted - means, 0.0)
+
+    size = 1 << int(max(2 * len(values) - 1, 1)).bit_length()  # no wrap-around between lags
+    spectrum = np.fft.rfft(centred, n=size, axis=0)
+    autocovariance = np.fft.irfft(spectrum * spectrum.conj(), n=size, axis=0)[:max_lag + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acf = autocovariance / autocovariance[0]
+    lags = np.arange(max_lag + 1)[:, None]
+    acf[(lags >= counts[None, :]) | ~(autocovariance[0] > 0)] = np.nan
+    return acf
+
+
+def partial_autocorrelations(acf: np.ndarray) -> np.ndarray:
+    """PACF at lags 0..max_lag from the ACF columns by the Durbin-Levinson recursion, all columns at once."""
+    max_lag = acf.shape[0] - 1
+    pacf = np.full_like(acf, np.nan)
+    pacf[0] = 1.0
+    if max_lag == 0:
+        return pacf
+    phi = np.zeros((max_lag + 1, acf.shape[1]))
+    phi[1] = acf[1]
+    pacf[1] = acf[1]
+    variance = 1 - acf[1] ** 2
+    for k in range(2, max_lag + 1):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            reflection = (acf[k] - (phi[1:k] * acf[k - 1:0:-1]).sum(axis=0)) / variance
+        phi[1:k] = phi[1:k] - reflection * phi[k - 1:0:-1]
+        phi[k] = reflection
+        pacf[k] = reflection
+        variance = variance * (1 - reflection ** 2)
+    return pacf
+
+
+def _missing_runs(missing: np.ndarray) -> dict:
+    """Gaps in one column, in time order: how many runs of missing values, and the longest one."""
+    if not missing.any():
+        return {"missing": 0, "gaps": 0, "longest_gap": 0}
+    edges = np.diff(np.concatenate(([0], missing.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return {"missing": int(missing.sum()), "gaps": int(len(starts)), "longest_gap": int((ends - starts).max())}
+
+
+def _round(values: np.ndarray) -> list:
+    return [None if np.isnan(value) else round(float(value), 4) for value in values]
+
+
+def compute_temporal_profile(csv_path: str, time_column: str, order: np.ndarray, times: np.ndarray) -> dict:
+    """The profile of the current version along `time_column`, given its time index."""
+    schema = dataset_store.dataset_schema(csv_path)
+    columns = {}
+    numeric = [
+        field.name for field in schema if field.name != time_column and
+        (pa.types.is_integer(field.type) or pa.types.is_floating(field.type) or pa.types.is_boolean(field.type))
+    ]
+    # Columns are read and reordered a block at a time, sized so the working arrays stay within the budget
+    block = max(1, TEMPORAL_BLOCK_BYTES // (8 * 4 * max(len(order), 1)))
+    for start in range(0, len(numeric), block):
+        names = numeric[start:start + block]
+        table = dataset_store.read_table(csv_path, names).take(order)
+        values = np.empty((len(order), len(names)), dtype=np.float64)
+        for i, name in enumerate(names):
+            values[:, i] = pc.cast(table.column(name), pa.float64()).to_numpy(zero_copy_only=False)
+        acf = autocorrelations(values)
+        pacf = partial_autocorrelations(acf)
+        for i, name in enumerate(names):
+            columns[name] = {"acf": _round(acf[1:, i]), "pacf": _round(pacf[1:, i])}
+    for name in schema.names:
+        if name == time_column:
+            continue
+        missing = pc.is_null(dataset_store.read_table(csv_path, [name]).column(0), nan_is_null=True)
+        columns.setdefault(name, {})["gaps"] = _missing_runs(missing.to_numpy(zero_copy_only=False)[order])
+    return {"time_column": time_column, "max_lag": TEMPORAL_MAX_LAG, "index": _spacing(times), "columns": columns}
+
+
+def _temporal_dir(csv_path: str) -> str:
+    return os.path.join(dataset_store.index_dir(csv_path), "temporal")
+
+
+def time_index(csv_path: str):
+    """
+    (time column, row ids in time order, their int64 ns timestamps) of the current version, or None without a
+    time column. Detected, parsed and sorted once per version; the answer is kept on disk, "no time column" too.
+    """
+    dataset_store.ensure_sidecar(csv_path)
+    path = _temporal_dir(csv_path)
+    if not os.path.exists(os.path.join(path, "index.json")):
+        time_column = detect_time_column(csv_path)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_path)
+        if time_column is not None:
+            order, times = _time_index(csv_path, time_column)
+            np.save(os.path.join(tmp_path, "order.npy"), order)
+            np.save(os.path.join(tmp_path, "times.npy"), times)
+        with open(os.path.join(tmp_path, "index.json"), "w") as f:
+            json.dump({"time_column": time_column}, f)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another worker published the same version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    with open(os.path.join(path, "index.json")) as f:
+        time_column = json.load(f)["time_column"]
+    if time_column is None:
+        return None
+    return time_column, np.load(os.path.join(path, "order.npy"), mmap_mode="r"), np.load(os.path.join(path, "times.npy"), mmap_mode="r")
+
+
+def load_temporal_profile(csv_path: str):
+    """The temporal profile of the current version, computed on first use; None without a time column."""
+    dataset_store.ensure_sidecar(csv_path)
+    key = dataset_store.cache_key("temporal", csv_path)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    index = time_index(csv_path)
+    profile_path = os.path.join(_temporal_dir(csv_path), "profile.json")
+    if index is None:
+        profile = None
+    elif os.path.exists(profile_path):
+        with open(profile_path) as f:
+            profile = json.load(f)
+    else:
+        profile = compute_temporal_profile(csv_path, *index)
+        tmp_path = f"{profile_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, profile_path)
+
+    with _cache_lock:
+        _cache[key] = profile
+        while len(_cache) > TEMPORAL_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return profile
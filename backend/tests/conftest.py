@@ -0,0 +1,79 @@
+import hashlib
+import os
+import sys
+import threading
+
+import pytest
+
+# Backend modules import each other by their flat names, as they do when the API or a worker runs from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import dataset_store
+
+
+@pytest.fixture
+def public_dir(tmp_path, monkeypatch):
+    """A private column store and `public/` directory for one test."""
+    store_dir = tmp_path / "store"
+    monkeypatch.setattr(dataset_store, "STORE_DIR", str(store_dir))
+    monkeypatch.setattr(dataset_store, "BLOB_DIR", str(store_dir / "blobs"))
+    monkeypatch.setattr(dataset_store, "UPLOAD_TMP_DIR", str(store_dir / "tmp"))
+    path = tmp_path / "public"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def upload(public_dir):
+    """Stores CSV bytes the way an upload does (blob, hard link, manifest) and returns the dataset's path."""
+    def upload_csv(name: str, content: bytes) -> str:
+        tmp_path = dataset_store.new_upload_path()
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        content_hash = hashlib.sha256(content).hexdigest()
+        dataset_store.store_blob(tmp_path, content_hash)
+        csv_path = str(public_dir / name)
+        dataset_store.link_blob(content_hash, csv_path)
+        dataset_store.register_upload(csv_path, content_hash, dataset_store.sniff_csv_options(content))
+        return csv_path
+    return upload_csv
+
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def worker(public_dir, redis_server, tmp_path, monkeypatch):
+    """The worker module, talking to an in-memory Redis and a private catalog."""
+    import fakeredis
+    monkeypatch.setenv("OPENROUTER_API_KEY", os.getenv("OPENROUTER_API_KEY", "test"))
+    import catalog
+    import celery_worker
+    import simulation_memo
+    monkeypatch.setattr(celery_worker, "redis_cache", fakeredis.FakeRedis(server=redis_server, decode_responses=True))
+    monkeypatch.setattr(celery_worker, "redis_payloads", fakeredis.FakeRedis(server=redis_server))
+    monkeypatch.setattr(simulation_memo, "redis_cache", celery_worker.redis_cache)
+    monkeypatch.setattr(catalog, "CATALOG_PATH", str(tmp_path / "catalog.db"))
+    monkeypatch.setattr(catalog, "_local", threading.local())
+    return celery_worker
+
+
+@pytest.fixture
+def api(worker, public_dir, redis_server, monkeypatch):
+    """A client of the API app on the same in-memory Redis; profiling jobs are recorded instead of queued."""
+    from fastapi.testclient import TestClient
+    import fakeredis
+    import main
+    monkeypatch.setattr(main, "redis_cache", worker.redis_cache)
+    monkeypatch.setattr(main, "redis_payloads", worker.redis_payloads)
+    monkeypatch.setattr(main, "redis_async", fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True))
+    monkeypatch.setattr(main, "redis_payloads_async", fakeredis.FakeAsyncRedis(server=redis_server))
+    monkeypatch.setattr(main, "public_dir", str(public_dir))
+    dispatched = []
+    monkeypatch.setattr(main, "dispatch_profile", lambda file_path, build_sidecar=False: dispatched.append(file_path))
+    client = TestClient(main.app)
+    client.main, client.dispatched = main, dispatched
+    return client
@@ -0,0 +1,94 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import chi2_contingency
+
+import associations
+
+
+def _frame(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=rows)
+    df = pd.DataFrame({
+        "x": x,
+        "y": 2 * x + rng.normal(scale=0.5, size=rows),
+        "z": rng.integers(0, 100, size=rows).astype(float),
+        "constant": 1.0,
+        "colour": rng.choice(["red", "green", "blue"], size=rows),
+        "size": rng.choice(["S", "M", "L", "XL"], size=rows),
+    })
+    df["shade"] = df["colour"].where(rng.random(rows) < 0.8, "grey")
+    df.loc[df["x"] > 1, "z"] = np.nan
+    df.loc[rng.random(rows) < 0.1, "y"] = np.nan
+    df.loc[rng.random(rows) < 0.1, "size"] = np.nan
+    return df
+
+
+@pytest.fixture
+def dataset(public_dir, upload, monkeypatch):
+    # Matrices are cached in-process by name and content, which every test here shares
+    monkeypatch.setattr(associations, "_cache", associations.OrderedDict())
+    df = _frame()
+    return upload("a.csv", df.to_csv(index=False).encode()), pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+
+def _cramers_v(a: pd.Series, b: pd.Series) -> float:
+    table = pd.crosstab(a.fillna("<missing>"), b.fillna("<missing>"))
+    chi2 = chi2_contingency(table, correction=False)[0]
+    return np.sqrt(chi2 / len(a) / (min(table.shape) - 1))
+
+
+def test_numeric_correlations_match_pandas(dataset):
+    path, df = dataset
+    expected = df[["x", "y", "z"]].corr()
+    for column in ("x", "y", "z"):
+        r = associations.numeric_correlations(path, column)
+        assert list(r.index) == ["x", "y", "z"]  # the constant column has no correlation
+        np.testing.assert_allclose(r.to_numpy(), expected[column].to_numpy(), rtol=1e-5)
+    assert associations.numeric_correlations(path, "colour").empty
+
+
+def test_missingness_correlations_match_pandas(dataset):
+    path, df = dataset
+    r = associations.missingness_correlations(path, "z")
+    for column in ("x", "y"):
+        assert r[column] == pytest.approx(df["z"].isna().astype(float).corr(df[column]), rel=1e-5)
+    assert r["x"] > 0.5  # z is missing exactly where x is large
+    assert associations.missingness_correlations(path, "x").empty
+
+
+def test_categorical_associations_match_cramers_v(dataset):
+    path, df = dataset
+    for column in ("colour", "size", "shade"):
+        v = associations.categorical_associations(path, column)
+        assert v[column] == pytest.approx(1.0)
+        for other in ("colour", "size", "shade"):
+            assert v[other] == pytest.approx(_cramers_v(df[column], df[other]), rel=1e-5, abs=1e-6)
+    assert associations.categorical_associations(path, "shade")["colour"] > 0.7
+
+
+def test_blocks_give_the_same_matrices(dataset, monkeypatch):
+    path, _ = dataset
+    whole = associations.compute_associations(path)
+    monkeypatch.setattr(associations, "BLOCK_COLUMNS", 2)
+    blocked = associations.compute_associations(path)
+    for kind in ("numeric", "missing", "categorical"):
+        np.testing.assert_allclose(blocked[kind], whole[kind], rtol=1e-6)
+
+
+def test_sampling_keeps_distinct_counts_exact(dataset, monkeypatch):
+    path, df = dataset
+    monkeypatch.setattr(associations, "ASSOCIATION_MAX_ROWS", 50)
+    result = associations.compute_associations(path)
+    assert result["meta"]["rows"] == len(df) and result["meta"]["sampled_rows"] == 50
+    assert result["meta"]["distinct_counts"] == {column: int(df[column].nunique()) for column in df.columns}
+
+
+def test_matrices_are_kept_per_version(dataset, monkeypatch):
+    path, _ = dataset
+    first = associations.distinct_counts(path)
+    monkeypatch.setattr(associations, "compute_associations", lambda csv_path: pytest.fail("recomputed"))
+    associations._cache.clear()
+    assert associations.distinct_counts(path) == first
@@ -0,0 +1,36 @@
+import os
+
+import pandas as pd
+
+import catalog
+import dataset_store
+
+CSV = b"id,price\n1,9.5\n2,\n"
+
+
+def test_dataset_listing_dashboard_and_delete(api, upload, worker):
+    csv_path = upload("a.csv", CSV)
+    catalog.record_dataset(csv_path)
+    assert api.get("/api/datasets").json() == [{"name": "a.csv", "path": "/a.csv", "source": "server"}]
+    assert api.get("/api/datasets/dashboard-summary").json() == []
+
+    worker.generate_dataset_profile(csv_path)
+    summaries = api.get("/api/datasets/dashboard-summary")
+    assert [summary["filename"] for summary in summaries.json()] == ["a.csv"]
+    assert summaries.headers["X-Total-Count"] == "1"
+
+    assert api.delete("/api/dataset/a.csv").status_code == 200
+    assert not os.path.exists(csv_path)
+    assert api.get("/api/datasets").json() == []
+
+
+def test_rollback_endpoint_moves_the_head_back(api, upload):
+    csv_path = upload("a.csv", CSV)
+    dataset_store.ensure_sidecar(csv_path)
+    first_version = dataset_store.dataset_version(csv_path)
+    dataset_store.write_column(csv_path, "price", pd.Series([1.0, 2.0]))
+
+    response = api.post("/api/dataset/a.csv/rollback", json={"version": first_version})
+    assert response.json() == {"status": "SUCCESS", "version": first_version, "rows": 2, "columns": 2}
+    assert api.post("/api/dataset/a.csv/rollback", json={"version": "missing"}).status_code == 404
+    assert [entry["current"] for entry in api.get("/api/dataset/a.csv/versions").json()] == [True, False, True]
@@ -0,0 +1,65 @@
+import os
+import time
+
+import dataset_store
+
+CSV = b"id,city\n" + b"".join(f"{i},city{i % 7}\n".encode() for i in range(2_000))
+
+
+def _create(api, size: int, chunk_size: int):
+    return api.post("/api/uploads", json={"filename": "cities.csv", "size": size, "chunk_size": chunk_size})
+
+
+def test_chunks_in_any_order_assemble_the_upload(api, public_dir):
+    chunk_size = 4096
+    upload = _create(api, len(CSV), chunk_size).json()
+    chunks = [CSV[start:start + chunk_size] for start in range(0, len(CSV), chunk_size)]
+    assert upload["total_chunks"] == len(chunks)
+
+    for index in reversed(range(1, len(chunks))):
+        assert api.put(f"/api/uploads/{upload['upload_id']}/chunks/{index}", content=chunks[index]).status_code == 200
+    status = api.get(f"/api/uploads/{upload['upload_id']}").json()
+    assert status["missing"] == [0]
+    assert api.post(f"/api/uploads/{upload['upload_id']}/complete").status_code == 409
+
+    api.put(f"/api/uploads/{upload['upload_id']}/chunks/0", content=chunks[0])
+    done = api.post(f"/api/uploads/{upload['upload_id']}/complete").json()
+    assert done["name"] == "cities.csv"
+    assert (public_dir / "cities.csv").read_bytes() == CSV
+    assert api.dispatched == [os.path.join(str(public_dir), "cities.csv")]
+    assert not os.path.exists(dataset_store.chunked_upload_path(upload["upload_id"]))
+
+
+def test_chunk_of_the_wrong_size_is_rejected(api):
+    upload = _create(api, len(CSV), 4096).json()
+    response = api.put(f"/api/uploads/{upload['upload_id']}/chunks/0", content=CSV[:100])
+    assert response.status_code == 400
+
+
+def test_size_and_chunk_count_are_limited(api, monkeypatch):
+    monkeypatch.setattr(api.main, "MAX_UPLOAD_BYTES", 1024 * 1024)
+    assert _create(api, 1024 * 1024 + 1, 4096).status_code == 413
+    assert _create(api, api.main.MAX_UPLOAD_CHUNKS + 1, 1).status_code == 400
+    assert _create(api, api.main.MAX_UPLOAD_CHUNKS, 1).status_code == 200
+
+
+def test_sweep_removes_only_uploads_whose_state_expired(api):
+    abandoned = _create(api, len(CSV), 4096).json()["upload_id"]
+    active = _create(api, len(CSV), 4096).json()["upload_id"]
+    fresh = _create(api, len(CSV), 4096).json()["upload_id"]
+    api.main.redis_cache.delete(f"chunked_upload:{abandoned}", f"chunked_upload:{fresh}")
+    long_ago = time.time() - 2 * api.main.UPLOAD_SWEEP_GRACE_SECONDS
+    for upload_id in (abandoned, active):
+        os.utime(dataset_store.chunked_upload_path(upload_id), (long_ago, long_ago))
+
+    assert api.main.sweep_abandoned_uploads() == 1
+    assert not os.path.exists(dataset_store.chunked_upload_path(abandoned))
+    assert os.path.exists(dataset_store.chunked_upload_path(active))
+    assert os.path.exists(dataset_store.chunked_upload_path(fresh))
+
+
+def test_abort_removes_the_partial_file(api):
+    upload_id = _create(api, len(CSV), 4096).json()["upload_id"]
+    assert api.delete(f"/api/uploads/{upload_id}").status_code == 200
+    assert not os.path.exists(dataset_store.chunked_upload_path(upload_id))
+    assert api.get(f"/api/uploads/{upload_id}").status_code == 404
@@ -0,0 +1,110 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset_query
+import dataset_store
+
+CSV = b"id,price,city\n1,9.5,Oslo\n2,,Lima\n3,4.0,oslo\n4,12.0,\n5,4.0,Bergen\n"
+
+
+def _ids(csv_path: str, **query) -> list:
+    table, total_rows = dataset_query.run_query(csv_path, 0, 100, ["id"], **query)
+    assert total_rows == table.num_rows
+    return table.column("id").to_pylist()
+
+
+def test_sort_puts_nulls_last(upload):
+    csv_path = upload("a.csv", CSV)
+    assert _ids(csv_path, sort=[("price", "asc"), ("id", "desc")]) == [5, 3, 1, 4, 2]
+    assert _ids(csv_path, sort=[("price", "desc")]) == [4, 1, 3, 5, 2]
+
+
+def test_sort_on_the_time_column_is_chronological(upload):
+    csv_path = upload("a.csv", b"id,when\n1,5 Jan 2024\n2,12 Dec 2023\n3,\n4,1 Feb 2024\n5,20 Jan 2024\n6,12 Dec 2023\n")
+    assert _ids(csv_path, sort=[("when", "asc")]) == [2, 6, 1, 5, 4, 3]
+    assert _ids(csv_path, sort=[("when", "desc")]) == [4, 5, 1, 2, 6, 3]
+    # Multi-key sorts still compare the text
+    assert _ids(csv_path, sort=[("when", "asc"), ("id", "desc")]) == [4, 6, 2, 5, 1, 3]
+
+
+def test_filters_match_pandas(upload):
+    csv_path = upload("a.csv", CSV)
+    df = pd.read_csv(csv_path)
+    assert _ids(csv_path, filters={"price": {"filterType": "number", "type": "greaterThanOrEqual", "filter": 9.5}}) == \
+        df.loc[df["price"] >= 9.5, "id"].tolist()
+    assert _ids(csv_path, filters={"price": {"filterType": "number", "type": "notEqual", "filter": 4}}) == [1, 4]
+    assert _ids(csv_path, filters={"city": {"filterType": "text", "type": "equals", "filter": "OSLO"}}) == [1, 3]
+    assert _ids(csv_path, filters={"city": {"filterType": "text", "type": "blank"}}) == [4]
+    assert _ids(csv_path, filters={"city": {"filterType": "set", "values": ["Lima", None]}}) == [2, 4]
+    assert _ids(csv_path, filters={"city": {
+        "filterType": "text", "operator": "OR",
+        "conditions": [{"type": "startsWith", "filter": "ber"}, {"type": "endsWith", "filter": "ma"}],
+    }}) == [2, 5]
+
+
+def test_search_and_paging(upload):
+    csv_path = upload("a.csv", CSV)
+    assert _ids(csv_path, search="o") == [1, 3]
+    table, total_rows = dataset_query.run_query(csv_path, 1, 2, ["id"], sort=[("id", "desc")])
+    assert (table.column("id").to_pylist(), total_rows) == ([4, 3], 5)
+
+
+def test_unknown_filter_is_rejected(upload):
+    csv_path = upload("a.csv", CSV)
+    with pytest.raises(ValueError):
+        dataset_query.run_query(csv_path, 0, 10, filters={"city": {"filterType": "text", "type": "regex", "filter": "."}})
+
+
+def test_indexes_follow_the_dataset_version(upload):
+    csv_path = upload("a.csv", CSV)
+    assert _ids(csv_path, sort=[("price", "asc")])[:2] == [3, 5]
+    dataset_store.write_column(csv_path, "price", pd.Series([5.0, 4.0, 3.0, 2.0, 1.0]))
+    assert _ids(csv_path, sort=[("price", "asc")]) == [5, 4, 3, 2, 1]
+
+
+def test_concurrent_builders_publish_complete_indexes(upload):
+    csv_path = upload("a.csv", b"value\n" + b"\n".join(str(i).encode() for i in range(50_000, 0, -1)) + b"\n")
+    dataset_store.ensure_sidecar(csv_path)
+    results, barrier = [], threading.Barrier(8)
+
+    def build():
+        barrier.wait()
+        results.append(np.asarray(dataset_query.sort_permutation(csv_path, [("value", "asc")])))
+
+    threads = [threading.Thread(target=build) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = np.arange(50_000)[::-1]
+    assert all(np.array_equal(result, expected) for result in results)
+    np.testing.assert_array_equal(dataset_query.sort_permutation(csv_path, [("value", "asc")]), expected)
+    assert not [name for name in os.listdir(dataset_store.index_dir(csv_path)) if name.endswith(".tmp")]
+
+
+def test_incomplete_filters_match_every_row(upload):
+    csv_path = upload("a.csv", CSV)
+    assert _ids(csv_path, filters={"price": {"filterType": "number", "type": "equals", "filter": None}}) == [1, 2, 3, 4, 5]
+    assert _ids(csv_path, filters={
+        "price": {"filterType": "number", "operator": "AND", "conditions": [
+            {"type": "inRange", "filter": 4, "filterTo": None}, {"type": "greaterThan", "filter": 5},
+        ]},
+        "city": {"filterType": "text", "type": "contains", "filter": None},
+    }) == [1, 4]
+    assert _ids(csv_path, sort=[("id", "desc")], filters={"city": {"filterType": "text", "type": "equals"}}) == [5, 4, 3, 2, 1]
+
+
+def test_non_numeric_number_filter_is_a_bad_request(api, upload):
+    upload("a.csv", CSV)
+    response = api.post("/api/dataset/a.csv/query", json={
+        "offset": 0, "limit": 10, "filters": {"price": {"filterType": "number", "type": "lessThan", "filter": ["4"]}},
+    })
+    assert response.status_code == 400 and "not a number" in response.json()["detail"]
+    response = api.post("/api/dataset/a.csv/query", json={
+        "offset": 0, "limit": 10, "filters": {"price": {"filterType": "number", "type": "lessThan", "filter": None}},
+    })
+    assert response.status_code == 200 and len(response.json()["rows"]) == 5
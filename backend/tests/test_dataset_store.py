@@ -0,0 +1,231 @@
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import dataset_store
+
+CSV = b"id,price,city\n1,9.5,Oslo\n2,,Lima\n3,4.0,Oslo\n"
+
+
+def _blob_path(content: bytes) -> str:
+    return os.path.join(dataset_store.BLOB_DIR, hashlib.sha256(content).hexdigest())
+
+
+def test_identical_uploads_share_one_blob(upload):
+    first = upload("a.csv", CSV)
+    second = upload("b.csv", CSV)
+    assert os.path.samefile(first, second)
+    assert os.stat(_blob_path(CSV)).st_nlink == 3
+    assert dataset_store.content_hash(first) == dataset_store.content_hash(second)
+
+
+def test_removing_an_edited_dataset_frees_its_blob(upload):
+    csv_path = upload("a.csv", CSV)
+    dataset_store.write_column(csv_path, "price", pd.Series([1.0, 2.0, 3.0]))
+    dataset_store.materialize_csv(csv_path)
+    assert not os.path.samefile(csv_path, _blob_path(CSV))
+
+    os.remove(csv_path)
+    dataset_store.remove_dataset(csv_path)
+    assert not os.path.exists(_blob_path(CSV))
+
+
+def test_blob_stays_while_another_dataset_links_it(upload):
+    first = upload("a.csv", CSV)
+    second = upload("b.csv", CSV)
+    dataset_store.write_column(first, "price", pd.Series([1.0, 2.0, 3.0]))
+    dataset_store.materialize_csv(first)
+
+    os.remove(first)
+    dataset_store.remove_dataset(first)
+    assert os.path.exists(_blob_path(CSV))
+    os.remove(second)
+    dataset_store.remove_dataset(second)
+    assert not os.path.exists(_blob_path(CSV))
+
+
+def _duplicates(csv_path: str) -> int:
+    fingerprints = dataset_store.row_fingerprints(csv_path)
+    return len(fingerprints) - len(np.unique(fingerprints))
+
+
+def test_row_fingerprints_follow_column_edits(upload, monkeypatch):
+    csv_path = upload("a.csv", b"a,b,c\n1,x,0.0\n1,x,-0.0\n2,y,1.0\n2,y,1.0\n3,z,\n")
+    assert _duplicates(csv_path) == int(dataset_store.load_dataset(csv_path).duplicated().sum()) == 2
+
+    # An edit only hashes the column it wrote; the other columns' terms come from the parent version
+    hashed = []
+    column_fingerprints = dataset_store.column_fingerprints
+    monkeypatch.setattr(dataset_store, "column_fingerprints",
+                        lambda values, name: hashed.append(name) or column_fingerprints(values, name))
+    dataset_store.write_column(csv_path, "c", pd.Series([0.0, 5.0, 1.0, 1.0, 2.0]))
+    assert _duplicates(csv_path) == int(dataset_store.load_dataset(csv_path).duplicated().sum()) == 1
+    dataset_store.drop_column(csv_path, "c")
+    assert _duplicates(csv_path) == int(dataset_store.load_dataset(csv_path).duplicated().sum()) == 2
+    assert hashed == ["c"]
+
+
+def test_row_fingerprints_of_a_version_that_dropped_rows(upload):
+    csv_path = upload("a.csv", b"a,b\n1,x\n1,x\n2,y\n1,x\n")
+    df = dataset_store.load_dataset(csv_path)
+    dataset_store.save_dataset(df.iloc[[1, 2, 3]], csv_path)
+    assert len(dataset_store.row_fingerprints(csv_path)) == 3
+    assert _duplicates(csv_path) == 1
+
+
+def test_column_store_round_trips_the_csv(upload):
+    csv_path = upload("a.csv", CSV)
+    pd.testing.assert_frame_equal(dataset_store.load_dataset(csv_path), pd.read_csv(csv_path))
+    assert dataset_store.dataset_schema(csv_path).names == ["id", "price", "city"]
+    pd.testing.assert_frame_equal(dataset_store.load_dataset(csv_path, columns=["city"]), pd.read_csv(csv_path)[["city"]])
+
+
+def test_large_csv_is_converted_in_chunks(public_dir, upload, monkeypatch):
+    monkeypatch.setattr(dataset_store, "LARGE_FILE_BYTES", 0)
+    monkeypatch.setattr(dataset_store, "CHUNK_ROWS", 2)
+    csv_path = upload("a.csv", CSV)
+    manifest = dataset_store.build_sidecar(csv_path)
+    assert manifest["rows"] == 3
+    pd.testing.assert_frame_equal(dataset_store.load_dataset(csv_path), pd.read_csv(csv_path))
+
+
+def test_column_that_changes_type_mid_file_is_promoted(public_dir, upload, monkeypatch):
+    monkeypatch.setattr(dataset_store, "LARGE_FILE_BYTES", 0)
+    monkeypatch.setattr(dataset_store, "CHUNK_ROWS", 2)
+    csv_path = upload("a.csv", b"code,amount,note\n1,1,\n2,2,\n3,2.5,\nB7,4,late\n5,,\n")
+    dataset_store.build_sidecar(csv_path)
+    assert dataset_store.has_fresh_sidecar(csv_path)
+    schema = dataset_store.dataset_schema(csv_path)
+    assert [str(field.type) for field in schema] == ["string", "double", "string"]
+    df = dataset_store.load_dataset(csv_path)
+    assert df["code"].tolist() == ["1", "2", "3", "B7", "5"]
+    pd.testing.assert_frame_equal(df, pd.read_csv(csv_path, dtype={"code": str}))
+    assert not [name for name in os.listdir(dataset_store._columns_dir(csv_path)) if name.endswith(".tmp")]
+
+
+def test_write_column_rewrites_only_that_column(upload):
+    csv_path = upload("a.csv", CSV)
+    dataset_store.ensure_sidecar(csv_path)
+    before = dict(dataset_store._read_manifest(csv_path)["column_files"])
+    dataset_store.write_column(csv_path, "price", pd.Series([1.0, 2.0, 3.0]))
+    after = dataset_store._read_manifest(csv_path)["column_files"]
+    assert [name for name in before if before[name] != after[name]] == ["price"]
+    assert dataset_store.load_dataset(csv_path)["price"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_read_rows_addresses_a_window(upload):
+    csv_path = upload("a.csv", CSV)
+    table, total_rows = dataset_store.read_rows(csv_path, 1, 5, ["id", "city"])
+    assert total_rows == 3
+    assert table.to_pydict() == {"id": [2, 3], "city": ["Lima", "Oslo"]}
+
+
+def test_read_rows_windows_deep_into_a_large_dataset(public_dir, upload, monkeypatch):
+    monkeypatch.setattr(dataset_store, "LARGE_FILE_BYTES", 0)
+    monkeypatch.setattr(dataset_store, "CHUNK_ROWS", 30_000)
+    rows = 100_000
+    csv_path = upload("a.csv", b"id,half\n" + b"".join(f"{i},{i / 2}\n".encode() for i in range(rows)))
+    table, total_rows = dataset_store.read_rows(csv_path, rows - 30, 100)
+    assert total_rows == rows and table.column("id").to_pylist() == list(range(rows - 30, rows))
+    assert dataset_store.read_rows(csv_path, rows + 5, 10)[0].num_rows == 0
+
+    # After dropping every third row, windows go through the row index
+    kept = dataset_store.load_dataset(csv_path).iloc[np.arange(rows) % 3 != 0]
+    dataset_store.save_dataset(kept, csv_path)
+    table, total_rows = dataset_store.read_rows(csv_path, len(kept) - 40, 25, ["half"])
+    assert total_rows == len(kept)
+    assert table.column("half").to_pylist() == kept["half"].iloc[len(kept) - 40:len(kept) - 15].tolist()
+
+
+def test_versions_share_unchanged_columns_and_roll_back(upload):
+    csv_path = upload("a.csv", CSV)
+    original = dataset_store.load_dataset(csv_path)
+    first = dataset_store._read_manifest(csv_path)
+    dataset_store.write_column(csv_path, "price", pd.Series([1.0, 2.0, 3.0]))
+    dataset_store.save_dataset(dataset_store.load_dataset(csv_path).iloc[[0, 2]], csv_path, note="Drop Lima")
+
+    history = dataset_store.list_versions(csv_path)
+    assert [entry["note"] for entry in history] == ["Imported CSV", "Write column 'price'", "Drop Lima"]
+    assert [entry["parent"] for entry in history] == [None, history[0]["version"], history[1]["version"]]
+    assert history[-1]["current"] and history[-1]["rows"] == 2
+    head = dataset_store._read_manifest(csv_path)
+    assert head["column_files"]["city"] == first["column_files"]["city"]
+    assert head["row_mask"] is not None
+
+    dataset_store.rollback(csv_path, first["version"])
+    assert dataset_store.dataset_version(csv_path) == first["version"]
+    pd.testing.assert_frame_equal(dataset_store.load_dataset(csv_path), original)
+    assert dataset_store.list_versions(csv_path)[-1]["note"].startswith("Rolled back")
+
+
+def test_rollback_to_an_unknown_version_fails(upload):
+    csv_path = upload("a.csv", CSV)
+    dataset_store.ensure_sidecar(csv_path)
+    with pytest.raises(ValueError):
+        dataset_store.rollback(csv_path, "missing")
+
+
+def test_materialize_csv_exports_the_current_version(upload):
+    csv_path = upload("a.csv", CSV)
+    dataset_store.drop_column(csv_path, "city")
+    dataset_store.materialize_csv(csv_path)
+    assert pd.read_csv(csv_path).columns.tolist() == ["id", "price"]
+    assert dataset_store.has_fresh_sidecar(csv_path)
+
+
+def test_shared_load_maps_numeric_columns_without_copying(public_dir, upload, monkeypatch):
+    monkeypatch.setattr(dataset_store, "LARGE_FILE_BYTES", 0)
+    monkeypatch.setattr(dataset_store, "CHUNK_ROWS", 2)
+    csv_path = upload("a.csv", CSV)
+    shared = dataset_store.load_dataset(csv_path, shared=True)
+    pd.testing.assert_frame_equal(shared, dataset_store.load_dataset(csv_path))
+    # Views of the memory-mapped file are read-only; columns with missing values are filled in, so copied
+    assert not shared["id"].to_numpy().flags.writeable
+    assert shared["price"].to_numpy().flags.writeable
+    assert dataset_store.load_dataset(csv_path)["id"].to_numpy().flags.writeable
+
+
+@pytest.fixture
+def csv_only(public_dir, upload, monkeypatch):
+    """Uploads whose column files cannot be built, so rows are read from the CSV itself."""
+    def fail(csv_path, csv_options):
+        raise pa.ArrowInvalid("no column files")
+    monkeypatch.setattr(dataset_store, "LARGE_FILE_BYTES", 0)
+    monkeypatch.setattr(dataset_store, "_write_columns_chunked", fail)
+    return upload
+
+
+def test_csv_rows_are_read_through_a_byte_offset_index(csv_only, monkeypatch):
+    rows = [f'{i},"note {i}\r\nline two, with ""quotes""",{i * 0.5}' for i in range(500)]
+    content = ("id,note,score\r\n" + "\r\n".join(rows[:250]) + "\r\n\r\n" + "\r\n".join(rows[250:])).encode()
+    csv_path = csv_only("a.csv", content)
+    dataset_store.build_sidecar(csv_path)
+    expected = pd.read_csv(io.BytesIO(content))
+
+    table, total_rows = dataset_store.read_rows(csv_path, 480, 50)
+    assert total_rows == 500
+    pd.testing.assert_frame_equal(table.to_pandas(), expected.iloc[480:].reset_index(drop=True))
+
+    # The index is built once; later windows parse only their own rows
+    parsed = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda source, **kwargs: parsed.append(len(source.getvalue())) or read_csv(source, **kwargs))
+    table = dataset_store.read_rows_at(csv_path, [499, 3, 250], ["id", "note"])
+    assert table.column("id").to_pylist() == [499, 3, 250]
+    assert table.column("note").to_pylist() == expected["note"].iloc[[499, 3, 250]].tolist()
+    assert parsed and parsed[0] < len(content) / 50
+    assert dataset_store.read_rows(csv_path, 600, 10)[0].num_rows == 0
+
+
+def test_utf16_csv_rows_are_indexed_by_code_unit(csv_only):
+    content = "id,city\n1,Oslo\n2,Ålesund\n3,Lima\n".encode("utf-16")
+    csv_path = csv_only("a.csv", content)
+    dataset_store.build_sidecar(csv_path)
+    table, total_rows = dataset_store.read_rows(csv_path, 1, 5)
+    assert total_rows == 3
+    assert table.to_pydict() == {"id": [2, 3], "city": ["Ålesund", "Lima"]}
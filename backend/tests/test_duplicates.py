@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from duplicates import duplicate_mask, count_duplicates, row_fingerprints, column_fingerprints, DuplicateCounter
+
+
+def _mixed_frame(rows: int = 20_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "signed": rng.choice([0.0, -0.0, 1.0, np.nan, -np.nan], rows),
+        "count": rng.integers(0, 3, rows),
+        "label": rng.choice(np.array(["a", "b", None], dtype=object), rows),
+        "flag": rng.choice([True, False], rows),
+        "when": pd.to_datetime(rng.choice(["2024-01-01", "2024-06-30", None], rows)),
+        "nullable": pd.array(rng.choice([1, 2, None], rows), dtype="Int64"),
+    })
+
+
+def test_duplicate_mask_matches_pandas_on_mixed_types():
+    df = _mixed_frame()
+    expected = df.duplicated().to_numpy()
+    np.testing.assert_array_equal(duplicate_mask(df, verify=True), expected)
+    np.testing.assert_array_equal(duplicate_mask(df), expected)
+    np.testing.assert_array_equal(duplicate_mask(df, bits=128, verify=True), expected)
+
+
+def test_signed_zeros_and_nan_payloads_are_duplicates():
+    df = pd.DataFrame({"a": [0.0, -0.0, np.nan, -np.nan], "b": [1, 1, 2, 2]})
+    assert duplicate_mask(df, verify=True).tolist() == df.duplicated().tolist() == [False, True, False, True]
+
+
+def test_verified_mask_keeps_rows_that_only_hash_alike():
+    # 1 and '1' hash alike in an object column, None and NaN too; pandas keeps them apart
+    df = pd.DataFrame({"a": pd.Series([1, "1", None, np.nan], dtype=object)})
+    assert duplicate_mask(df, verify=True).tolist() == df.duplicated().tolist() == [False, False, False, False]
+    assert duplicate_mask(df).tolist() == [False, True, False, True]
+
+
+def test_row_fingerprints_ignore_the_index():
+    df = _mixed_frame(100)
+    shifted = df.set_axis(range(1000, 1100))
+    np.testing.assert_array_equal(row_fingerprints(df), row_fingerprints(shifted))
+
+
+def test_duplicate_counter_spills_to_disk_and_counts_the_same(tmp_path):
+    df = _mixed_frame()
+    with DuplicateCounter(memory_bytes=16 * 1024, partitions=8, spill_dir=str(tmp_path)) as counter:
+        for start in range(0, len(df), 1_500):
+            counter.add(df.iloc[start:start + 1_500])
+        assert counter.count() == count_duplicates(df) == int(df.duplicated().sum())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_column_fingerprints_sum_to_row_fingerprints():
+    df = _mixed_frame()
+    fingerprints = np.zeros(len(df), dtype=np.uint64)
+    for name in df.columns:
+        fingerprints += column_fingerprints(df[name], name)
+    assert len(fingerprints) - len(np.unique(fingerprints)) == int(df.duplicated().sum())
+
+
+def test_column_fingerprints_depend_on_the_column():
+    # Swapping equal values between two columns makes different rows
+    df = pd.DataFrame({"a": [1, 2], "b": [2, 1]})
+    fingerprints = column_fingerprints(df["a"], "a") + column_fingerprints(df["b"], "b")
+    assert fingerprints[0] != fingerprints[1]
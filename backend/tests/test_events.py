@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+CSV = b"id,city\n1,Oslo\n2,Lima\n"
+
+
+@pytest.fixture
+def events_api(api, redis_server, monkeypatch):
+    import fakeredis
+    monkeypatch.setattr(api.main, "redis_events", fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True))
+    return api
+
+
+class _Connected:
+    async def is_disconnected(self):
+        return False
+
+
+def _parse(chunk: str) -> tuple:
+    event, data = chunk.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_stream_pushes_progress_the_profile_and_the_finished_job(events_api, worker, upload, monkeypatch):
+    main = events_api.main
+    csv_path = upload("a.csv", CSV)
+    statuses = iter([{"status": "PENDING"}, {"status": "SUCCESS", "result": {"rows": 2}}])
+
+    def job_status(job_id):
+        status = next(statuses)
+        if status["status"] == "PENDING":
+            # The stream has subscribed by now: the worker reports progress, caches the profile and finishes
+            worker.report_progress("1/2 columns profiled", 1, 2, file_path=csv_path, job_id=job_id)
+            worker.publish_event(worker.dataset_channel("a.csv"), {"type": "profile_ready"})
+            worker.publish_job_finished(task_id=job_id, state="SUCCESS")
+        return status
+    monkeypatch.setattr(main, "_job_status", job_status)
+
+    async def read(count: int) -> list:
+        response = await main.stream_events(_Connected(), job_id="job-1", dataset="a.csv")
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            if len(chunks) == count:
+                break
+        await response.body_iterator.aclose()
+        return [_parse(chunk) for chunk in chunks]
+
+    events = asyncio.run(read(4))
+    progress = {"type": "progress", "message": "1/2 columns profiled", "done": 1, "total": 2}
+    # Progress arrives once for the job's followers and once for the dataset's
+    assert events == [("progress", progress), ("progress", progress), ("profile", {"type": "profile_ready"}),
+                      ("job", {"status": "SUCCESS", "result": {"rows": 2}})]
+
+
+def test_stream_of_a_finished_job_sends_its_result_and_ends(events_api, monkeypatch):
+    monkeypatch.setattr(events_api.main, "_job_status", lambda job_id: {"status": "FAILURE", "error": "boom"})
+    response = events_api.get("/api/events", params={"job_id": "job-2"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [_parse(chunk) for chunk in response.text.split("\n\n") if chunk] == [("job", {"status": "FAILURE", "error": "boom"})]
+
+
+def test_stream_needs_something_to_follow(events_api):
+    assert events_api.get("/api/events").status_code == 400
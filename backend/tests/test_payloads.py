@@ -0,0 +1,40 @@
+import gzip
+import json
+
+import numpy as np
+
+from cache import encode_payload, decode_payload, split_payload, ETAG_LENGTH
+
+CSV = b"id,price\n1,9.5\n2,\n"
+
+
+def test_payload_round_trip_and_stable_etag():
+    payload = {"rows": 2, "columnStats": [{"column": "price", "nullCount": 1}]}
+    raw = encode_payload(payload)
+    etag, body = split_payload(raw)
+    assert len(etag) == ETAG_LENGTH
+    assert json.loads(gzip.decompress(body)) == payload == decode_payload(raw)
+    assert encode_payload(dict(payload)) == raw
+    assert decode_payload(None) is None
+
+
+def test_payload_with_numpy_values(worker):
+    raw = encode_payload({"count": np.int64(3), "mean": np.float64(1.5)}, worker.NumpyJSONEncoder)
+    assert decode_payload(raw) == {"count": 3, "mean": 1.5}
+
+
+def test_statistics_are_served_as_stored(api, upload, worker):
+    csv_path = upload("a.csv", CSV)
+    worker.generate_dataset_profile(csv_path)
+    statistics, _ = worker.get_cached_profile(csv_path)
+
+    # The test client inflates gzip responses itself; the raw bytes are the stored body
+    response = api.get("/api/dataset/a.csv/statistics", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json() == statistics
+    etag = response.headers["ETag"]
+
+    assert api.get("/api/dataset/a.csv/statistics", headers={"If-None-Match": etag}).status_code == 304
+    plain = api.get("/api/dataset/a.csv/statistics", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.json() == statistics
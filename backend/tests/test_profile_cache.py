@@ -0,0 +1,64 @@
+import pandas as pd
+
+import dataset_store
+
+CSV = b"id,price,city\n1,9.5,Oslo\n2,,Lima\n3,4.0,Oslo\n3,4.0,Oslo\n"
+
+
+def test_column_edit_patches_the_profile_and_rollback_finds_the_old_one(worker, upload):
+    csv_path = upload("a.csv", CSV)
+    worker.generate_dataset_profile(csv_path)
+    first_version = dataset_store.dataset_version(csv_path)
+    first_profile = worker.get_cached_profile(csv_path)
+    assert first_profile[1]["dataset_summary"]["duplicate_row_count"] == 1
+
+    stale_keys = worker._profile_cache_keys(csv_path)
+    price = pd.Series([9.5, 7.0, 4.0, 5.0], name="price")
+    dataset_store.write_column(csv_path, "price", price)
+    worker.patch_cached_profile(csv_path, first_profile, stale_keys, price.to_frame(),
+                                duplicate_rows=worker.count_dataset_duplicates(csv_path))
+    statistics, diagnostics = worker.get_cached_profile(csv_path)
+    assert diagnostics["dataset_summary"]["duplicate_row_count"] == 0
+    assert next(stat for stat in statistics["columnStats"] if stat["column"] == "price")["nullCount"] == 0
+
+    dataset_store.rollback(csv_path, first_version)
+    assert worker.get_cached_profile(csv_path) == first_profile
+
+
+def test_profile_dispatches_share_one_job_until_the_data_changes(worker, public_dir, monkeypatch):
+    from celery.canvas import Signature
+    queued = []
+    monkeypatch.setattr(Signature, "delay", lambda signature: queued.append(signature))
+    # A CSV dropped into `public/` by hand changes version once the queued job has hashed it
+    csv_path = str(public_dir / "a.csv")
+    with open(csv_path, "wb") as f:
+        f.write(CSV)
+    job_id = worker.dispatch_profile(csv_path, build_sidecar=True)
+    dataset_store.build_sidecar(csv_path)
+    assert not dataset_store.dataset_version(csv_path).startswith("csv-")
+    assert worker.dispatch_profile(csv_path) == job_id
+    assert len(queued) == 1
+
+    dataset_store.write_column(csv_path, "price", pd.Series([1.0, 2.0, 3.0, 4.0]))
+    assert worker.dispatch_profile(csv_path) != job_id
+    assert len(queued) == 2
+
+
+def test_running_profile_holds_the_lease_until_it_finishes(worker, upload, monkeypatch):
+    from celery.canvas import Signature
+    queued = []
+    monkeypatch.setattr(Signature, "delay", lambda signature: queued.append(signature))
+    csv_path = upload("a.csv", CSV)
+    job_id = worker.dispatch_profile(csv_path)
+
+    during = []
+    profile_dataset = worker.profile_dataset
+    monkeypatch.setattr(worker, "profile_dataset",
+                        lambda *args, **kwargs: during.append(worker.dispatch_profile(csv_path)) or profile_dataset(*args, **kwargs))
+    queued[0].apply()
+    assert during == [job_id] and len(queued) == 1
+    assert worker.get_cached_profile(csv_path) is not None
+
+    # Released once the job is done: the next request profiles again
+    assert worker.dispatch_profile(csv_path) != job_id
+    assert len(queued) == 2
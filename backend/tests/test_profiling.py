@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from data_type_detector import detect_data_types
+
+
+def _frame(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "price": rng.gamma(2.0, 10.0, rows).round(2),
+        "quantity": rng.integers(1, 6, rows),
+        "city": rng.choice(["Oslo", "Lima", "Pune", None], rows),
+        "flag": "x",
+        "pair": rng.choice([0.5, 1.5], rows),
+    })
+    df.loc[rng.random(rows) < 0.1, "price"] = np.nan
+    return pd.concat([df, df.iloc[:7]], ignore_index=True)
+
+
+def _separate_statistics(df: pd.DataFrame, types: dict) -> list:
+    """Column entries as the statistics task computed them before the profile was fused."""
+    column_stats = []
+    for header in df.columns:
+        series = df[header]
+        clean_series = series.dropna()
+        null_count = int(series.isnull().sum())
+        stat = {
+            "column": header, "dataType": types[header], "nullCount": null_count,
+            "nullPercentage": (null_count / len(df)) * 100,
+            "uniqueValues": series.nunique(), "totalValues": len(clean_series),
+            "mean": "N/A", "median": "N/A", "mode": "N/A"
+        }
+        if types[header] in ['integer', 'float'] and not clean_series.empty:
+            stat["mean"] = round(clean_series.mean(), 2)
+            stat["median"] = round(clean_series.median(), 2)
+            modes = clean_series.mode()
+            if not modes.empty:
+                stat["mode"] = ", ".join(modes.astype(str).tolist())
+        column_stats.append(stat)
+    return column_stats
+
+
+def _separate_diagnostics(df: pd.DataFrame) -> list:
+    """Column entries as the diagnostics task computed them before the profile was fused."""
+    column_diagnostics = []
+    for header in df.columns:
+        series = df[header]
+        if pd.api.types.is_numeric_dtype(series):
+            data_type = "float" if pd.api.types.is_float_dtype(series) else "integer"
+        else:
+            data_type = "categorical"
+        col_diag = {
+            "column_name": header,
+            "data_type": data_type,
+            "missing_count": int(series.isnull().sum()),
+            "missing_percentage": round(series.isnull().mean() * 100, 2),
+            "constant_flag": bool(series.nunique(dropna=True) == 1)
+        }
+        clean_series = series.dropna()
+        if data_type in ["integer", "float"] and clean_series.nunique() > 2:
+            col_diag["skewness"] = round(float(clean_series.skew()), 2)
+            col_diag["kurtosis"] = round(float(clean_series.kurtosis()), 2)
+        if data_type == "categorical" and len(clean_series) > 0:
+            col_diag["unique_count"] = int(clean_series.nunique())
+            col_diag["unique_ratio"] = round(clean_series.nunique() / len(clean_series), 4)
+        column_diagnostics.append(col_diag)
+    return column_diagnostics
+
+
+def test_fused_profile_matches_the_separate_scans():
+    df = _frame()
+    statistics, diagnostics = profiling.profile_dataset(df, "data.csv", "2024-01-01", "0.1MB")
+    assert statistics["columnStats"] == _separate_statistics(df, detect_data_types(df))
+    assert diagnostics["column_diagnostics"] == _separate_diagnostics(df)
+
+    missing_cells = int(df.isnull().sum().sum())
+    duplicate_rows = int(df.duplicated().sum())
+    assert duplicate_rows == 7
+    assert diagnostics["dataset_summary"] == {"row_count": len(df), "column_count": 6, "duplicate_row_count": duplicate_rows}
+    assert statistics["overallNullCount"] == missing_cells
+    assert statistics["missing_pct"] == round(missing_cells / df.size * 100)
+    assert statistics["duplicates_pct"] == round(duplicate_rows / len(df) * 100)
+
+
+def test_types_come_from_a_sample_spread_over_the_whole_frame():
+    rng = np.random.default_rng(1)
+    rows = 10_000
+    df = pd.DataFrame({
+        # Whole numbers for the first 2,000 rows, measurements after
+        "amount": np.concatenate([np.arange(2_000.0), rng.normal(50.0, 10.0, rows - 2_000)]),
+        # Unique codes at the head, three categories after
+        "city": np.concatenate([[f"c{i}" for i in range(2_000)], rng.choice(["Oslo", "Lima", "Pune"], rows - 2_000)]),
+        # Nothing but missing values until the last rows
+        "closed": np.concatenate([[None] * (rows - 50), ["2024-03-01"] * 50]),
+    })
+    assert detect_data_types(df) == {"amount": "float", "city": "categorical", "closed": "date"}
+
+
+def test_parallel_profile_equals_the_serial_one(monkeypatch):
+    df = pd.concat([_frame().add_suffix(f"_{i}") for i in range(5)], axis=1)
+    monkeypatch.setattr(profiling, "PROFILE_WORKERS", 1)
+    serial = profiling.profile_dataset(df, "data.csv", "2024-01-01", "0.1MB")
+
+    calls, threads = [], set()
+    profile_column = profiling._profile_column
+    monkeypatch.setattr(profiling, "_profile_column",
+                        lambda *args: threads.add(threading.current_thread().name) or profile_column(*args))
+    monkeypatch.setattr(profiling, "PROFILE_WORKERS", 4)
+    monkeypatch.setattr(profiling, "PARALLEL_MIN_COLUMNS", 2)
+    parallel = profiling.profile_dataset(df, "data.csv", "2024-01-01", "0.1MB",
+                                         progress=lambda done, total: calls.append((done, total)))
+    assert parallel == serial
+    assert all(name.startswith("profile") for name in threads)
+    assert calls == [(done, df.shape[1]) for done in range(1, df.shape[1] + 1)]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _frame(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(size=rows)
+    df = pd.DataFrame({
+        "signal": signal,
+        "noise": rng.normal(size=rows),
+        "group": np.where(signal > 0.5, "high", rng.choice(["low", "mid"], size=rows)),
+    })
+    df.loc[rng.random(rows) < 0.1, "noise"] = np.nan
+    df["label"] = (signal + rng.normal(scale=0.3, size=rows) > 0).astype(int)
+    df["amount"] = 3 * signal + rng.normal(scale=0.5, size=rows)
+    return df
+
+
+@pytest.fixture
+def dataset(worker, upload):
+    df = _frame()
+    return upload("a.csv", df.to_csv(index=False).encode()), df
+
+
+def test_frequency_codes(worker):
+    train = pd.DataFrame({"c": ["a", "a", "a", "b", "b", "c", np.nan]})
+    codes = worker._FrequencyCodes(max_categories=3).fit(train)
+    assert codes.categories_ == ["a", "b"]
+    result = codes.transform(pd.DataFrame({"c": ["b", "a", "c", "unseen", np.nan]}))
+    np.testing.assert_array_equal(result[:, 0], [1, 0, 2, 2, np.nan])
+
+
+def test_auto_engine_follows_the_one_hot_width(dataset, worker, monkeypatch):
+    path, df = dataset
+    assert worker.choose_simulation_engine(path, "label") == "random_forest"
+    # signal, noise, amount and three groups, eight bytes each
+    width_bytes = len(df) * 6 * 8
+    monkeypatch.setattr(worker, "SIMULATION_DENSE_FEATURE_BYTES", width_bytes)
+    assert worker.choose_simulation_engine(path, "label") == "random_forest"
+    monkeypatch.setattr(worker, "SIMULATION_DENSE_FEATURE_BYTES", width_bytes - 1)
+    assert worker.choose_simulation_engine(path, "label") == "hist_gradient_boosting"
+
+
+@pytest.mark.parametrize("engine", ["random_forest", "sparse_random_forest", "hist_gradient_boosting"])
+def test_every_engine_scores_a_learnable_target(dataset, worker, engine):
+    path, df = dataset
+    classification = worker._validate_plan_robust(df.drop(columns="amount"), {}, "label", "classification", engine=engine)
+    assert classification["error"] is None and classification["score"] > 0.85
+    regression = worker._validate_plan_robust(df.drop(columns="label"), {}, "amount", "regression", engine=engine)
+    assert regression["error"] is None and np.isfinite(regression["score"])
+
+    # The memoized split and preprocessing give the score of a fresh fit
+    memoized = worker._validate_plan_robust(df.drop(columns="amount"), {}, "label", "classification",
+                                            memo_path=path, engine=engine)
+    assert memoized["score"] == pytest.approx(classification["score"])
+
+
+def test_failed_plan_is_reported(dataset, worker):
+    _, df = dataset
+    result = worker._validate_plan_robust(df.assign(label=1), {}, "label", "classification", "random_forest")
+    assert result["score"] == -np.inf and "only 1 class" in result["error"]
+
+
+def test_sampled_simulation_runs_to_the_full_data(dataset, worker, monkeypatch):
+    _, df = dataset
+    monkeypatch.setattr(worker, "SAMPLED_START_ROWS", 100)
+    monkeypatch.setattr(worker, "SAMPLED_BOOTSTRAP_ROUNDS", 20)
+    plans = {"conservative_plan": {"steps": []}}
+    scores, boots, errors, summary = worker.run_sampled_simulation(
+        df.drop(columns="amount"), plans, "label", "classification", time_budget=600, engine="hist_gradient_boosting"
+    )
+    assert errors == {} and set(scores) == {"baseline", "conservative_plan"}
+    assert len(boots["baseline"]) == 20
+    # Identical plans never separate, so sampling doubles until the data runs out
+    assert summary["stopped"] == "full_data" and summary["rows"] == len(df) and summary["rounds"] == 3
+
+
+def test_sampled_simulation_stops_once_the_plans_separate(worker, upload, monkeypatch):
+    df = _frame(rows=1_600).drop(columns="amount")
+    path = upload("large.csv", df.to_csv(index=False).encode())
+    monkeypatch.setattr(worker, "SAMPLED_START_ROWS", 200)
+    monkeypatch.setattr(worker, "SAMPLED_BOOTSTRAP_ROUNDS", 50)
+    plans = {"aggressive_plan": {"name": "Drop the signal", "steps": [
+        {"function_name": "delete_column", "target_columns": ["signal", "group"]}
+    ]}}
+    response = worker._run_sampled_simulation_job(path, plans, "label", "classification", time_budget=600,
+                                                  engine="hist_gradient_boosting")
+    # Doubling from 200 rows would take four rounds to reach all 1,600
+    sampling = response["sampling"]
+    assert sampling["stopped"] == "separated" and sampling["rounds"] < 4 and sampling["rows"] < len(df)
+    impact = plans["aggressive_plan"]["measured_impact"]
+    low, high = impact["confidence_interval"]
+    assert low <= impact["delta_percent"] <= high < 0
+    assert impact["sample_rows"] == sampling["rows"]
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _frame(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(size=rows)
+    return pd.DataFrame({
+        "signal": signal,
+        "noise": rng.normal(size=rows),
+        "label": (signal + rng.normal(scale=0.3, size=rows) > 0).astype(int),
+    })
+
+
+@pytest.fixture
+def simulation(worker, upload, public_dir, monkeypatch):
+    """The worker running tasks eagerly, in process, with results kept in memory, on datasets in the test's `public/`."""
+    from celery.backends.cache import CacheBackend
+    monkeypatch.setattr(worker.celery_app._local, "backend", CacheBackend(app=worker.celery_app, url="memory://"),
+                        raising=False)
+    monkeypatch.setattr(worker.celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(worker.celery_app.conf, "task_eager_propagates", True)
+    monkeypatch.setattr(worker, "_simulation_file_path", lambda name: str(public_dir / name))
+    upload("a.csv", _frame().to_csv(index=False).encode())
+    return worker
+
+
+PLANS = {
+    "conservative_plan": {"name": "Keep everything", "steps": []},
+    "aggressive_plan": {"name": "Drop the signal", "steps": [{"function_name": "delete_column", "target_columns": ["signal"]}]},
+}
+
+
+def _run(worker, plans):
+    return worker.run_impact_simulation_task.apply(
+        args=("a.csv", plans, "label", "classification"), kwargs={"engine": "random_forest"}
+    ).get()
+
+
+def test_plans_are_scored_by_a_chord_and_collected(simulation):
+    result = _run(simulation, {key: dict(plan) for key, plan in PLANS.items()})
+    assert result["status"] == "SUCCESS" and result["engine"] == "random_forest"
+    impacts = {plan["name"]: plan["measured_impact"] for plan in result["result"]}
+    assert impacts["Keep everything"]["delta_percent"] == 0
+    assert impacts["Drop the signal"]["delta_percent"] < -20
+    assert [plan["name"] for plan in result["result"]] == ["Keep everything", "Drop the signal"]
+
+
+def test_repeat_simulation_only_scores_new_plans(simulation, monkeypatch):
+    first = _run(simulation, {key: dict(plan) for key, plan in PLANS.items()})
+    scored = []
+    score_plan = simulation.score_plan_task.run
+    monkeypatch.setattr(simulation.score_plan_task, "run", lambda *args: scored.append(args[1]) or score_plan(*args))
+    plans = {**{key: dict(plan) for key, plan in PLANS.items()},
+             "balanced_plan": {"name": "Drop the noise", "steps": [{"function_name": "delete_column", "target_columns": ["noise"]}]}}
+    second = _run(simulation, plans)
+    assert scored == ["balanced_plan"]
+    impacts = {plan["name"]: plan["measured_impact"] for plan in second["result"]}
+    assert impacts["Drop the signal"] == {plan["name"]: plan["measured_impact"] for plan in first["result"]}["Drop the signal"]
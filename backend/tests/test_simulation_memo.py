@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import simulation_memo
+
+CSV = b"id,size,label\n" + b"".join(f"{i},{i % 7},{i % 2}\n".encode() for i in range(40))
+CONFIG = {"test_size": 0.25, "random_state": 42}
+
+
+@pytest.fixture
+def memo(worker, upload):
+    return upload("a.csv", CSV)
+
+
+def test_split_is_computed_once_per_version(memo):
+    labels = pd.Series(0, index=np.arange(40))
+    train, test = simulation_memo.split_labels(memo, "label", "classification", CONFIG, labels)
+    assert sorted(np.concatenate([train, test])) == list(range(40)) and len(test) == 10
+
+    # A memo hit returns the stored split even for labels it was not computed from
+    again = simulation_memo.split_labels(memo, "label", "classification", CONFIG, labels.iloc[:4])
+    assert np.array_equal(again[0], train) and np.array_equal(again[1], test)
+
+
+def test_fitted_column_is_reused_for_the_same_values(memo):
+    fits = []
+
+    def fit(column):
+        fits.append(column.name)
+        return {"mean": float(column.mean())}
+
+    column = pd.Series([1.0, 2.0, 3.0], name="size")
+    assert simulation_memo.fitted_column(memo, column, "scale", fit) == {"mean": 2.0}
+    assert simulation_memo.fitted_column(memo, column.copy(), "scale", fit) == {"mean": 2.0}
+    assert simulation_memo.fitted_column(memo, column + 1, "scale", fit) == {"mean": 3.0}
+    assert simulation_memo.fitted_column(memo, column, "impute", fit) == {"mean": 2.0}
+    assert len(fits) == 3
+
+
+def test_memo_files_are_evicted_least_recently_used_first(memo, monkeypatch):
+    fit = lambda column: np.zeros(4096)
+    old, used, new = (pd.Series([float(i)], name="size") for i in range(3))
+    simulation_memo.fitted_column(memo, old, "scale", fit)
+    simulation_memo.fitted_column(memo, used, "scale", fit)
+    memo_dir = os.path.join(simulation_memo.dataset_store.index_dir(memo), "simulation")
+    for age, name in enumerate(sorted(os.listdir(memo_dir), key=lambda n: os.path.getmtime(os.path.join(memo_dir, n)))):
+        os.utime(os.path.join(memo_dir, name), (1000 + age, 1000 + age))
+    file_size = os.path.getsize(os.path.join(memo_dir, os.listdir(memo_dir)[0]))
+
+    # Writes never evict; the budget is enforced when a simulation starts
+    monkeypatch.setattr(simulation_memo, "MEMO_MAX_BYTES", 2 * file_size)
+    simulation_memo.fitted_column(memo, old, "scale", lambda column: pytest.fail("refitted"))
+    simulation_memo.fitted_column(memo, new, "scale", fit)
+    assert len(os.listdir(memo_dir)) == 3
+    simulation_memo.evict(memo)
+    assert len(os.listdir(memo_dir)) == 2
+
+    # `used` was the least recently used once `old` was hit again
+    refits = []
+    simulation_memo.fitted_column(memo, old, "scale", lambda column: pytest.fail("refitted"))
+    simulation_memo.fitted_column(memo, new, "scale", lambda column: pytest.fail("refitted"))
+    simulation_memo.fitted_column(memo, used, "scale", lambda column: refits.append(1) or fit(column))
+    assert refits == [1]
+
+
+def test_eviction_lists_the_memo_once_per_simulation(memo, worker, public_dir, monkeypatch):
+    evictions = []
+    monkeypatch.setattr(simulation_memo, "evict", lambda file_path: evictions.append(file_path))
+    monkeypatch.setattr(worker, "_simulation_file_path", lambda name: str(public_dir / name))
+    monkeypatch.setattr(worker.run_impact_simulation_task, "replace", lambda sig: sig)
+    worker.run_impact_simulation_task.run("a.csv", {}, "label", "classification")
+    assert evictions == [memo]
+
+
+def test_scores_round_trip_and_failures_are_not_kept(memo):
+    plans = {"baseline": {}, "a": {"name": "A", "steps": ["drop size"]}, "b": {"steps": ["fill size"]}}
+    simulation_memo.store_score(memo, "label", "classification", CONFIG, plans["baseline"], {"score": 0.5, "error": None})
+    simulation_memo.store_score(memo, "label", "classification", CONFIG, {"name": "renamed", "steps": ["drop size"]},
+                                {"score": np.float64(0.75), "error": None})
+    simulation_memo.store_score(memo, "label", "classification", CONFIG, plans["b"], {"score": -np.inf, "error": "boom"})
+
+    assert simulation_memo.cached_scores(memo, "label", "classification", CONFIG, plans) == {
+        "baseline": {"score": 0.5, "error": None}, "a": {"score": 0.75, "error": None},
+    }
+    assert simulation_memo.cached_scores(memo, "label", "regression", CONFIG, plans) == {}
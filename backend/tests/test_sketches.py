@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_type_detector import detect_data_types
+from profiling import profile_dataset_streaming
+from sketches import MomentSketch, QuantileSketch, DistinctCounter, TopKSketch
+
+
+def _chunks(values: np.ndarray, size: int):
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def test_moment_sketch_matches_pandas_across_chunks():
+    values = np.random.default_rng(0).gamma(2.0, 3.0, 10_000)
+    sketch = MomentSketch()
+    for chunk in _chunks(values, 777):
+        sketch.update(chunk)
+    series = pd.Series(values)
+    assert sketch.n == len(values)
+    assert sketch.mean == pytest.approx(series.mean())
+    assert sketch.skewness() == pytest.approx(series.skew())
+    assert sketch.kurtosis() == pytest.approx(series.kurtosis())
+
+
+def test_moment_sketches_merge_like_one_pass():
+    values = np.random.default_rng(1).normal(5.0, 2.0, 5_000)
+    left, right, whole = MomentSketch(), MomentSketch(), MomentSketch()
+    left.update(values[:1234])
+    right.update(values[1234:])
+    whole.update(values)
+    left.merge(right)
+    assert (left.n, left.mean, left.m2) == (whole.n, pytest.approx(whole.mean), pytest.approx(whole.m2))
+
+
+def test_quantile_sketch_median_within_rank_error():
+    values = np.random.default_rng(2).normal(size=200_000)
+    sketch = QuantileSketch()
+    for chunk in _chunks(values, 10_000):
+        sketch.update(chunk)
+    rank = (values < sketch.quantile(0.5)).mean()
+    assert abs(rank - 0.5) < 0.01
+
+
+def test_distinct_counter_is_exact_for_small_sets():
+    counter = DistinctCounter()
+    for chunk in _chunks(np.arange(5_000) % 1_000, 300):
+        counter.update(chunk)
+    assert counter.count() == 1_000
+
+
+def test_distinct_counter_estimates_large_sets():
+    counter = DistinctCounter()
+    for chunk in _chunks(np.arange(500_000), 50_000):
+        counter.update(chunk)
+    assert counter.count() == pytest.approx(500_000, rel=0.03)
+
+
+def test_distinct_counter_counts_like_nunique():
+    # -0.0 and 0.0 are one value to pandas; 3 and 3.0 are too, even when they arrive in different chunks
+    counter = DistinctCounter()
+    counter.update(np.array([0.0, -0.0, 1.5]))
+    counter.update(np.array([3, 0]))
+    counter.update(np.array([3.0, -0.0]))
+    assert counter.count() == pd.Series([0.0, -0.0, 1.5, 3, 0, 3.0, -0.0]).nunique() == 3
+
+
+def test_top_k_sketch_modes_are_exact_below_capacity():
+    values = np.array([4, 1, 1, 2, 2, 3])
+    sketch = TopKSketch()
+    for chunk in _chunks(values, 2):
+        sketch.update(chunk)
+    assert sketch.modes() == pd.Series(values).mode().tolist() == [1, 2]
+
+
+def test_streaming_profile_unique_values_match_pandas():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "signed": rng.choice([0.0, -0.0, 1.0, 2.5, np.nan], 5_000),
+        "label": rng.choice(["a", "b", "c", None], 5_000),
+    })
+    chunks = [df.iloc[start:start + 1_000] for start in range(0, len(df), 1_000)]
+    statistics, _ = profile_dataset_streaming(chunks, "data.csv", "2024-01-01", "0.1MB")
+    unique_values = {stat["column"]: stat["uniqueValues"] for stat in statistics["columnStats"]}
+    assert unique_values == {"signed": df["signed"].nunique(), "label": df["label"].nunique()}
+
+
+@pytest.mark.parametrize("total_rows", [20_000, None])
+def test_streaming_profile_types_columns_like_detect_data_types(total_rows):
+    rng = np.random.default_rng(4)
+    rows = 20_000
+    df = pd.DataFrame({
+        # The head alone would read as whole numbers, unique strings and an empty column
+        "amount": np.concatenate([np.arange(2_000.0), rng.normal(50.0, 10.0, rows - 2_000)]),
+        "city": np.concatenate([[f"c{i}" for i in range(2_000)], rng.choice(["Oslo", "Lima", "Pune"], rows - 2_000)]),
+        "note": np.concatenate([[None] * 15_000, rng.choice(["late", "early"], rows - 15_000)]),
+        "rare": np.where(np.arange(rows) % 5_000 == 4_999, "2024-01-05", None),
+    })
+    chunks = [df.iloc[start:start + 1_500] for start in range(0, rows, 1_500)]
+    statistics, _ = profile_dataset_streaming(chunks, "data.csv", "2024-01-01", "1MB", total_rows=total_rows)
+    types = {stat["column"]: stat["dataType"] for stat in statistics["columnStats"]}
+    assert types == detect_data_types(df)
+    assert types["amount"] == "float" and types["city"] != "identifier"
@@ -0,0 +1,38 @@
+import hashlib
+import os
+
+import dataset_store
+
+CSV = "id;city;amount\n".encode() + b"".join(f"{i};Tromsø{i % 3};{i * 1.5}\n".encode("latin-1") for i in range(3_000))
+
+
+def _chunks(content: bytes, size: int):
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+def test_streamed_upload_is_hashed_sniffed_and_previewed(api, public_dir, monkeypatch):
+    monkeypatch.setattr(api.main, "PREVIEW_BYTES", 4096)
+    response = api.post("/api/upload/stream", params={"filename": "sales.csv", "upload_id": "upload-0001"},
+                        content=_chunks(CSV, 1000))
+    assert response.status_code == 200 and response.json()["name"] == "sales.csv"
+    csv_path = str(public_dir / "sales.csv")
+    assert open(csv_path, "rb").read() == CSV
+    assert dataset_store.content_hash(csv_path) == hashlib.sha256(CSV).hexdigest()
+    assert api.dispatched == [os.path.join(str(public_dir), "sales.csv")]
+
+    preview = api.get("/api/upload/upload-0001/preview").json()
+    assert preview["status"] == "SUCCESS" and preview["upload_complete"] and preview["name"] == "sales.csv"
+    assert preview["csv_options"]["sep"] == ";" and preview["csv_options"]["encoding"] != "utf-8"
+    statistics = preview["statistics"]
+    assert statistics["preview"] and [stat["column"] for stat in statistics["columnStats"]] == ["id", "city", "amount"]
+    # Only the first 4 KB were profiled, whole rows only
+    assert 0 < statistics["rows"] < CSV[:4096].count(b"\n")
+
+
+def test_chunked_upload_previews_before_it_completes(api):
+    upload = api.post("/api/uploads", json={"filename": "sales.csv", "size": len(CSV), "chunk_size": 8192}).json()
+    api.put(f"/api/uploads/{upload['upload_id']}/chunks/0", content=CSV[:8192])
+    preview = api.get(f"/api/upload/{upload['upload_id']}/preview").json()
+    assert preview["status"] == "SUCCESS" and "upload_complete" not in preview
+    assert preview["statistics"]["columns"] == 3
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.linalg import toeplitz
+
+import temporal
+
+
+def _reference_acf(series: np.ndarray, max_lag: int) -> np.ndarray:
+    x = series[~np.isnan(series)]
+    x = x - x.mean()
+    return np.array([np.dot(x[:len(x) - lag], x[lag:]) for lag in range(max_lag + 1)]) / np.dot(x, x)
+
+
+def _reference_pacf(acf: np.ndarray) -> np.ndarray:
+    # The last Yule-Walker coefficient of an AR(k) fit, for each k
+    return np.array([1.0] + [np.linalg.solve(toeplitz(acf[:k]), acf[1:k + 1])[-1] for k in range(1, len(acf))])
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    # Profiles are cached in-process by name and content, which every test here shares
+    monkeypatch.setattr(temporal, "_cache", temporal.OrderedDict())
+
+
+def test_acf_and_pacf_match_a_direct_computation():
+    rng = np.random.default_rng(0)
+    ar = np.zeros(500)
+    for t in range(1, len(ar)):
+        ar[t] = 0.7 * ar[t - 1] + rng.normal()
+    gappy = rng.normal(size=500).cumsum()
+    gappy[rng.random(500) < 0.2] = np.nan
+    values = np.column_stack([ar, gappy, np.full(500, 3.0)])
+
+    acf = temporal.autocorrelations(values, max_lag=8)
+    pacf = temporal.partial_autocorrelations(acf)
+    for i in range(2):
+        np.testing.assert_allclose(acf[:, i], _reference_acf(values[:, i], 8), atol=1e-10)
+        np.testing.assert_allclose(pacf[:, i], _reference_pacf(acf[:, i]), atol=1e-8)
+    assert np.isnan(acf[:, 2]).all()
+    assert pacf[1, 0] == pytest.approx(0.7, abs=0.1) and abs(pacf[2, 0]) < 0.15
+
+
+def test_lags_beyond_the_series_are_nan():
+    acf = temporal.autocorrelations(np.array([[1.0], [2.0], [np.nan], [4.0]]), max_lag=5)
+    assert not np.isnan(acf[:3, 0]).any() and np.isnan(acf[3:, 0]).all()
+
+
+def test_missing_runs():
+    missing = np.array([0, 1, 1, 0, 0, 1, 1, 1, 0, 1], dtype=bool)
+    assert temporal._missing_runs(missing) == {"missing": 6, "gaps": 3, "longest_gap": 3}
+    assert temporal._missing_runs(np.zeros(4, dtype=bool)) == {"missing": 0, "gaps": 0, "longest_gap": 0}
+
+
+def test_spacing_finds_holes_and_duplicates():
+    times = pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03", "2024-01-07"]).asi8
+    spacing = temporal._spacing(times)
+    assert spacing["median_interval_seconds"] == 86400
+    assert spacing["max_interval_seconds"] == 4 * 86400
+    assert spacing["duplicate_timestamps"] == 1 and spacing["irregular_intervals"] == 1
+    assert temporal._spacing(times[:1]) == {"rows": 1}
+
+
+def test_time_column_is_detected_by_its_values(public_dir, upload):
+    numbers = upload("numbers.csv", b"id,amount\n1,20240101\n2,20240102\n")
+    assert temporal.detect_time_column(numbers) is None
+    assert temporal.load_temporal_profile(numbers) is None and temporal.time_index(numbers) is None
+
+    dated = upload("dated.csv", b"label,when,amount\na,2024-01-01,1\nb,2024-01-02,2\n")
+    assert temporal.detect_time_column(dated) == "when"
+
+
+def test_profile_follows_time_order(public_dir, upload):
+    csv = b"reading,stamp\n" + b"".join(
+        f"{'' if day in (3, 4) else day},2024-01-{day:02d}\n".encode() for day in (5, 1, 4, 2, 3, 6, 7, 8, 9, 10, 11, 12)
+    ) + b"9,not a date\n"
+    path = upload("series.csv", csv)
+    profile = temporal.load_temporal_profile(path)
+    assert profile["time_column"] == "stamp" and profile["index"]["rows"] == 12
+    # Days 3 and 4 are adjacent once sorted, though not in the file
+    assert profile["columns"]["reading"]["gaps"] == {"missing": 2, "gaps": 1, "longest_gap": 2}
+    assert len(profile["columns"]["reading"]["acf"]) == temporal.TEMPORAL_MAX_LAG
+
+    time_column, order, times = temporal.time_index(path)
+    assert time_column == "stamp"
+    assert list(order) == [1, 3, 4, 2, 0, *range(5, 12)]
+    assert np.all(np.diff(times) == 86400 * 10**9)
+
+
+def test_no_time_column_is_remembered_on_disk(public_dir, upload, monkeypatch):
+    path = upload("numbers.csv", b"id,note\n1,a\n2,b\n")
+    assert temporal.load_temporal_profile(path) is None
+    monkeypatch.setattr(temporal, "_cache", temporal.OrderedDict())
+    monkeypatch.setattr(temporal, "detect_time_column", lambda csv_path: pytest.fail("detected again"))
+    assert temporal.load_temporal_profile(path) is None and temporal.time_index(path) is None
@@ -30,13 +30,15 @@ const CustomHeader = props => {
     );
 };
 
-const DataTable = ({ rowData, columnDefs, theme, onRunTask, onRefresh }) => {
+const DataTable = ({ datasource, columnDefs, theme, onRunTask, onRefresh, onSearch }) => {
     const gridRef = useRef(null);
+    const searchTimeoutRef = useRef(null);
 
-    const onSearch = (event) => {
-        if (gridRef.current && gridRef.current.api) {
-            gridRef.current.api.setQuickFilter(event.target.value);
-        }
+    // Search runs on the server over the whole dataset, so wait for a pause in typing
+    const handleSearch = (event) => {
+        const value = event.target.value;
+        clearTimeout(searchTimeoutRef.current);
+        searchTimeoutRef.current = setTimeout(() => onSearch && onSearch(value), 300);
     };
   
     const getContextMenuItems = useCallback((params) => {
@@ -96,7 +98,7 @@ const DataTable = ({ rowData, columnDefs, theme, onRunTask, onRefresh }) => {
             <div className="table-controls">
                 <div className="search-bar">
                     <LuSearch />
-                    <input type="text" placeholder="Search data..." onChange={onSearch} />
+                    <input type="text" placeholder="Search data..." onChange={handleSearch} />
                 </div>
                 <button className="filter-button">
                     <LuFilter />
@@ -106,7 +108,10 @@ const DataTable = ({ rowData, columnDefs, theme, onRunTask, onRefresh }) => {
             <div className={`${theme} ag-custom-theme`} style={{ height: 700, width: '100%' }}>
                 <AgGridReact
                     ref={gridRef}
-                    rowData={rowData}
+                    rowModelType={'infinite'}
+                    datasource={datasource}
+                    cacheBlockSize={100}
+                    maxBlocksInCache={50}
                     columnDefs={columnDefs}
                     defaultColDef={defaultColDef}
                     pagination={true}
@@ -115,8 +120,6 @@ const DataTable = ({ rowData, columnDefs, theme, onRunTask, onRefresh }) => {
                     paginationPageSizeSelector={[50,100,150,200]}
                     sideBar={true}
                     getContextMenuItems={getContextMenuItems}
-                    
-                    rowDragManaged={true}
                     rowSelection={'multiple'}
                     suppressRowClickSelection={true}
                 />
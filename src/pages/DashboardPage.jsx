@@ -5,26 +5,32 @@ import { toast } from 'react-toastify';
 import { Upload, Database, AlertTriangle, TrendingUp, Activity, Calendar, X } from 'lucide-react';
 import '../styles/Dashboard.css';
 
+const PAGE_SIZE = 100;
+
 const DashboardPage = () => {
   const [datasetsSummary, setDatasetsSummary] = useState([]);
+  const [totalDatasets, setTotalDatasets] = useState(0);
   const [isLoading, setIsLoading] = useState(true);
   const { datasets, setCurrentDataset, removeDataset } = useDatasets();
   const navigate = useNavigate();
 
+  // Summaries come from the server-side catalog one page at a time, most recently modified first
+  const fetchSummaryPage = async (offset) => {
+    try {
+      const response = await fetch(`/api/datasets/dashboard-summary?offset=${offset}&limit=${PAGE_SIZE}`);
+      if (!response.ok) throw new Error("Could not fetch dashboard data.");
+      const data = await response.json();
+      setTotalDatasets(Number(response.headers.get('X-Total-Count') ?? data.length));
+      setDatasetsSummary(prev => offset === 0 ? data : [...prev, ...data]);
+    } catch (error) {
+      toast.error(error.message);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchSummary = async () => {
-      try {
-        const response = await fetch('/api/datasets/dashboard-summary');
-        if (!response.ok) throw new Error("Could not fetch dashboard data.");
-        const data = await response.json();
-        setDatasetsSummary(data);
-      } catch (error) {
-        toast.error(error.message);
-      } finally {
-        setIsLoading(false);
-      }
-    };
-    fetchSummary();
+    fetchSummaryPage(0);
   }, [datasets]); 
 
   const handleCardClick = (datasetSummary) => {
@@ -55,6 +61,7 @@ const DashboardPage = () => {
         }
 
         setDatasetsSummary(prev => prev.filter(d => d.filename !== datasetName));
+        setTotalDatasets(prev => Math.max(prev - 1, 0));
         removeDataset(datasetName);
         toast.success(`Dataset '${datasetName}' was successfully deleted.`);
 
@@ -63,9 +70,9 @@ const DashboardPage = () => {
     }
   };
 
-  const activeDatasets = datasetsSummary.length;
+  const activeDatasets = totalDatasets;
   const qualityAlerts = datasetsSummary.filter(d => d.qualityScore < 70).length;
-  const avgQuality = activeDatasets > 0 ? Math.round(datasetsSummary.reduce((sum, d) => sum + d.qualityScore, 0) / activeDatasets) : 0;
+  const avgQuality = datasetsSummary.length > 0 ? Math.round(datasetsSummary.reduce((sum, d) => sum + d.qualityScore, 0) / datasetsSummary.length) : 0;
   const processingJobs = datasetsSummary.filter(d => d.status === "CLEANING").length;
 
   const getStatusColor = (status) => {
@@ -197,6 +204,11 @@ const DashboardPage = () => {
           );
         })}
       </main>
+      {datasetsSummary.length < totalDatasets && (
+        <button className="upload-button" onClick={() => fetchSummaryPage(datasetsSummary.length)}>
+          Load more datasets
+        </button>
+      )}
     </div>
   );
 };
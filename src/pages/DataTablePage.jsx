@@ -1,6 +1,5 @@
 import React, { useState, useEffect, useCallback, useRef, useMemo } from 'react';
 import DataTable from '../components/DataTable';
-import Papa from 'papaparse';
 import { useDatasets } from '../context/DatasetContext';
 import { toast } from 'react-toastify';
 import { FaFileCsv, FaChartBar } from "react-icons/fa";
@@ -9,6 +8,31 @@ import InsightsSidebar from '../components/InsightsSidebar';
 import StatisticsSidebar from '../components/StatisticsSidebar';
 import '../styles/DataTablePage.css';
 
+// Job progress, job results and profile readiness are pushed over server-sent events instead of polled.
+// Each helper returns a function that closes its stream.
+const followEvents = (params, handlers) => {
+    const source = new EventSource(`/api/events?${new URLSearchParams(params)}`);
+    Object.entries(handlers).forEach(([type, handler]) =>
+        source.addEventListener(type, (event) => handler(JSON.parse(event.data))));
+    return () => source.close();
+};
+
+const followJob = (jobId, onDone, onProgress) => {
+    const close = followEvents({ job_id: jobId }, {
+        progress: (event) => onProgress?.(event),
+        job: (status) => {
+            close();
+            onDone(status);
+        },
+    });
+    return close;
+};
+
+const stopFollowing = (ref) => {
+    if (ref.current) ref.current();
+    ref.current = null;
+};
+
 const ThemeSelector = ({ theme, setTheme }) => (
     <select className="theme-selector" value={theme} onChange={e => setTheme(e.target.value)}>
         <option value="ag-theme-alpine">Alpine</option>
@@ -49,7 +73,9 @@ const QuickActions = ({ onAction }) => {
 
 const DataTablePage = () => {
     const { datasets, currentDataset, setCurrentDataset } = useDatasets();
-    const [rowData, setRowData] = useState([]);
+    const [rowCount, setRowCount] = useState(0);
+    const [dataVersion, setDataVersion] = useState(0);
+    const [searchText, setSearchText] = useState('');
     const [error, setError] = useState('');
     const [theme, setTheme] = useState('ag-theme-alpine');
     
@@ -88,80 +114,85 @@ const DataTablePage = () => {
 
     const [isApplyingPlan, setIsApplyingPlan] = useState(false);
     
-    const loadData = useCallback(async () => {
+    // Rows are fetched a block at a time as the grid scrolls; bumping dataVersion drops the cached blocks
+    const loadData = useCallback(() => {
         if (!currentDataset) return;
-        try {
-            const urlToFetch = `${currentDataset.path}?t=${Date.now()}`;
-            const response = await fetch(urlToFetch);
-            if (!response.ok) throw new Error('Failed to fetch dataset');
-            const csvText = await response.text();
-            
-            Papa.parse(csvText, {
-                header: true,
-                dynamicTyping: true,
-                skipEmptyLines: true,
-                complete: (result) => {
-                    if (result.data && result.data.length > 0) {
-                        setRowData(result.data);
-                        setError('');
-                    } else {
-                        setRowData([]);
-                        setError('No data rows found in CSV');
-                    }
-                },
-                error: () => { setError('Failed to parse CSV file.'); }
-            });
-        } catch (e) { setError(e.message || 'Could not load or process the file.'); }
+        setError('');
+        setDataVersion(v => v + 1);
     }, [currentDataset]);
 
-    const fetchMetrics = useCallback(async () => {
-        if (!currentDataset) return;
-        if (metricsPollingRef.current) clearInterval(metricsPollingRef.current);
-        setAreMetricsLoading(true);
+    const datasource = useMemo(() => {
+        if (!currentDataset) return null;
+        return {
+            getRows: async (params) => {
+                try {
+                    const limit = params.endRow - params.startRow;
+                    const hasFilters = Object.keys(params.filterModel || {}).length > 0;
+                    const hasSort = (params.sortModel || []).length > 0;
+                    // Sorting, filtering and search are answered server-side from indexes cached per dataset version
+                    const response = (hasFilters || hasSort || searchText)
+                        ? await fetch(`/api/dataset/${currentDataset.name}/query`, {
+                            method: 'POST',
+                            headers: { 'Content-Type': 'application/json' },
+                            body: JSON.stringify({
+                                offset: params.startRow,
+                                limit,
+                                sort: params.sortModel,
+                                filters: params.filterModel,
+                                search: searchText,
+                            }),
+                        })
+                        : await fetch(`/api/dataset/${currentDataset.name}/rows?offset=${params.startRow}&limit=${limit}&v=${dataVersion}`);
+                    if (!response.ok) throw new Error('Failed to fetch dataset rows');
+                    const data = await response.json();
+                    setRowCount(data.total_rows);
+                    if (data.total_rows === 0 && !(hasFilters || hasSort || searchText)) setError('No data rows found in dataset');
+                    params.successCallback(data.rows, data.total_rows);
+                } catch (e) {
+                    setError(e.message || 'Could not load or process the file.');
+                    params.failCallback();
+                }
+            }
+        };
+    }, [currentDataset, dataVersion, searchText]);
 
+    // Fetches once; while the profile is still being computed, waits for its `profile` event and fetches again
+    const fetchWhenProfiled = useCallback((url, errorMessage, pollingRef, onData, onDone) => {
+        stopFollowing(pollingRef);
         const fetchData = async () => {
             try {
-                const response = await fetch(`/api/dataset/${currentDataset.name}/statistics`);
-                if (response.status === 202) return;
-                if (!response.ok) throw new Error('Failed to fetch statistics.');
-
-                const data = await response.json();
-                setDatasetMetrics(data);
-                setAreMetricsLoading(false);
-                clearInterval(metricsPollingRef.current);
+                const response = await fetch(url);
+                if (response.status === 202) return false;
+                if (!response.ok) throw new Error(errorMessage);
+                onData(await response.json());
             } catch (err) {
                 toast.error(err.message);
-                setAreMetricsLoading(false);
-                clearInterval(metricsPollingRef.current);
             }
+            stopFollowing(pollingRef);
+            onDone();
+            return true;
         };
-        fetchData();
-        metricsPollingRef.current = setInterval(fetchData, 3000);
+        fetchData().then(done => {
+            if (done) return;
+            pollingRef.current = followEvents({ dataset: currentDataset.name }, {
+                profile: () => fetchData(),
+            });
+        });
     }, [currentDataset]);
 
-    const fetchDiagnosticReport = useCallback(async () => {
+    const fetchMetrics = useCallback(() => {
         if (!currentDataset) return;
-        if (diagnosticPollingRef.current) clearInterval(diagnosticPollingRef.current);
-        setIsReportLoading(true);
+        setAreMetricsLoading(true);
+        fetchWhenProfiled(`/api/dataset/${currentDataset.name}/statistics`, 'Failed to fetch statistics.',
+            metricsPollingRef, setDatasetMetrics, () => setAreMetricsLoading(false));
+    }, [currentDataset, fetchWhenProfiled]);
 
-        const fetchData = async () => {
-            try {
-                const response = await fetch(`/api/dataset/${currentDataset.name}/diagnostics`);
-                if (response.status === 202) return;
-                if (!response.ok) throw new Error('Failed to fetch diagnostic report.');
-                const data = await response.json();
-                setDiagnosticReport(data);
-                setIsReportLoading(false);
-                clearInterval(diagnosticPollingRef.current);
-            } catch (err) {
-                toast.error(err.message);
-                setIsReportLoading(false);
-                clearInterval(diagnosticPollingRef.current);
-            }
-        };
-        fetchData();
-        diagnosticPollingRef.current = setInterval(fetchData, 3000);
-    }, [currentDataset]);
+    const fetchDiagnosticReport = useCallback(() => {
+        if (!currentDataset) return;
+        setIsReportLoading(true);
+        fetchWhenProfiled(`/api/dataset/${currentDataset.name}/diagnostics`, 'Failed to fetch diagnostic report.',
+            diagnosticPollingRef, setDiagnosticReport, () => setIsReportLoading(false));
+    }, [currentDataset, fetchWhenProfiled]);
 
     const handleOpenStatistics = () => {
         setSidebarMode('statistics');
@@ -206,7 +237,7 @@ const DataTablePage = () => {
             return;
         }
 
-        if (plansPollingRef.current) clearInterval(plansPollingRef.current);
+        stopFollowing(plansPollingRef);
         setArePlansLoading(true);
         setTreatmentPlans(null); // Clear previous plans
         const toastId = toast.loading("Submitting request to AI Co-pilot...");
@@ -229,26 +260,21 @@ const DataTablePage = () => {
             const { job_id } = await response.json();
             toast.update(toastId, { render: "Job submitted. Waiting for AI to generate plans...", type: 'info', isLoading: true });
 
-            plansPollingRef.current = setInterval(async () => {
-                const statusResponse = await fetch(`/api/analyze/status/${job_id}`);
-                const data = await statusResponse.json();
-
-                if (data.status !== 'PENDING') {
-                    clearInterval(plansPollingRef.current);
-                    setArePlansLoading(false);
-                    
-                    if (data.status === 'SUCCESS') {
-                        setTreatmentPlans(data.result);
-                        toast.update(toastId, { render: "AI Treatment Plans generated successfully!", type: 'success', isLoading: false, autoClose: 5000 });
-                        // NOTE: In the next step, we will display these plans.
-                        // For now, we can log them to see the result.
-                        console.log("Generated Plans:", data.result);
-                    } else {
-                        setTreatmentPlans(null);
-                        toast.update(toastId, { render: `Task failed: ${data.error || "An unknown error occurred."}`, type: 'error', isLoading: false, autoClose: 7000 });
-                    }
+            plansPollingRef.current = followJob(job_id, (data) => {
+                plansPollingRef.current = null;
+                setArePlansLoading(false);
+
+                if (data.status === 'SUCCESS') {
+                    setTreatmentPlans(data.result);
+                    toast.update(toastId, { render: "AI Treatment Plans generated successfully!", type: 'success', isLoading: false, autoClose: 5000 });
+                    // NOTE: In the next step, we will display these plans.
+                    // For now, we can log them to see the result.
+                    console.log("Generated Plans:", data.result);
+                } else {
+                    setTreatmentPlans(null);
+                    toast.update(toastId, { render: `Task failed: ${data.error || "An unknown error occurred."}`, type: 'error', isLoading: false, autoClose: 7000 });
                 }
-            }, 5000); // Poll every 5 seconds for this potentially longer task
+            }, (event) => toast.update(toastId, { render: `${event.message}...` }));
 
         } catch (error) {
             setArePlansLoading(false);
@@ -275,7 +301,7 @@ const DataTablePage = () => {
         }
 
         if (taskType === 'diagnosis') {
-            if (insightsPollingRef.current) clearInterval(insightsPollingRef.current);
+            stopFollowing(insightsPollingRef);
             setSidebarColumn(column);
             setAiAnalysis(null);
             setIsInsightsLoading(true);
@@ -308,20 +334,16 @@ const DataTablePage = () => {
                 return;
             }
 
-            insightsPollingRef.current = setInterval(async () => {
-                const statusResponse = await fetch(`/api/analyze/status/${job_id}`);
-                const data = await statusResponse.json();
-                if (data.status !== 'PENDING') {
-                    clearInterval(insightsPollingRef.current);
-                    setIsInsightsLoading(false);
-                    setAiAnalysis(data);
-                    if (data.status !== 'SUCCESS') {
-                        toast.error(`Task failed: ${data.error || "An unknown error occurred."}`);
-                    } else {
-                        toast.success("AI Analysis complete!");
-                    }
+            insightsPollingRef.current = followJob(job_id, (data) => {
+                insightsPollingRef.current = null;
+                setIsInsightsLoading(false);
+                setAiAnalysis(data);
+                if (data.status !== 'SUCCESS') {
+                    toast.error(`Task failed: ${data.error || "An unknown error occurred."}`);
+                } else {
+                    toast.success("AI Analysis complete!");
                 }
-            }, 3000);
+            });
         } catch (error) {
             toast.update(toastId, { render: error.message, type: 'error', isLoading: false, autoClose: 5000 });
             if (taskType === 'diagnosis') {
@@ -368,28 +390,21 @@ const DataTablePage = () => {
             // We should poll similar to generate-plans. 
             // Let's do a quick polling implementation here for robustness.
             
-            const jobId = result.job_id;
-            const pollInterval = setInterval(async () => {
-                const statusRes = await fetch(`/api/analyze/status/${jobId}`);
-                const statusData = await statusRes.json();
-                
-                if (statusData.status !== 'PENDING') {
-                    clearInterval(pollInterval);
-                    setIsApplyingPlan(false);
-                    
-                    if (statusData.status === 'SUCCESS') {
-                         toast.update(toastId, { render: "Plan applied successfully! Reloading data...", type: 'success', isLoading: false, autoClose: 3000 });
-                         
-                         // Refresh everything
-                         handleActionComplete(); 
-                         // Reset simulation state so user goes back to start or sees updated stats
-                         setTreatmentPlans(null); 
-                         setSimulationResults(null);
-                    } else {
-                        toast.update(toastId, { render: `Application failed: ${statusData.error}`, type: 'error', isLoading: false, autoClose: 5000 });
-                    }
+            followJob(result.job_id, (statusData) => {
+                setIsApplyingPlan(false);
+
+                if (statusData.status === 'SUCCESS') {
+                     toast.update(toastId, { render: "Plan applied successfully! Reloading data...", type: 'success', isLoading: false, autoClose: 3000 });
+
+                     // Refresh everything
+                     handleActionComplete();
+                     // Reset simulation state so user goes back to start or sees updated stats
+                     setTreatmentPlans(null);
+                     setSimulationResults(null);
+                } else {
+                    toast.update(toastId, { render: `Application failed: ${statusData.error}`, type: 'error', isLoading: false, autoClose: 5000 });
                 }
-            }, 2000);
+            });
 
         } catch (error) {
             setIsApplyingPlan(false);
@@ -439,7 +454,7 @@ const DataTablePage = () => {
     const handleRunSimulation = useCallback(async () => {
         if (!currentDataset || !treatmentPlans) return;
 
-        if (simulationPollingRef.current) clearInterval(simulationPollingRef.current);
+        stopFollowing(simulationPollingRef);
         setIsSimulating(true);
         setSimulationResults(null);
         const toastId = toast.loading("Starting impact simulation... This may take a few minutes.");
@@ -452,6 +467,7 @@ const DataTablePage = () => {
                     plans: treatmentPlans,
                     target_variable: targetVariable,
                     goal: goal === 'stable_forecasting' ? 'regression' : 'classification', // Example mapping
+                    mode: 'auto', // large datasets are ranked on growing samples within a time budget
                 }),
             });
             if (!response.ok) throw new Error((await response.json()).detail || 'Failed to start simulation.');
@@ -459,24 +475,19 @@ const DataTablePage = () => {
             const { job_id } = await response.json();
             toast.update(toastId, { render: "Simulation running. Validating plans against probe models...", isLoading: true });
 
-            simulationPollingRef.current = setInterval(async () => {
-                const statusResponse = await fetch(`/api/analyze/status/${job_id}`);
-                const data = await statusResponse.json();
-
-                if (data.status !== 'PENDING') {
-                    clearInterval(simulationPollingRef.current);
-                    setIsSimulating(false); // <--- THIS MUST BE HERE TO STOP SPINNER
-                    
-                    if (data.status === 'SUCCESS') {
-                        setSimulationResults(data.result);
-                        setSimulationWarnings(data.warnings || []);
-                        toast.update(toastId, { render: "Simulation complete!", type: 'success', isLoading: false, autoClose: 5000 });
-                    } else {
-                        // It failed
-                        toast.update(toastId, { render: `Simulation failed: ${data.error}`, type: 'error', isLoading: false, autoClose: 7000 });
-                    }
+            simulationPollingRef.current = followJob(job_id, (data) => {
+                simulationPollingRef.current = null;
+                setIsSimulating(false); // <--- THIS MUST BE HERE TO STOP SPINNER
+
+                if (data.status === 'SUCCESS') {
+                    setSimulationResults(data.result);
+                    setSimulationWarnings(data.warnings || []);
+                    toast.update(toastId, { render: "Simulation complete!", type: 'success', isLoading: false, autoClose: 5000 });
+                } else {
+                    // It failed
+                    toast.update(toastId, { render: `Simulation failed: ${data.error}`, type: 'error', isLoading: false, autoClose: 7000 });
                 }
-            }, 5000);
+            }, (event) => toast.update(toastId, { render: `${event.message}...` }));
 
         } catch (error) {
             setIsSimulating(false);
@@ -490,7 +501,8 @@ const DataTablePage = () => {
             headerName: stat.column.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase()),
             field: stat.column,
             headerComponentParams: { description: stat.dataType },
-            sortable: true, filter: true, editable: true, enableRowGroup: true,
+            sortable: true, editable: true, enableRowGroup: true,
+            filter: ['integer', 'float'].includes(stat.dataType) ? 'agNumberColumnFilter' : 'agTextColumnFilter',
             ...(datasetMetrics.columnStats.indexOf(stat) === 0 && { checkboxSelection: true, headerCheckboxSelection: true }),
         }));
     }, [datasetMetrics]);
@@ -501,8 +513,9 @@ const DataTablePage = () => {
             fetchMetrics();
         }
         return () => {
-            if (metricsPollingRef.current) clearInterval(metricsPollingRef.current);
-            if (insightsPollingRef.current) clearInterval(insightsPollingRef.current);
+            stopFollowing(metricsPollingRef);
+            stopFollowing(diagnosticPollingRef);
+            stopFollowing(insightsPollingRef);
         };
     }, [currentDataset, loadData, fetchMetrics]);
 
@@ -534,7 +547,7 @@ const DataTablePage = () => {
                         <FaFileCsv />
                         <div>
                             <strong>{currentDataset?.name || 'No file selected'}</strong>
-                            <span>{rowData.length} rows &times; {columnDefs.length > 0 ? columnDefs.length : '...'} columns</span>
+                            <span>{rowCount} rows &times; {columnDefs.length > 0 ? columnDefs.length : '...'} columns</span>
                         </div>
                     </div>
                     <div className="header-actions">
@@ -551,11 +564,12 @@ const DataTablePage = () => {
                 {error ? (<div className="error-message">{error}</div>) : (
                     <div className='animated-component'>
                         <DataTable
-                            rowData={rowData}
+                            datasource={datasource}
                             columnDefs={columnDefs}
                             theme={theme}
                             onRunTask={handleRunTask}
                             onRefresh={loadData}
+                            onSearch={setSearchText}
                         />
                     </div>
                 )}
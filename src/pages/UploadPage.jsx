@@ -1,5 +1,5 @@
 // src/pages/UploadPage.jsx
-import React, { useState, useCallback } from 'react';
+import React, { useState, useCallback, useRef, useEffect } from 'react';
 import { useDropzone } from 'react-dropzone';
 import { useNavigate } from 'react-router-dom';
 import { useDatasets } from '../context/DatasetContext';
@@ -7,11 +7,124 @@ import { FaFileCsv } from 'react-icons/fa';
 import { toast } from 'react-toastify';
 import '../styles/UploadPage.css';
 
+// Files above this size go through the resumable chunked protocol, several chunks at a time
+const CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024;
+const CHUNK_SIZE = 16 * 1024 * 1024;
+const PARALLEL_CHUNKS = 4;
+const CHUNK_RETRIES = 3;
+
+const fileKey = (file) => `chunked-upload:${file.name}:${file.size}:${file.lastModified}`;
+
+const readError = async (response, fallback) => {
+  try {
+    return (await response.json()).detail || fallback;
+  } catch {
+    return fallback;
+  }
+};
+
+// Resumes the upload of the same file if an earlier attempt was interrupted
+const startOrResumeUpload = async (file) => {
+  const savedId = localStorage.getItem(fileKey(file));
+  if (savedId) {
+    const response = await fetch(`/api/uploads/${savedId}`);
+    if (response.ok) {
+      const upload = await response.json();
+      return { uploadId: savedId, chunkSize: upload.chunk_size, missing: upload.missing, total: upload.total_chunks };
+    }
+  }
+  const response = await fetch('/api/uploads', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename: file.name, size: file.size, chunk_size: CHUNK_SIZE }),
+  });
+  if (!response.ok) throw new Error(await readError(response, 'Could not start the upload.'));
+  const upload = await response.json();
+  localStorage.setItem(fileKey(file), upload.upload_id);
+  const missing = Array.from({ length: upload.total_chunks }, (_, index) => index);
+  return { uploadId: upload.upload_id, chunkSize: upload.chunk_size, missing, total: upload.total_chunks };
+};
+
+const uploadInChunks = async (file, onStart, onProgress) => {
+  const { uploadId, chunkSize, missing, total } = await startOrResumeUpload(file);
+  onStart(uploadId);
+  let done = total - missing.length;
+  onProgress(done / total);
+
+  const queue = [...missing];
+  const sendChunk = async (index) => {
+    const body = file.slice(index * chunkSize, (index + 1) * chunkSize);
+    for (let attempt = 1; ; attempt++) {
+      try {
+        const response = await fetch(`/api/uploads/${uploadId}/chunks/${index}`, { method: 'PUT', body });
+        if (response.ok) return;
+        if (attempt >= CHUNK_RETRIES) throw new Error(await readError(response, `Chunk ${index} failed.`));
+      } catch (error) {
+        if (attempt >= CHUNK_RETRIES) throw error;
+      }
+    }
+  };
+  const worker = async () => {
+    while (queue.length > 0) {
+      await sendChunk(queue.shift());
+      onProgress(++done / total);
+    }
+  };
+  await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+
+  const response = await fetch(`/api/uploads/${uploadId}/complete`, { method: 'POST' });
+  if (!response.ok) throw new Error(await readError(response, 'File upload failed.'));
+  localStorage.removeItem(fileKey(file));
+  return response.json();
+};
+
+const uploadStream = async (file, onStart) => {
+  const uploadId = crypto.randomUUID();
+  onStart(uploadId);
+  const params = new URLSearchParams({ filename: file.name, upload_id: uploadId });
+  const response = await fetch(`/api/upload/stream?${params}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/octet-stream' },
+    body: file,
+  });
+  if (!response.ok) throw new Error(await readError(response, 'File upload failed.'));
+  return response.json();
+};
+
 const UploadPage = () => {
   const [selectedFiles, setSelectedFiles] = useState([]);
   const { addDataset } = useDatasets();
   const navigate = useNavigate();
   const [isUploading, setIsUploading] = useState(false);
+  const [preview, setPreview] = useState(null);
+  const [progress, setProgress] = useState(null);
+  const previewTimer = useRef(null);
+
+  const stopPreviewPolling = () => {
+    clearInterval(previewTimer.current);
+    previewTimer.current = null;
+  };
+
+  useEffect(() => stopPreviewPolling, []);
+
+  // The server profiles the first rows while the rest of the file is still arriving
+  const pollPreview = (uploadId) => {
+    previewTimer.current = setInterval(async () => {
+      try {
+        const response = await fetch(`/api/upload/${uploadId}/preview`);
+        if (!response.ok) return;
+        const result = await response.json();
+        if (result.status === 'SUCCESS') {
+          setPreview(result);
+          stopPreviewPolling();
+        } else if (result.status === 'FAILURE') {
+          stopPreviewPolling();
+        }
+      } catch {
+        // Keep polling until the upload finishes
+      }
+    }, 1000);
+  };
 
   const onDrop = useCallback(acceptedFiles => {
     if (acceptedFiles.length > 0) {
@@ -30,19 +143,15 @@ const UploadPage = () => {
   const handleProcessAndUpload = async () => {
     if (selectedFiles.length === 0) return;
     setIsUploading(true);
-    
-    const formData = new FormData();
-    formData.append("file", selectedFiles[0]);
+    setPreview(null);
+    setProgress(null);
 
-    try {
-      const response = await fetch('/api/upload', {
-        method: 'POST',
-        body: formData,
-      });
+    const file = selectedFiles[0];
 
-      if (!response.ok) throw new Error((await response.json()).detail || 'File upload failed.');
-      
-      const result = await response.json();
+    try {
+      const result = file.size > CHUNKED_UPLOAD_THRESHOLD
+        ? await uploadInChunks(file, pollPreview, setProgress)
+        : await uploadStream(file, pollPreview);
       
       addDataset({
         name: result.name,
@@ -57,6 +166,8 @@ const UploadPage = () => {
     } catch (error) {
       toast.error(error.message);
     } finally {
+      stopPreviewPolling();
+      setProgress(null);
       setIsUploading(false);
     }
   };
@@ -94,8 +205,16 @@ const UploadPage = () => {
             <span className="file-type-badge">CSV</span>
           </div>
           <button onClick={handleProcessAndUpload} disabled={isUploading} className="process-button">
-            {isUploading ? 'Uploading...' : 'Process and Upload File'}
+            {isUploading
+              ? `Uploading...${progress !== null ? ` ${Math.round(progress * 100)}%` : ''}`
+              : 'Process and Upload File'}
           </button>
+          {isUploading && preview && (
+            <p className="supported-formats">
+              Preview of the first {preview.statistics.rows} rows: {preview.statistics.columns} columns,
+              separated by "{preview.csv_options.sep === '\t' ? 'tab' : preview.csv_options.sep}" ({preview.csv_options.encoding})
+            </p>
+          )}
         </div>
       )}
     </div>